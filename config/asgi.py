@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+from farm import http_client  # noqa: E402 (needs the app registry)
+
+http_client.use_loop_clients()
@@ -0,0 +1,40 @@
+"""
+Auth routes, mounted lazily by config/urls.py: dj-rest-auth and the Google /
+email OTP views (allauth adapters, JWT, HTTP clients) load on the first auth
+request, not on every worker boot.
+"""
+
+from django.conf import settings
+from django.urls import include, path
+from django.views.generic import TemplateView
+
+from farm.email_otp_views import send_email_code, verify_email_code
+
+urlpatterns = [
+    # Auth (dj-rest-auth)
+    path("dj-rest-auth/", include("dj_rest_auth.urls")),
+    path("dj-rest-auth/registration/", include("dj_rest_auth.registration.urls")),
+    # Email OTP, under /api/v1/auth/email/ and (older clients) /auth/email/
+    path("api/v1/auth/email/send-code/", send_email_code, name="send_email_code"),
+    path(
+        "api/v1/auth/email/verify-code/",
+        verify_email_code,
+        name="verify_email_code",
+    ),
+    path("auth/email/send-code/", send_email_code, name="send_email_code"),
+    path("auth/email/verify-code/", verify_email_code, name="verify_email_code"),
+]
+
+# Google OAuth
+if settings.ENABLE_GOOGLE_LOGIN:
+    from farm.auth_views import GoogleLogin, exchange_google_code
+
+    urlpatterns += [
+        path("dj-rest-auth/google/", GoogleLogin.as_view(), name="google_login"),
+        path(
+            "auth/google/callback/",
+            TemplateView.as_view(template_name="google_callback.html"),
+            name="google_callback",
+        ),
+        path("auth/google/exchange/", exchange_google_code, name="google_exchange"),
+    ]
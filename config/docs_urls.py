@@ -0,0 +1,47 @@
+"""
+Swagger / ReDoc, mounted lazily by config/urls.py when ENABLE_API_DOCS is on:
+drf_yasg is only imported once someone opens the docs.
+
+The schema itself is never generated per request: /swagger.json and
+/swagger.yaml serve the stored document (farm/openapi.py) with an ETag, and
+the UI pages load it from there (SPEC_URL in settings).
+"""
+
+from django.http import HttpResponse
+from django.urls import path, re_path
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+from drf_yasg.views import UI_RENDERERS, get_schema_view
+from rest_framework import permissions
+
+from farm import openapi
+
+# browsers and crawlers revalidate with If-None-Match after this
+SCHEMA_MAX_AGE = 300
+
+schema_view = get_schema_view(
+    openapi.INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+
+@require_safe
+@condition(etag_func=lambda request, format: openapi.get_document(format)[1])
+def schema_file(request, format):
+    body, _ = openapi.get_document(format)
+    response = HttpResponse(body, content_type=openapi.FORMATS[format][1])
+    patch_cache_control(response, public=True, max_age=SCHEMA_MAX_AGE)
+    return response
+
+
+def ui(renderer):
+    # HTML only: no ?format=openapi that would generate the schema again
+    return schema_view.as_cached_view(renderer_classes=UI_RENDERERS[renderer])
+
+
+urlpatterns = [
+    re_path(r"^swagger\.(?P<format>json|yaml)$", schema_file, name="schema-json"),
+    path("swagger/", ui("swagger"), name="schema-swagger-ui"),
+    path("redoc/", ui("redoc"), name="schema-redoc"),
+]
@@ -0,0 +1,79 @@
+"""
+Production gunicorn profile:
+
+    gunicorn -c config/gunicorn.conf.py
+
+GUNICORN_WORKER_CLASS picks the server model:
+- gthread (default): WSGI, GUNICORN_WORKERS processes x GUNICORN_THREADS
+  threads. Processes give CPU parallelism, threads cover DB / HTTP waits.
+- uvicorn: ASGI (config.asgi) via uvicorn-worker; the async Google / OTP
+  views then wait without holding a thread. Pair with DB_POOL=psycopg.
+
+Counts default to the CPUs this container may actually use (cgroup quota,
+not the host's core count). Migrations and collectstatic are not run here —
+see the Dockerfile / docker-compose.yml `migrate` service.
+"""
+
+import math
+import os
+
+
+def available_cpus():
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+cpus = available_cpus()
+kind = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+if kind == "uvicorn":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpus))
+elif kind == "gthread":
+    wsgi_app = "config.wsgi:application"
+    worker_class = "gthread"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpus + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+else:
+    raise RuntimeError(
+        f"GUNICORN_WORKER_CLASS must be gthread or uvicorn, not {kind!r}"
+    )
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# load Django once in the master; workers fork with it already imported
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# recycle workers to cap slow leaks; jitter keeps them from restarting together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# heartbeat files on tmpfs: a container's overlay filesystem can stall them
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-") or None
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # nothing should be open before the fork, but never share a socket
+    from django.db import connections
+
+    connections.close_all()
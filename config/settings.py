@@ -1,9 +1,14 @@
+import copy
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
+from farm.db import reset_tenant_session
+
 # =============================================================================
 # BASE
 # =============================================================================
@@ -30,6 +35,16 @@ ALLOWED_HOSTS = env_list("DJANGO_ALLOWED_HOSTS", "127.0.0.1,localhost")
 # =============================================================================
 # APPS
 # =============================================================================
+# Optional stacks. Off = the app isn't installed and its routes are gone,
+# so a worker never imports it (`manage.py bench_startup` shows the cost).
+# /swagger/ + /redoc/ (drf_yasg)
+ENABLE_API_DOCS = env_bool("ENABLE_API_DOCS", True)
+# /dj-rest-auth/google/ + /auth/google/* (allauth's Google provider)
+ENABLE_GOOGLE_LOGIN = env_bool("ENABLE_GOOGLE_LOGIN", True)
+# bench_* / loadtest_* / seed_farm_data (farm_bench: test client, gunicorn
+# and fake upstreams; not in the Docker image)
+ENABLE_BENCH_TOOLS = env_bool("ENABLE_BENCH_TOOLS", DEBUG)
+
 INSTALLED_APPS = [
     # Django
     "django.contrib.admin",
@@ -39,29 +54,39 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
     # Third-party
     "corsheaders",
     "rest_framework",
     "rest_framework.authtoken",
     "rest_framework_simplejwt.token_blacklist",
-    "drf_yasg",
-    # allauth + dj-rest-auth
+    *(["drf_yasg"] if ENABLE_API_DOCS else []),
+    # allauth + dj-rest-auth (dj_rest_auth.registration needs socialaccount)
     "allauth",
     "allauth.account",
     "allauth.socialaccount",
-    "allauth.socialaccount.providers.google",
+    *(["allauth.socialaccount.providers.google"] if ENABLE_GOOGLE_LOGIN else []),
     "dj_rest_auth",
     "dj_rest_auth.registration",
     # Local
     "farm",
+    *(["farm_bench"] if ENABLE_BENCH_TOOLS else []),
 ]
 
 # =============================================================================
 # MIDDLEWARE
 # =============================================================================
 MIDDLEWARE = [
+    # per-route latency / query / size histograms, outermost to time it all
+    "farm.middleware.MetricsMiddleware",
+    # N+1 / slow query / query budget warnings; development and tests only
+    "farm.middleware.QueryInspectorMiddleware",
+    # opt-in sampling profiler, armed from /admin/profiler/
+    "farm.middleware.ProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # outermost body-writing step: compresses what everything below produced
+    "farm.middleware.CompressionMiddleware",
+    "farm.middleware.WhiteNoiseMiddleware",  # WhiteNoise + async path
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -70,8 +95,89 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "farm.middleware.RowLevelSecurityMiddleware",
 ]
 
+# Request metrics at /metrics (farm/metrics.py), Prometheus text format.
+# Scrapes need `Authorization: Bearer <FARM_METRICS_TOKEN>`; without a
+# token /metrics answers 403, except to localhost in DEBUG (behind a
+# same-host proxy every client looks like localhost).
+FARM_METRICS = env_bool("FARM_METRICS", True)
+FARM_METRICS_TOKEN = os.getenv("FARM_METRICS_TOKEN", "")
+
+# Query inspector (farm/querywatch.py), for development and tests: warns
+# on the "farm.querywatch" logger when a request repeats one query shape
+# FARM_NPLUSONE_THRESHOLD times (N+1), runs a query over FARM_SLOW_QUERY_MS
+# or runs more queries than its route's FARM_QUERY_BUDGETS entry. The
+# budgets are also what the pytest query_budget fixture enforces.
+FARM_QUERY_INSPECTOR = env_bool("FARM_QUERY_INSPECTOR", DEBUG)
+FARM_NPLUSONE_THRESHOLD = int(os.getenv("FARM_NPLUSONE_THRESHOLD", "5"))
+FARM_SLOW_QUERY_MS = int(os.getenv("FARM_SLOW_QUERY_MS", "100"))
+# route name -> max queries per request, JWT user lookup included (RLS mode
+# adds its role / tenant statements on top)
+FARM_QUERY_BUDGETS = {
+    "farm-list": 3,
+    "farm-detail": 2,
+    "farm-deletions": 2,
+    "field-list": 3,
+    "field-detail": 2,
+    "crop-list": 3,
+    "crop-detail": 2,
+    "crop-harvest-calendar": 3,
+    "crop-transition": 5,
+    "animal-list": 3,
+    "animal-detail": 2,
+    "animal-health": 6,
+    "animal-health-summary": 3,
+    "activity-list": 3,
+    "activity-detail": 2,
+    "profile-list": 2,
+    "auth-me": 2,
+}
+
+# Per-farm animal health summary (farm/health.py), cached in "shared" per
+# owner. Writes through the API drop or refresh it; this bounds how stale it
+# gets after admin / cascade deletes.
+FARM_HEALTH_SUMMARY_TTL = int(os.getenv("FARM_HEALTH_SUMMARY_TTL", "600"))
+
+# Farm deletion (farm/purge.py): DELETE /farms/<id>/ hides the farm and a
+# background thread deletes its rows FARM_PURGE_BATCH_SIZE at a time, one
+# short transaction each. With FARM_PURGE_IN_PROCESS off (or after a
+# restart cut one short) `manage.py purge_farms` does it — run it from cron.
+FARM_PURGE_IN_PROCESS = env_bool("FARM_PURGE_IN_PROCESS", True)
+FARM_PURGE_BATCH_SIZE = int(os.getenv("FARM_PURGE_BATCH_SIZE", "5000"))
+
+# /animals/import/ decodes a JSON array whole; bigger .json uploads are
+# refused in favour of JSON Lines, which is read a row at a time. Array
+# bodies are bounded by DATA_UPLOAD_MAX_MEMORY_SIZE (2.5 MB) already.
+FARM_IMPORT_JSON_MAX_BYTES = int(
+    os.getenv("FARM_IMPORT_JSON_MAX_BYTES", str(10 * 1024 * 1024))
+)
+
+# Sampling profiler for live workers (farm/profiler.py), off unless
+# FARM_PROFILER. Staff arm it for N seconds at /admin/profiler/ and download
+# the profiles there; requests sent with `X-Farm-Profile: <token>` and a
+# FARM_PROFILER_SAMPLE_RATE fraction of all requests are profiled too.
+# FARM_PROFILER_DIR must be shared by a host's workers (it is how arming
+# reaches them all).
+FARM_PROFILER = env_bool("FARM_PROFILER", False)
+FARM_PROFILER_TOKEN = os.getenv("FARM_PROFILER_TOKEN", "")
+FARM_PROFILER_SAMPLE_RATE = float(os.getenv("FARM_PROFILER_SAMPLE_RATE", "0"))
+FARM_PROFILER_INTERVAL_MS = float(os.getenv("FARM_PROFILER_INTERVAL_MS", "5"))
+FARM_PROFILER_DIR = Path(
+    os.getenv("FARM_PROFILER_DIR", Path(tempfile.gettempdir()) / "farm-profiles")
+)
+
+# Response compression (farm/compression.py); br / zstd need `brotli` /
+# `zstandard` installed, otherwise only gzip is offered. JSON only, under
+# FARM_COMPRESSION_PATHS minus FARM_COMPRESSION_SKIP_PATHS (BREACH: nothing
+# carrying a CSRF token or returning credentials).
+FARM_COMPRESSION = env_bool("FARM_COMPRESSION", True)
+FARM_COMPRESSION_MIN_SIZE = int(os.getenv("FARM_COMPRESSION_MIN_SIZE", "1024"))
+FARM_COMPRESSION_ENCODINGS = env_list("FARM_COMPRESSION_ENCODINGS", "zstd,br,gzip")
+FARM_COMPRESSION_PATHS = env_list("FARM_COMPRESSION_PATHS", "/api/")
+FARM_COMPRESSION_SKIP_PATHS = env_list("FARM_COMPRESSION_SKIP_PATHS", "/api/v1/auth/")
+
 # =============================================================================
 # URLS / TEMPLATES
 # =============================================================================
@@ -97,6 +203,15 @@ WSGI_APPLICATION = "config.wsgi.application"
 # =============================================================================
 # DATABASE
 # =============================================================================
+# DB_POOL: "none"      one connection per worker thread, reused for
+#                      DB_CONN_MAX_AGE seconds (0 = new one per request)
+#          "psycopg"   Django's psycopg3 pool, shared by a process's threads
+#                      (use this under ASGI, where persistent connections
+#                      don't work)
+#          "pgbouncer" DB_HOST/DB_PORT is PgBouncer in transaction mode
+#                      (session-mode PgBouncer: use "none")
+DB_POOL = os.getenv("DB_POOL", "none").lower()
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -105,12 +220,74 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD", "1"),
         "HOST": os.getenv("DB_HOST", "127.0.0.1"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        # ping a reused connection once per request before trusting it
+        "CONN_HEALTH_CHECKS": env_bool("DB_CONN_HEALTH_CHECKS", True),
         "OPTIONS": {
             "client_encoding": "UTF8",
         },
     }
 }
 
+if DB_POOL == "psycopg":
+    # the pool keeps connections open; Django refuses CONN_MAX_AGE with it
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        # seconds a request waits for a free connection before erroring
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "reset": reset_tenant_session,
+    }
+elif DB_POOL == "pgbouncer":
+    # consecutive transactions may run on different server connections, so
+    # no named (server-side) cursors; Django already keeps psycopg from
+    # preparing statements
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+elif DB_POOL != "none":
+    raise ImproperlyConfigured(
+        f"DB_POOL must be none, psycopg or pgbouncer, not {DB_POOL!r}"
+    )
+
+# Read replicas (farm/routers.py): "host[:port]" of streaming replicas of
+# DB_NAME, same credentials and pooling as the primary. Farm GETs read from
+# them; auth, OTP, admin and all writes stay on the primary. For a local try
+# point one at the primary itself: DB_REPLICAS=127.0.0.1:5432
+DB_REPLICAS = env_list("DB_REPLICAS", "")
+DB_REPLICA_ALIASES = []
+for number, address in enumerate(DB_REPLICAS, start=1):
+    host, _, port = address.partition(":")
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    # fail over to the primary quickly when a replica host is unreachable
+    DATABASES[alias]["OPTIONS"]["connect_timeout"] = 2
+    DB_REPLICA_ALIASES.append(alias)
+
+DATABASE_ROUTERS = ["farm.routers.ReplicaRouter"]
+# after a write, that user's reads stay on the primary this long (> replica lag)
+DB_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+
+# =============================================================================
+# TENANCY (see farm/tenancy.py)
+# =============================================================================
+# Off: viewsets filter on owner_id. On: Postgres row-level security policies
+# scope farm tables per request (`manage.py farm_rls enable` first).
+FARM_RLS_ENABLED = env_bool("FARM_RLS_ENABLED", False)
+FARM_RLS_ROLE = os.getenv("FARM_RLS_ROLE", "farm_tenant")
+
+if FARM_RLS_ENABLED and DB_POOL == "pgbouncer":
+    # role / tenant id live in session state, which transaction pooling
+    # would hand to whichever client runs next on that server connection
+    raise ImproperlyConfigured(
+        "FARM_RLS_ENABLED can't be combined with DB_POOL=pgbouncer "
+        "(transaction pooling); use DB_POOL=psycopg or session-mode PgBouncer."
+    )
+
 # =============================================================================
 # AUTH / PASSWORDS
 # =============================================================================
@@ -142,7 +319,9 @@ USE_TZ = True
 # STATIC / MEDIA
 # =============================================================================
 STATIC_URL = "/static/"
-STATIC_ROOT = BASE_DIR / "staticfiles"
+# the image collects static files at build time, outside the app dir (which
+# docker-compose bind-mounts over in development)
+STATIC_ROOT = Path(os.getenv("DJANGO_STATIC_ROOT", BASE_DIR / "staticfiles"))
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
@@ -167,6 +346,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson-backed, same output as the stock JSON classes (stdlib fallback)
+    "DEFAULT_RENDERER_CLASSES": [
+        "farm.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "farm.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
@@ -175,6 +364,21 @@ REST_FRAMEWORK = {
     ],
 }
 
+# List endpoints serialize straight from values() rows (farm/fastpath.py).
+# Off = plain ModelSerializer everywhere (same JSON, slower).
+FARM_FAST_LIST = env_bool("FARM_FAST_LIST", True)
+
+# =============================================================================
+# API DOCS (ENABLE_API_DOCS)
+# =============================================================================
+# schema.json / schema.yaml written by `manage.py openapi_schema` and served
+# as is (farm/openapi.py), one pair per ENABLE_GOOGLE_LOGIN / ENABLE_API_DOCS
+# combination; `openapi_schema --check` (CI) fails while they're out of date
+OPENAPI_SCHEMA_DIR = Path(os.getenv("OPENAPI_SCHEMA_DIR", BASE_DIR / "openapi"))
+# the Swagger / ReDoc pages load the stored document
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": "json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": "json"})}
+
 # =============================================================================
 # JWT
 # =============================================================================
@@ -219,6 +423,65 @@ GOOGLE_REDIRECT_URI = os.getenv(
 
 ENABLE_ALLAUTH_PAGES = env_bool("ENABLE_ALLAUTH_PAGES", False)
 
+# token endpoint used by /auth/google/exchange/ (point at a stand-in for tests)
+GOOGLE_OAUTH_TOKEN_URL = os.getenv(
+    "GOOGLE_OAUTH_TOKEN_URL", "https://oauth2.googleapis.com/token"
+)
+# seconds a worker keeps SocialApp(provider="google") credentials in memory
+# (its own admin saves clear it at once)
+GOOGLE_OAUTH_APP_CACHE_TTL = int(os.getenv("GOOGLE_OAUTH_APP_CACHE_TTL", "300"))
+
+# id_token checks in /dj-rest-auth/google/ (farm/google_oidc.py)
+GOOGLE_OIDC_DISCOVERY_URL = os.getenv(
+    "GOOGLE_OIDC_DISCOVERY_URL",
+    "https://accounts.google.com/.well-known/openid-configuration",
+)
+# upper bound on how long Google's Cache-Control lets us keep the JWKS
+GOOGLE_OIDC_MAX_CACHE_AGE = int(os.getenv("GOOGLE_OIDC_MAX_CACHE_AGE", "86400"))
+
+# =============================================================================
+# CACHES
+# =============================================================================
+# "default" is per process; "oauth" (Google discovery document / JWKS) is on
+# disk so it survives restarts and is shared by the workers on a host.
+# "shared" holds state every worker must see (replica read-your-writes pins):
+# on disk by default, which covers one host — with several app hosts point it
+# at Redis (SHARED_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# SHARED_CACHE_LOCATION=redis://...).
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "oauth": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv(
+            "OAUTH_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "farm-oauth-cache"),
+        ),
+    },
+    "shared": {
+        "BACKEND": os.getenv(
+            "SHARED_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv(
+            "SHARED_CACHE_LOCATION",
+            os.path.join(tempfile.gettempdir(), "farm-shared-cache"),
+        ),
+    },
+}
+
+# =============================================================================
+# OUTBOUND HTTP (farm/http_client.py)
+# =============================================================================
+OUTBOUND_HTTP_TIMEOUT = float(os.getenv("OUTBOUND_HTTP_TIMEOUT", "20"))
+OUTBOUND_HTTP_MAX_CONNECTIONS = int(os.getenv("OUTBOUND_HTTP_MAX_CONNECTIONS", "100"))
+OUTBOUND_HTTP_MAX_KEEPALIVE = int(os.getenv("OUTBOUND_HTTP_MAX_KEEPALIVE", "20"))
+# retries only for connect errors / 429 / 503 (request not acted on)
+OUTBOUND_HTTP_RETRIES = int(os.getenv("OUTBOUND_HTTP_RETRIES", "2"))
+OUTBOUND_HTTP_RETRY_BACKOFF = float(os.getenv("OUTBOUND_HTTP_RETRY_BACKOFF", "0.2"))
+# consecutive failures that open a breaker, and seconds it stays open
+OUTBOUND_HTTP_BREAKER_THRESHOLD = int(os.getenv("OUTBOUND_HTTP_BREAKER_THRESHOLD", "5"))
+OUTBOUND_HTTP_BREAKER_RESET = float(os.getenv("OUTBOUND_HTTP_BREAKER_RESET", "30"))
+
 # =============================================================================
 # EMAIL (SMTP)
 # =============================================================================
@@ -1,60 +1,57 @@
+import re
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path, re_path
-from django.views.generic import TemplateView
-
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
-
-# ✅ реальные импорты
-from farm.auth_views import GoogleLogin, exchange_google_code
-from farm.email_otp_views import send_email_code, verify_email_code
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Farm API",
-        default_version="v1",
-        description="API for managing farms, fields, crops, animals and activities",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from django.urls import URLResolver, include, path, re_path
+from django.urls.resolvers import RegexPattern
+
+from farm.metrics_views import prometheus_metrics
+from farm.profiler_views import profiler_download, profiler_index
+
+
+def lazy_urls(prefixes, urlconf):
+    """
+    The routes of `urlconf` (a module path; its patterns are full paths, as
+    if listed here), imported on the first request under one of `prefixes`
+    instead of when a worker boots. reverse() still sees them (it imports
+    every URLconf on first use).
+    """
+    alternatives = "|".join(re.escape(prefix) for prefix in prefixes)
+    return URLResolver(RegexPattern(f"^(?={alternatives})"), urlconf)
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     # API
     path("api/v1/", include("farm.urls")),
-    # Auth (dj-rest-auth)
-    path("dj-rest-auth/", include("dj_rest_auth.urls")),
-    path("dj-rest-auth/registration/", include("dj_rest_auth.registration.urls")),
-    # Google OAuth
-    path("dj-rest-auth/google/", GoogleLogin.as_view(), name="google_login"),
-    path(
-        "auth/google/callback/",
-        TemplateView.as_view(template_name="google_callback.html"),
-        name="google_callback",
-    ),
-    path("auth/google/exchange/", exchange_google_code, name="google_exchange"),
-    # Email OTP
-    path("auth/email/send-code/", send_email_code, name="send_email_code"),
-    path("auth/email/verify-code/", verify_email_code, name="verify_email_code"),
-    # Swagger / OpenAPI
-    re_path(
-        r"^swagger(?P<format>\.json|\.yaml)$",
-        schema_view.without_ui(cache_timeout=0),
-        name="schema-json",
-    ),
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    # dj-rest-auth, Google OAuth, email OTP
+    lazy_urls(["dj-rest-auth/", "auth/", "api/v1/auth/email/"], "config.auth_urls"),
     path("api-auth/", include("rest_framework.urls")),
 ]
 
+if settings.FARM_PROFILER:
+    # ahead of admin.site.urls, whose catch-all would take these
+    urlpatterns[:0] = [
+        path(
+            "admin/profiler/",
+            admin.site.admin_view(profiler_index),
+            name="admin-profiler",
+        ),
+        re_path(
+            r"^admin/profiler/(?P<name>[\w.-]+\.txt)/(?P<fmt>collapsed|speedscope)$",
+            admin.site.admin_view(profiler_download),
+            name="admin-profiler-download",
+        ),
+    ]
+
+if settings.FARM_METRICS:
+    urlpatterns += [path("metrics", prometheus_metrics, name="metrics")]
+
+# Swagger / OpenAPI
+if settings.ENABLE_API_DOCS:
+    urlpatterns += [lazy_urls(["swagger", "redoc/"], "config.docs_urls")]
+
 # allauth HTML pages (optional)
 if getattr(settings, "ENABLE_ALLAUTH_PAGES", False):
     urlpatterns += [path("accounts/", include("allauth.urls"))]
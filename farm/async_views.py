@@ -0,0 +1,66 @@
+"""
+DRF's request / response contract for native async function views.
+
+DRF's APIView.dispatch is sync, so an @api_view would put the whole view in a
+thread under ASGI. `async_api_view` keeps the view a coroutine and borrows
+the rest from a per-request APIView, as @api_view does:
+
+- request.data is parsed by DEFAULT_PARSER_CLASSES (JSON, form, multipart);
+- 405, 415, parse errors and other APIExceptions come back as DRF renders
+  them ({"detail": ...}, status, Allow header);
+- Response objects go through the negotiated renderer, OPTIONS gets DRF's
+  metadata.
+
+Nothing authenticates the request: for AllowAny endpoints only.
+"""
+
+import functools
+
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+
+def async_api_view(http_method_names):
+    """@api_view(http_method_names) + @permission_classes([AllowAny]), async."""
+    methods = [method.lower() for method in http_method_names]
+
+    def decorator(func):
+        class WrappedAPIView(APIView):
+            authentication_classes = []
+            permission_classes = [AllowAny]
+            http_method_names = [*methods, "options"]
+
+            @property
+            def allowed_methods(self):
+                return [method.upper() for method in self.http_method_names]
+
+        WrappedAPIView.__name__ = func.__name__
+        WrappedAPIView.__module__ = func.__module__
+        WrappedAPIView.__doc__ = func.__doc__
+
+        @csrf_exempt
+        @functools.wraps(func)
+        async def view(request, *args, **kwargs):
+            self = WrappedAPIView()
+            self.args, self.kwargs = args, kwargs
+            request = self.initialize_request(request, *args, **kwargs)
+            self.request = request
+            self.headers = self.default_response_headers
+            try:
+                self.initial(request, *args, **kwargs)
+                method = request.method.lower()
+                if method == "options":
+                    response = self.options(request, *args, **kwargs)
+                elif method in methods:
+                    response = await func(request, *args, **kwargs)
+                else:
+                    raise MethodNotAllowed(request.method)
+            except Exception as exc:
+                response = self.handle_exception(exc)
+            return self.finalize_response(request, response, *args, **kwargs)
+
+        return view
+
+    return decorator
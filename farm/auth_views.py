@@ -1,23 +1,20 @@
 import json
-import requests
-
-from django.conf import settings
-from django.http import JsonResponse
-from django.utils.decorators import method_decorator
-from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
 
+import httpx
 from allauth.socialaccount.models import SocialApp
-from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import (
     OAuth2Client as AllauthOAuth2Client,
 )
 from dj_rest_auth.registration.views import SocialLoginView
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
-from django.contrib.auth.password_validation import validate_password
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
+from . import google_oauth
+from .google_oidc import GoogleAdapter
+from .http_client import CircuitOpen
 
 
 class PatchedOAuth2Client(AllauthOAuth2Client):
@@ -28,13 +25,18 @@ class PatchedOAuth2Client(AllauthOAuth2Client):
 
 @method_decorator(csrf_exempt, name="dispatch")
 class GoogleLogin(SocialLoginView):
-    adapter_class = GoogleOAuth2Adapter
+    adapter_class = GoogleAdapter
     client_class = PatchedOAuth2Client
 
 
 @csrf_exempt
 @require_POST
-def exchange_google_code(request):
+async def exchange_google_code(request):
+    """
+    Async: the (up to OUTBOUND_HTTP_TIMEOUT) wait on Google's token endpoint
+    doesn't hold a worker thread under ASGI. Credentials come from the
+    in-process cache, the request from the pooled client (farm.google_oauth).
+    """
     try:
         data = json.loads(request.body.decode("utf-8") or "{}")
     except Exception:
@@ -45,7 +47,7 @@ def exchange_google_code(request):
         return JsonResponse({"detail": "code is required"}, status=400)
 
     try:
-        app = SocialApp.objects.get(provider="google")
+        credentials = await google_oauth.get_credentials()
     except SocialApp.DoesNotExist:
         return JsonResponse(
             {"detail": "SocialApp(provider='google') not configured"}, status=500
@@ -57,17 +59,16 @@ def exchange_google_code(request):
         "http://127.0.0.1:8000/auth/google/callback/",
     )
 
-    token_resp = requests.post(
-        "https://oauth2.googleapis.com/token",
-        data={
-            "code": code,
-            "client_id": app.client_id,
-            "client_secret": app.secret,
-            "redirect_uri": redirect_uri,
-            "grant_type": "authorization_code",
-        },
-        timeout=20,
-    )
+    try:
+        token_resp = await google_oauth.exchange_code(credentials, code, redirect_uri)
+    except CircuitOpen as exc:
+        response = JsonResponse(
+            {"detail": "Google token endpoint unavailable, retry later"}, status=503
+        )
+        response["Retry-After"] = str(max(1, round(exc.retry_after)))
+        return response
+    except httpx.HTTPError:
+        return JsonResponse({"detail": "Google token endpoint unreachable"}, status=502)
 
     try:
         token_data = token_resp.json()
@@ -81,19 +82,3 @@ def exchange_google_code(request):
         return JsonResponse({"google_error": token_data}, status=400)
 
     return JsonResponse(token_data, status=200)
-
-
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def set_password(request):
-    password = request.data.get("password") or ""
-    password2 = request.data.get("password2") or ""
-
-    if password != password2:
-        return Response({"detail": "Passwords do not match"}, status=400)
-
-    validate_password(password, request.user)
-    request.user.set_password(password)
-    request.user.save(update_fields=["password"])
-
-    return Response({"detail": "Password set"}, status=200)
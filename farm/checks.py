@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register("openapi")
+def openapi_schema_is_stored(app_configs, **kwargs):
+    """
+    The OpenAPI files for these settings exist. Cheap: whether they match the
+    code is `manage.py openapi_schema --check`'s job (CI), not every command's.
+    """
+    if not settings.ENABLE_API_DOCS:
+        return []
+    from .openapi import FORMATS, path  # drf_yasg: only when checks run
+
+    return [
+        Warning(
+            f"{path(fmt)} is missing; workers will generate it on first use.",
+            hint="Run `manage.py openapi_schema` with these settings.",
+            id="farm.W001",
+        )
+        for fmt in FORMATS
+        if not path(fmt).exists()
+    ]
@@ -0,0 +1,188 @@
+"""
+Negotiated response compression (zstd / br / gzip), see CompressionMiddleware.
+
+gzip is stdlib; br and zstd are offered only when `brotli` / `zstandard` are
+installed. Levels favour CPU over ratio — responses are compressed on every
+request, unlike WhiteNoise's build-time static files.
+
+Only API JSON is compressed: responses under FARM_COMPRESSION_PATHS
+(/api/) with a JSON content type. BREACH needs a secret and attacker-chosen
+input in the same compressed body; the admin and browsable-API HTML carry
+CSRF tokens and are left alone, as are FARM_COMPRESSION_SKIP_PATHS (the
+token / OTP endpoints under /api/v1/auth/). The rest of the API authenticates
+with bearer tokens in headers and has no secret in its bodies, so it goes
+without length padding.
+"""
+
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+class GzipStream:
+    def __init__(self):
+        self._z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class BrotliStream:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class ZstdStream:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._c.flush()
+
+
+ENCODERS = {
+    "zstd": ZstdStream if zstandard is not None else None,
+    "br": BrotliStream if brotli is not None else None,
+    "gzip": GzipStream,
+}
+
+
+def available_encodings():
+    """FARM_COMPRESSION_ENCODINGS (server preference order) that can run here."""
+    names = getattr(settings, "FARM_COMPRESSION_ENCODINGS", ["zstd", "br", "gzip"])
+    return [name for name in names if ENCODERS.get(name) is not None]
+
+
+def parse_accept_encoding(header):
+    """'gzip;q=0.5, br' -> {'gzip': 0.5, 'br': 1.0}"""
+    prefs = {}
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        prefs[name] = q
+    return prefs
+
+
+def negotiate(header, encodings):
+    """Highest client q wins; ties go to the server's order. None = identity."""
+    prefs = parse_accept_encoding(header or "")
+    wildcard = prefs.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = prefs.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(data, encoding):
+    stream = ENCODERS[encoding]()
+    return stream.compress(data) + stream.finish()
+
+
+def compress_chunks(chunks, encoding):
+    # flush after every chunk so the client gets rows as they are produced
+    stream = ENCODERS[encoding]()
+    for chunk in chunks:
+        data = stream.compress(chunk) + stream.flush()
+        if data:
+            yield data
+    yield stream.finish()
+
+
+async def acompress_chunks(chunks, encoding):
+    stream = ENCODERS[encoding]()
+    async for chunk in chunks:
+        data = stream.compress(chunk) + stream.flush()
+        if data:
+            yield data
+    yield stream.finish()
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+
+def compress_response(request, response, encodings, min_size):
+    if response.has_header("Content-Encoding") or not is_compressible(response):
+        return response
+    if not response.streaming and len(response.content) < min_size:
+        return response
+
+    patch_vary_headers(response, ("Accept-Encoding",))
+    encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING"), encodings)
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = acompress_chunks(
+                response.streaming_content, encoding
+            )
+        else:
+            response.streaming_content = compress_chunks(
+                response.streaming_content, encoding
+            )
+        del response.headers["Content-Length"]
+    else:
+        body = compress(response.content, encoding)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response.headers["Content-Length"] = str(len(body))
+
+    # strong ETags describe the identity body (RFC 9110 8.8.1)
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response.headers["ETag"] = "W/" + etag
+    response.headers["Content-Encoding"] = encoding
+    return response
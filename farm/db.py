@@ -0,0 +1,37 @@
+"""
+Database connection hooks referenced from config/settings.py, so nothing
+here may import models (settings load before the app registry).
+"""
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Postgres setting holding the authenticated user id in RLS mode (tenancy.py)
+USER_SETTING = "app.current_user_id"
+
+
+def reset_tenant_session(conn):
+    """
+    psycopg pool `reset` hook, run when a connection goes back to the pool:
+    clear the RLS role / tenant id in case the request didn't get to.
+    """
+    conn.execute("RESET ROLE")
+    conn.execute(f"RESET {USER_SETTING}")
+
+
+def install_execute_wrapper(wrapper):
+    """
+    Put `wrapper` on every connection, open or opened later, in any thread
+    (sync_to_async ones included). Outermost, so that `with
+    connection.execute_wrapper(...)` blocks still pop their own.
+    """
+
+    def install(connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, wrapper)
+
+    connection_created.connect(
+        install, weak=False, dispatch_uid=f"{wrapper.__module__}.{wrapper.__name__}"
+    )
+    for connection in connections.all(initialized_only=True):
+        install(connection)
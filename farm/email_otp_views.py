@@ -1,17 +1,26 @@
+"""
+Email OTP: sending and verifying 6-digit codes.
+
+The two endpoints are native async views with DRF's request / response
+contract (farm.async_views): database access goes through the async ORM and
+SMTP runs in a worker thread, so under ASGI a slow mail server doesn't hold
+the request's thread. create_and_send_otp() stays sync for RegisterView.
+"""
+
 import hashlib
 import secrets
 from datetime import timedelta
 
 from allauth.account.models import EmailAddress
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from .async_views import async_api_view
 from .models import EmailOTP
 
 User = get_user_model()
@@ -26,71 +35,114 @@ def _gen_code() -> str:
     return f"{secrets.randbelow(1_000_000):06d}"
 
 
+def _user_email(user) -> str:
+    return (getattr(user, "email", "") or "").strip().lower()
+
+
+def _new_otp(user, email):
+    """Unsaved OTP + the plain code to mail. Stores only sha256(code)."""
+    code = _gen_code()
+    otp = EmailOTP(
+        user=user,
+        email=email,
+        code_hash=_hash(code),
+        expires_at=timezone.now() + timedelta(minutes=10),
+        attempts_left=5,
+        used=False,
+    )
+    return otp, code
+
+
+def _send_otp_mail(email, code):
+    send_mail(
+        subject="Your verification code",
+        message=f"Your verification code: {code}\nValid for 10 minutes.",
+        from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
+        recipient_list=[email],
+        fail_silently=False,
+    )
+
+
 def create_and_send_otp(user) -> bool:
     """
     Creates a new OTP for user's email and sends it via SMTP.
     Stores only sha256(code).
     """
-    email = (getattr(user, "email", "") or "").strip().lower()
+    email = _user_email(user)
     if not email:
         return False
 
     # Delete old unused codes for same user+email
     EmailOTP.objects.filter(user=user, email=email, used=False).delete()
 
-    code = _gen_code()
-    otp = EmailOTP.objects.create(
-        user=user,
-        email=email,
-        code_hash=_hash(code),
-        expires_at=timezone.now() + timedelta(minutes=10),
-        attempts_left=5,
-        used=False,
-    )
+    otp, code = _new_otp(user, email)
+    otp.save()
 
     try:
-        send_mail(
-            subject="Your verification code",
-            message=f"Your verification code: {code}\nValid for 10 minutes.",
-            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
-            recipient_list=[email],
-            fail_silently=False,
-        )
+        _send_otp_mail(email, code)
         return True
     except Exception:
         otp.delete()
         return False
 
 
-@api_view(["POST"])
-@permission_classes([AllowAny])
-def send_email_code(request):
+async def acreate_and_send_otp(user) -> bool:
+    """Async create_and_send_otp(); SMTP runs in a worker thread."""
+    email = _user_email(user)
+    if not email:
+        return False
+
+    await EmailOTP.objects.filter(user=user, email=email, used=False).adelete()
+
+    otp, code = _new_otp(user, email)
+    await otp.asave()
+
+    try:
+        await sync_to_async(_send_otp_mail, thread_sensitive=False)(email, code)
+        return True
+    except Exception:
+        await otp.adelete()
+        return False
+
+
+async def _user_by_email(email):
+    """(user, error response) — exactly one user may own the address."""
+    users = [
+        user
+        async for user in User.objects.filter(email__iexact=email).order_by("-id")[:2]
+    ]
+    if not users:
+        return None, Response(
+            {"detail": "User with this email not found"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    if len(users) > 1:
+        return None, Response(
+            {"detail": "Multiple users with this email. Fix duplicates in DB."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return users[0], None
+
+
+@async_api_view(["POST"])
+async def send_email_code(request):
     """
     POST {"email":"user@example.com"}
     Sends OTP to existing user by email.
     """
-    email = (request.data.get("email") or "").strip().lower()
+    data = request.data
+    email = (data.get("email") or "").strip().lower()
     if not email:
         return Response(
             {"detail": "email is required"},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    qs = User.objects.filter(email__iexact=email).order_by("-id")
-    if not qs.exists():
-        return Response(
-            {"detail": "User with this email not found"},
-            status=status.HTTP_404_NOT_FOUND,
-        )
-    if qs.count() > 1:
-        return Response(
-            {"detail": "Multiple users with this email. Fix duplicates in DB."},
-            status=status.HTTP_409_CONFLICT,
-        )
-
-    user = qs.first()
+    user, error = await _user_by_email(email)
+    if error:
+        return error
 
-    ok = create_and_send_otp(user)
+    ok = await acreate_and_send_otp(user)
     if not ok:
         return Response(
             {"detail": "Cannot send code. Check SMTP settings."},
@@ -103,15 +155,15 @@ def send_email_code(request):
     )
 
 
-@api_view(["POST"])
-@permission_classes([AllowAny])
-def verify_email_code(request):
+@async_api_view(["POST"])
+async def verify_email_code(request):
     """
     POST {"email":"...", "code":"123456"}
     Marks EmailAddress verified, and activates user (is_active=True).
     """
-    email = (request.data.get("email") or "").strip().lower()
-    code = (request.data.get("code") or "").strip()
+    data = request.data
+    email = (data.get("email") or "").strip().lower()
+    code = (data.get("code") or "").strip()
 
     if not email or not code:
         return Response(
@@ -119,24 +171,14 @@ def verify_email_code(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    qs = User.objects.filter(email__iexact=email).order_by("-id")
-    if not qs.exists():
-        return Response(
-            {"detail": "User with this email not found"},
-            status=status.HTTP_404_NOT_FOUND,
-        )
-    if qs.count() > 1:
-        return Response(
-            {"detail": "Multiple users with this email. Fix duplicates in DB."},
-            status=status.HTTP_409_CONFLICT,
-        )
-
-    user = qs.first()
+    user, error = await _user_by_email(email)
+    if error:
+        return error
 
     otp = (
-        EmailOTP.objects.filter(user=user, email=email, used=False)
+        await EmailOTP.objects.filter(user=user, email=email, used=False)
         .order_by("-created_at")
-        .first()
+        .afirst()
     )
     if not otp:
         return Response(
@@ -146,7 +188,7 @@ def verify_email_code(request):
 
     if otp.is_expired():
         otp.used = True
-        otp.save(update_fields=["used"])
+        await otp.asave(update_fields=["used"])
         return Response(
             {"detail": "Code expired. Send a new code."},
             status=status.HTTP_400_BAD_REQUEST,
@@ -154,7 +196,7 @@ def verify_email_code(request):
 
     if otp.attempts_left <= 0:
         otp.used = True
-        otp.save(update_fields=["used"])
+        await otp.asave(update_fields=["used"])
         return Response(
             {"detail": "Too many attempts. Send a new code."},
             status=status.HTTP_400_BAD_REQUEST,
@@ -162,7 +204,7 @@ def verify_email_code(request):
 
     if _hash(code) != otp.code_hash:
         otp.attempts_left -= 1
-        otp.save(update_fields=["attempts_left"])
+        await otp.asave(update_fields=["attempts_left"])
         return Response(
             {"detail": "Invalid code"},
             status=status.HTTP_400_BAD_REQUEST,
@@ -170,9 +212,9 @@ def verify_email_code(request):
 
     # success
     otp.used = True
-    otp.save(update_fields=["used"])
+    await otp.asave(update_fields=["used"])
 
-    EmailAddress.objects.update_or_create(
+    await EmailAddress.objects.aupdate_or_create(
         user=user,
         email=email,
         defaults={"verified": True, "primary": True},
@@ -181,7 +223,7 @@ def verify_email_code(request):
     # activate account if needed
     if hasattr(user, "is_active") and user.is_active is False:
         user.is_active = True
-        user.save(update_fields=["is_active"])
+        await user.asave(update_fields=["is_active"])
 
     return Response(
         {"detail": "Email verified"},
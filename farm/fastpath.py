@@ -0,0 +1,193 @@
+"""
+Read-only fast path for list endpoints.
+
+`RowSerializer` is built once per ModelSerializer class from its declared
+fields and turns `values_list()` rows into the exact dicts the serializer
+would produce:
+
+- FK ids come straight from the `<fk>_id` column (no PrimaryKeyRelatedField)
+- dotted sources (`created_by.username`) become joins in the same query
+- `get_<field>_display` is a dict lookup on the model field's choices
+- dates / datetimes / decimals still go through the DRF field's
+  `to_representation`, so formatting settings keep applying
+
+Serializers with fields it can't map (method fields, nested serializers,
+properties, ...) get no RowSerializer and the caller falls back.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+# to_representation() is a no-op for the values the DB hands back
+IDENTITY_FIELDS = {
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+}
+# formatted by the DRF field itself
+CONVERTED_FIELDS = {
+    serializers.BooleanField,
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.DecimalField,
+    serializers.FloatField,
+    serializers.TimeField,
+    serializers.UUIDField,
+}
+
+# what DRF does with a dotted source whose relation is NULL
+SKIP = object()
+
+
+class Unsupported(Exception):
+    pass
+
+
+def fast_list_enabled() -> bool:
+    return getattr(settings, "FARM_FAST_LIST", True)
+
+
+@lru_cache(maxsize=256)
+def row_serializer_for(serializer_class, fields=None, expand=frozenset()):
+    """
+    Cached RowSerializer for `serializer_class` (narrowed by a ?fields=
+    selection), or None if unsupported — expanded relations always are.
+    """
+    try:
+        return RowSerializer(
+            serializer_class(context={"fields": fields, "expand": expand})
+        )
+    except Unsupported:
+        return None
+
+
+class RowSerializer:
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.columns = []
+        self.annotations = set()
+        # (key, column index, convert, null-relation column indexes, on_null)
+        self.plan = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.plan.append(self._plan_field(name, field))
+
+    def _column(self, lookup):
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return self.columns.index(lookup)
+
+    def _plan_field(self, name, field):
+        kind = type(field)
+        if kind in IDENTITY_FIELDS:
+            convert = None
+        elif kind in CONVERTED_FIELDS:
+            convert = field.to_representation
+        else:
+            # method fields, nested serializers, files, hyperlinks, ...
+            raise Unsupported(name)
+        if field.source == "*" or getattr(field, "pk_field", None):
+            raise Unsupported(name)
+
+        attrs = field.source_attrs
+
+        if len(attrs) > 1:
+            return self._plan_related(name, field, attrs, convert)
+
+        (attr,) = attrs
+        try:
+            model_field = self.model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            display = self._choices_display(attr)
+            if display is not None:
+                source, labels = display
+
+                def convert(value, labels=labels):
+                    return str(labels.get(value, value))
+
+                return (name, self._column(source), convert, (), None)
+            # not a model field: must be an annotation on the queryset
+            self.annotations.add(attr)
+            return (name, self._column(attr), convert, (), None)
+
+        if model_field.many_to_many or model_field.one_to_many:
+            raise Unsupported(name)
+        if model_field.is_relation and not isinstance(
+            field, serializers.PrimaryKeyRelatedField
+        ):
+            raise Unsupported(name)
+        return (name, self._column(attr), convert, (), None)
+
+    def _plan_related(self, name, field, attrs, convert):
+        """`a.b.c` -> column `a__b__c`, NULL checks on `a` and `a__b`."""
+        model = self.model
+        guards = []
+        for depth, attr in enumerate(attrs[:-1], start=1):
+            try:
+                rel = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                raise Unsupported(name) from None
+            if not (rel.many_to_one or rel.one_to_one) or not rel.concrete:
+                raise Unsupported(name)
+            guards.append(self._column("__".join(attrs[:depth])))
+            model = rel.related_model
+        try:
+            last = model._meta.get_field(attrs[-1])
+        except FieldDoesNotExist:
+            raise Unsupported(name) from None
+        if last.is_relation:
+            raise Unsupported(name)
+
+        # mirrors Field.get_attribute() on AttributeError from a None hop
+        if field.default is not empty:
+            raise Unsupported(name)
+        if field.allow_null:
+            on_null = None
+        elif not field.required:
+            on_null = SKIP
+        else:
+            raise Unsupported(name)
+        return (name, self._column("__".join(attrs)), convert, tuple(guards), on_null)
+
+    def _choices_display(self, attr):
+        if not (attr.startswith("get_") and attr.endswith("_display")):
+            return None
+        try:
+            model_field = self.model._meta.get_field(attr[4:-8])
+        except FieldDoesNotExist:
+            return None
+        if not model_field.choices:
+            return None
+        return model_field.attname, dict(model_field.flatchoices)
+
+    def supports(self, queryset) -> bool:
+        return self.annotations <= set(queryset.query.annotations)
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def to_representation(self, rows):
+        plan = self.plan
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, convert, guards, on_null in plan:
+                if guards and any(row[g] is None for g in guards):
+                    if on_null is not SKIP:
+                        item[name] = on_null
+                    continue
+                value = row[index]
+                if value is None or convert is None:
+                    item[name] = value
+                else:
+                    item[name] = convert(value)
+            data.append(item)
+        return data
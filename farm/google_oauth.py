@@ -0,0 +1,67 @@
+"""
+Google OAuth helpers for /auth/google/exchange/.
+
+- The SocialApp(provider="google") credentials are cached in-process. Saving
+  or deleting a SocialApp clears the cache (farm.signals); other worker
+  processes pick the change up after GOOGLE_OAUTH_APP_CACHE_TTL seconds.
+- Token requests go through the shared pooled client with bounded retries
+  and a circuit breaker, so an outage at Google fails logins fast instead of
+  piling them up for OUTBOUND_HTTP_TIMEOUT each.
+"""
+
+import time
+from dataclasses import dataclass
+
+from allauth.socialaccount.models import SocialApp
+from django.conf import settings
+
+from . import http_client
+
+PROVIDER = "google"
+
+token_breaker = http_client.CircuitBreaker("google-token")
+
+
+@dataclass(frozen=True)
+class GoogleCredentials:
+    client_id: str
+    secret: str
+
+
+_cached = None  # (GoogleCredentials, expires_at)
+
+
+def forget_credentials():
+    global _cached
+    _cached = None
+
+
+async def get_credentials():
+    """Raises SocialApp.DoesNotExist when no Google app is configured."""
+    global _cached
+    cached = _cached
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    app = await SocialApp.objects.only("client_id", "secret").aget(provider=PROVIDER)
+    credentials = GoogleCredentials(client_id=app.client_id, secret=app.secret)
+    _cached = (credentials, time.monotonic() + settings.GOOGLE_OAUTH_APP_CACHE_TTL)
+    return credentials
+
+
+async def exchange_code(credentials, code, redirect_uri):
+    """
+    POST the authorization code to the token endpoint. Raises
+    http_client.CircuitOpen or httpx.HTTPError.
+    """
+    return await http_client.post(
+        settings.GOOGLE_OAUTH_TOKEN_URL,
+        breaker=token_breaker,
+        data={
+            "code": code,
+            "client_id": credentials.client_id,
+            "client_secret": credentials.secret,
+            "redirect_uri": redirect_uri,
+            "grant_type": "authorization_code",
+        },
+    )
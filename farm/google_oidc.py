@@ -0,0 +1,161 @@
+"""
+Local verification of Google id_tokens against a cached JWKS.
+
+allauth's GoogleOAuth2Adapter downloads Google's certificates for every
+signature-checked login. GoogleAdapter verifies against the JWKS named by
+Google's discovery document instead. Both documents are kept in the "oauth"
+cache (on disk by default: survives restarts, shared by a host's workers)
+and memoized in-process:
+
+- an entry is fresh for the response's Cache-Control max-age, capped at
+  GOOGLE_OIDC_MAX_CACHE_AGE
+- a token signed with an unknown `kid` (key rotation) triggers one refetch,
+  at most every JWKS_MIN_REFRESH seconds, so made-up kids can't hammer Google
+- if a refetch fails, the previous copy is used for up to STALE_FOR seconds
+  past its expiry (Google publishes new keys well before signing with them)
+
+Point GOOGLE_OIDC_DISCOVERY_URL at a stand-in server to run this offline.
+"""
+
+import re
+import threading
+import time
+
+import httpx
+import jwt
+from allauth.socialaccount.internal import jwtkit
+from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
+from allauth.socialaccount.providers.oauth2.client import OAuth2Error
+from django.conf import settings
+from django.core.cache import caches
+
+from .http_client import get_client
+
+CACHE_ALIAS = "oauth"
+DEFAULT_CACHE_AGE = 3600
+JWKS_MIN_REFRESH = 60
+STALE_FOR = 24 * 3600
+ALGORITHMS = ["RS256"]
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+_memo = {}  # url -> {"data", "fetched_at", "expires_at"}
+_lock = threading.Lock()
+
+
+def _cache_key(url):
+    return f"google-oidc:{url}"
+
+
+def _fresh_for(response):
+    match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+    age = int(match.group(1)) if match else DEFAULT_CACHE_AGE
+    return min(age, settings.GOOGLE_OIDC_MAX_CACHE_AGE)
+
+
+def _fetch(url):
+    response = get_client().get(url)
+    response.raise_for_status()
+    now = time.time()
+    entry = {
+        "data": response.json(),
+        "fetched_at": now,
+        "expires_at": now + _fresh_for(response),
+    }
+    caches[CACHE_ALIAS].set(
+        _cache_key(url), entry, timeout=entry["expires_at"] - now + STALE_FOR
+    )
+    return entry
+
+
+def _document(url, refresh=False):
+    """
+    Cached JSON document at `url`, refetched once expired — or with
+    `refresh`, unless it was fetched less than JWKS_MIN_REFRESH seconds ago.
+    """
+    with _lock:
+        now = time.time()
+        entry = _memo.get(url)
+        if entry is None or entry["expires_at"] <= now:
+            # another worker (or this one before a restart) may have it
+            entry = caches[CACHE_ALIAS].get(_cache_key(url)) or entry
+        if entry is not None and entry["expires_at"] > now:
+            if not refresh or now - entry["fetched_at"] < JWKS_MIN_REFRESH:
+                _memo[url] = entry
+                return entry
+        try:
+            entry = _fetch(url)
+        except (httpx.HTTPError, ValueError):
+            if entry is None:
+                raise
+            stale_until = entry.get("stale_until", entry["expires_at"] + STALE_FOR)
+            if stale_until <= now:
+                raise
+            if entry["expires_at"] <= now:
+                # keep serving it; try Google again in JWKS_MIN_REFRESH
+                entry = {
+                    **entry,
+                    "expires_at": now + JWKS_MIN_REFRESH,
+                    "stale_until": stale_until,
+                }
+        _memo[url] = entry
+        return entry
+
+
+def _discovery():
+    return _document(settings.GOOGLE_OIDC_DISCOVERY_URL)["data"]
+
+
+def _find_key(jwks, kid):
+    for jwk in jwks["data"].get("keys", ()):
+        if jwk.get("kid") == kid:
+            return jwt.PyJWK(jwk)
+    return None
+
+
+def signing_key(kid):
+    jwks_uri = _discovery()["jwks_uri"]
+    jwks = _document(jwks_uri)
+    key = _find_key(jwks, kid)
+    if key is None:
+        # rotated keys: Google started signing with a kid we haven't seen
+        key = _find_key(_document(jwks_uri, refresh=True), kid)
+    if key is None:
+        raise jwt.InvalidKeyError(f"Unknown signing key {kid!r}")
+    return key
+
+
+def verify_id_token(token, audience):
+    """
+    Claims of a Google-signed id_token issued to `audience`. Raises
+    jwt.PyJWTError for bad tokens, httpx.HTTPError / ValueError when the keys
+    can't be fetched.
+    """
+    key = signing_key(jwt.get_unverified_header(token).get("kid"))
+    issuer = _discovery()["issuer"]
+    return jwt.decode(
+        token,
+        key.key,
+        algorithms=ALGORITHMS,
+        audience=audience,
+        # Google documents both spellings of `iss`
+        issuer=[issuer, issuer.removeprefix("https://")],
+        options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+    )
+
+
+class GoogleAdapter(GoogleOAuth2Adapter):
+    """GoogleOAuth2Adapter checking id_token signatures against the cached JWKS."""
+
+    def _decode_id_token(self, app, id_token):
+        if self.did_fetch_access_token:
+            # straight from Google's token endpoint: allauth skips the signature
+            return super()._decode_id_token(app, id_token)
+        try:
+            data = verify_id_token(id_token, audience=app.client_id)
+        except jwt.PyJWTError as exc:
+            raise OAuth2Error("Invalid id_token") from exc
+        except (httpx.HTTPError, ValueError, KeyError) as exc:
+            raise OAuth2Error("Google signing keys unavailable") from exc
+        jwtkit.verify_jti(data)
+        return data
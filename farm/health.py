@@ -0,0 +1,130 @@
+"""
+Animal health: batch status changes and the per-farm health summary.
+
+`set_health_status` moves a selection of animals to a new health_status and
+logs a vet_check ActivityLog for each, in a fixed number of queries however
+many animals are selected: SELECT ... FOR UPDATE, one UPDATE, one
+bulk_create, one rollup bump (bulk_create skips the farm.signals receivers).
+
+The health summary (animals per farm and health_status) is cached in the
+"shared" cache, one entry per owner holding all their farms, so one key
+covers any change to their animals:
+
+- single-row saves drop it (farm.signals), once the transaction commits;
+- bulk paths (this module, farm.imports) must call `refresh_health_summary`
+  after committing;
+- deletes don't (a post_delete receiver would stop farm deletes from
+  cascading in SQL); the API's destroy drops it, FARM_HEALTH_SUMMARY_TTL
+  bounds the rest (admin, farm deletes).
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from .models import ActivityLog, Animal
+from .stats import bump_activity_stats, stat_key
+
+SUMMARY_CACHE = "shared"
+STATUSES = [status for status, _ in Animal.HEALTH_CHOICES]
+
+
+def _summary_key(owner_id):
+    return f"farm-health:{owner_id}"
+
+
+def compute_health_summary(owner_id):
+    """{farm_id: {status: count, ..., "total": count}}, one GROUP BY query."""
+    rows = (
+        Animal.objects.filter(owner_id=owner_id)
+        .order_by()
+        .values_list("farm_id", "health_status")
+        .annotate(n=Count("id"))
+    )
+    summary = {}
+    for farm_id, status, n in rows:
+        counts = summary.setdefault(farm_id, dict.fromkeys([*STATUSES, "total"], 0))
+        counts[status] = n
+        counts["total"] += n
+    return summary
+
+
+def refresh_health_summary(owner_id):
+    summary = compute_health_summary(owner_id)
+    caches[SUMMARY_CACHE].set(
+        _summary_key(owner_id), summary, timeout=settings.FARM_HEALTH_SUMMARY_TTL
+    )
+    return summary
+
+
+def forget_health_summary(owner_id):
+    caches[SUMMARY_CACHE].delete(_summary_key(owner_id))
+
+
+def cached_health_summary(owner_id):
+    """The cached summary, computed on a miss."""
+    summary = caches[SUMMARY_CACHE].get(_summary_key(owner_id))
+    if summary is None:
+        summary = refresh_health_summary(owner_id)
+    return summary
+
+
+def summary_rows(summary, farm_ids):
+    """API rows for `farm_ids`, farms without animals included."""
+    empty = dict.fromkeys([*STATUSES, "total"], 0)
+    return [{"farm": pk, **summary.get(pk, empty)} for pk in farm_ids]
+
+
+def set_health_status(user, animals, health_status, date, note="", tag_ids=None):
+    """
+    Move `animals` (a queryset of the user's animals) to `health_status` and
+    log a vet_check for each, the ones already in it included; call inside a
+    transaction. `tag_ids`: the ones asked for, to report those not found.
+    """
+    selected = list(
+        # of=self: the live() join must not lock the farm rows as well
+        animals.select_for_update(of=("self",)).values_list(
+            "pk", "farm_id", "health_status", "tag_id"
+        )
+    )
+    changed = (
+        Animal.objects.filter(pk__in=[pk for pk, _, _, _ in selected])
+        .exclude(health_status=health_status)
+        .update(health_status=health_status)
+        if selected
+        else 0
+    )
+
+    logs = [
+        ActivityLog(
+            farm_id=farm_id,
+            owner_id=user.pk,  # bulk_create skips ActivityLog.save()
+            animal_id=pk,
+            date=date,
+            activity_type="vet_check",
+            description=_vet_check_note(before, health_status, note),
+            created_by_id=user.pk,
+        )
+        for pk, farm_id, before, _ in selected
+    ]
+    ActivityLog.objects.bulk_create(logs)
+    bump_activity_stats([stat_key(log) for log in logs], +1)
+
+    found = {tag for _, _, _, tag in selected}
+    missing = [tag for tag in dict.fromkeys(tag_ids or ()) if tag not in found]
+    return {
+        "selected": len(selected),
+        "changed": changed,
+        "logged": len(logs),
+        "missing": missing,
+        "farms": sorted({farm_id for _, farm_id, _, _ in selected}),
+    }
+
+
+def _vet_check_note(before, after, note):
+    line = (
+        f"Health status: {before} -> {after}"
+        if before != after
+        else f"Health status: {after} (unchanged)"
+    )
+    return f"{line}\n{note}" if note else line
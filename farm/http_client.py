@@ -0,0 +1,162 @@
+"""
+Shared pooled httpx clients for outbound calls.
+
+Under ASGI (uvicorn; config/asgi.py calls `use_loop_clients()`) async calls
+go through one keep-alive httpx.AsyncClient per event loop, i.e. one per
+worker process for its whole life. Under WSGI Django runs each async view on
+a short-lived loop of its own, and a client per loop would leak its
+connections with the loop; there async calls run the process-wide sync
+client (`get_client()`, the one sync code shares) in a worker thread.
+
+`post()` adds bounded retries and an optional CircuitBreaker on top. Only
+failures where the request cannot have been acted on are retried (connect
+errors, 429/503), so it is safe for non-idempotent calls like exchanging a
+one-time OAuth code.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+_clients = weakref.WeakKeyDictionary()
+_sync_client = None
+_loop_clients = False  # set by use_loop_clients() under ASGI
+
+# never reached the server / server refused before doing anything
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+RETRYABLE_STATUSES = frozenset({429, 503})
+
+
+def _client_options():
+    return {
+        "timeout": httpx.Timeout(settings.OUTBOUND_HTTP_TIMEOUT, connect=5.0),
+        "limits": httpx.Limits(
+            max_connections=settings.OUTBOUND_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OUTBOUND_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=60,
+        ),
+    }
+
+
+def use_loop_clients():
+    """Give async callers a client per event loop; for ASGI servers only."""
+    global _loop_clients
+    _loop_clients = True
+
+
+def get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_options())
+        _clients[loop] = client
+    return client
+
+
+def get_client() -> httpx.Client:
+    """Process-wide pooled client for sync code (thread-safe)."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(**_client_options())
+    return _sync_client
+
+
+async def _send(method, url, **kwargs) -> httpx.Response:
+    if _loop_clients:
+        return await get_async_client().request(method, url, **kwargs)
+    request = sync_to_async(get_client().request, thread_sensitive=False)
+    return await request(method, url, **kwargs)
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name}: circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker: after `threshold` consecutive failures calls fail
+    fast with CircuitOpen for `reset_after` seconds. Then one trial call is
+    let through per window; its success closes the circuit again.
+    """
+
+    def __init__(self, name, threshold=None, reset_after=None):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def _setting(self, value, name):
+        return value if value is not None else getattr(settings, name)
+
+    def before_call(self):
+        reset_after = self._setting(self.reset_after, "OUTBOUND_HTTP_BREAKER_RESET")
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited < reset_after:
+                raise CircuitOpen(self.name, reset_after - waited)
+            # half-open: this caller probes, everyone else waits a new window
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        threshold = self._setting(self.threshold, "OUTBOUND_HTTP_BREAKER_THRESHOLD")
+        with self._lock:
+            self.failures += 1
+            if self.failures >= threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+def _is_failure(response):
+    return response.status_code >= 500 or response.status_code == 429
+
+
+async def post(url, *, breaker=None, retries=None, **kwargs) -> httpx.Response:
+    """
+    POST through the shared clients. Raises CircuitOpen while `breaker` is
+    open and httpx.HTTPError once retries are exhausted; a retryable status
+    on the last attempt is returned as is.
+    """
+    if retries is None:
+        retries = settings.OUTBOUND_HTTP_RETRIES
+    backoff = settings.OUTBOUND_HTTP_RETRY_BACKOFF
+
+    for attempt in range(retries + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            response = await _send("POST", url, **kwargs)
+        except httpx.HTTPError as exc:
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt == retries or not isinstance(exc, RETRYABLE_ERRORS):
+                raise
+        else:
+            if breaker is not None:
+                if _is_failure(response):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if attempt == retries or response.status_code not in RETRYABLE_STATUSES:
+                return response
+        # full jitter: spread retries from concurrent logins
+        await asyncio.sleep(random.uniform(0, backoff * 2**attempt))
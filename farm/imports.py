@@ -0,0 +1,243 @@
+"""
+Bulk animal import (POST /animals/import/).
+
+An upload is read one row at a time: CSV and JSON Lines files straight from
+the (on-disk, for large uploads) upload. JSON arrays are decoded whole, so
+.json uploads over FARM_IMPORT_JSON_MAX_BYTES are refused with a pointer to
+JSON Lines (array request bodies are capped by DATA_UPLOAD_MAX_MEMORY_SIZE).
+Rows are validated with AnimalImportRowSerializer, their farm checked against
+the user's farms (one query per import), and written BATCH_SIZE at a time:
+
+- one SELECT ... FOR UPDATE finds the batch's tag_ids that already exist;
+- the user's own ones are skipped, or with on_conflict=update rewritten by
+  bulk_create(update_conflicts=True) — locked above, so the upsert can only
+  touch the user's rows;
+- the rest go in with bulk_create(ignore_conflicts=True), and one more
+  SELECT tells which of them did: a tag_id owned by another account (not
+  visible in RLS mode) or inserted concurrently is skipped, not an
+  IntegrityError.
+
+Rows that fail validation or clash on tag_id are reported by their position
+in the upload (1 = first data row) and left out; the others are imported in
+one transaction.
+"""
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from operator import itemgetter
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError, ValidationError
+
+from .models import Animal, Farm
+from .serializers import AnimalImportRowSerializer
+from .tenancy import owned
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+BATCH_SIZE = 5000
+MAX_REPORTED = 1000  # conflicts / errors listed in the result, each
+UPDATE_FIELDS = ["farm", "species", "birth_date", "health_status"]
+
+# conflict reasons
+EXISTS = "exists"  # the user already has this tag_id (on_conflict=skip)
+TAKEN = "taken"  # another account has it
+DUPLICATE = "duplicate"  # repeated earlier in the upload
+
+# file suffix / content type -> format
+SUFFIXES = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/json": "json",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+}
+
+
+def upload_format(upload):
+    """'csv' / 'json' / 'jsonl' for an uploaded file, from its name or type."""
+    name = (upload.name or "").lower()
+    for suffix, fmt in SUFFIXES.items():
+        if name.endswith(suffix):
+            return fmt
+    fmt = CONTENT_TYPES.get((upload.content_type or "").split(";")[0].strip())
+    if fmt is None:
+        raise ParseError("Upload a .csv, .json or .jsonl (JSON Lines) file.")
+    return fmt
+
+
+def read_upload(upload):
+    """Rows (dicts) of an uploaded file, lazily where the format allows."""
+    fmt = upload_format(upload)
+    if fmt == "json":
+        if upload.size > settings.FARM_IMPORT_JSON_MAX_BYTES:
+            raise ParseError(
+                f"JSON arrays are limited to {settings.FARM_IMPORT_JSON_MAX_BYTES} "
+                "bytes; upload larger imports as JSON Lines (.jsonl)."
+            )
+        return read_json(upload.read())
+    stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    return _parse_errors(read_csv(stream) if fmt == "csv" else read_jsonl(stream))
+
+
+def read_csv(stream):
+    """Header row names the columns; empty cells count as missing."""
+    for row in csv.DictReader(stream):
+        # restkey None: cells past the header
+        yield {k: v for k, v in row.items() if k is not None and v not in ("", None)}
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_json(body):
+    try:
+        rows = orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError as exc:
+        raise ParseError(f"JSON parse error - {exc}") from None
+    if not isinstance(rows, list):
+        raise ParseError("Expected a JSON array of animals.")
+    return rows
+
+
+def _parse_errors(rows):
+    try:
+        yield from rows
+    except (csv.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ParseError(f"Could not read the upload: {exc}") from None
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    conflicted: int = 0
+    invalid: int = 0
+    conflicts: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    def conflict(self, number, tag_id, reason):
+        self.conflicted += 1
+        if len(self.conflicts) < MAX_REPORTED:
+            self.conflicts.append({"row": number, "tag_id": tag_id, "reason": reason})
+
+    def error(self, number, detail):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED:
+            self.errors.append({"row": number, "errors": detail})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "conflicted": self.conflicted,
+            "invalid": self.invalid,
+            "conflicts": sorted(self.conflicts, key=itemgetter("row")),
+            "errors": self.errors,
+            "truncated": self.conflicted > len(self.conflicts)
+            or self.invalid > len(self.errors),
+        }
+
+
+def import_animals(user, rows, on_conflict="skip", farm=None, batch_size=BATCH_SIZE):
+    """
+    Import `rows` (dicts) as `user`'s animals; call inside a transaction.
+    `farm`: the farm of rows that name none. Returns an ImportResult.
+    """
+    farms = set(owned(Farm.objects.live(), user).values_list("pk", flat=True))
+    if farm is not None and farm not in farms:
+        raise ValidationError(
+            {"farm": [f'Invalid pk "{farm}" - object does not exist.']}
+        )
+
+    result = ImportResult()
+    animals = _valid_animals(user, rows, farms, farm, result)
+    while batch := list(islice(animals, batch_size)):
+        _write_batch(user, batch, on_conflict, result)
+    return result
+
+
+def _valid_animals(user, rows, farms, default_farm, result):
+    """(row number, unsaved Animal) for the rows that pass validation."""
+    validator = AnimalImportRowSerializer()
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        try:
+            data = validator.run_validation(row)
+        except ValidationError as exc:
+            result.error(number, exc.detail)
+            continue
+        farm = data.get("farm", default_farm)
+        if farm is None:
+            result.error(number, {"farm": ["This field is required."]})
+            continue
+        if farm not in farms:
+            detail = [f'Invalid pk "{farm}" - object does not exist.']
+            result.error(number, {"farm": detail})
+            continue
+        tag_id = data["tag_id"]
+        if tag_id in seen:
+            result.conflict(number, tag_id, DUPLICATE)
+            continue
+        seen.add(tag_id)
+        yield number, Animal(
+            farm_id=farm,
+            owner_id=user.pk,  # bulk_create skips Animal.save()
+            species=data["species"],
+            tag_id=tag_id,
+            birth_date=data.get("birth_date"),
+            health_status=data["health_status"],
+        )
+
+
+def _write_batch(user, batch, on_conflict, result):
+    tags = [animal.tag_id for _, animal in batch]
+    # locked: a row seen as the user's stays theirs until the upsert below
+    existing = dict(
+        Animal.objects.select_for_update()
+        .filter(tag_id__in=tags)
+        .values_list("tag_id", "owner_id")
+    )
+
+    new, mine = [], []
+    for number, animal in batch:
+        owner_id = existing.get(animal.tag_id)
+        if owner_id is None:
+            new.append((number, animal))
+        elif owner_id != user.pk:
+            result.conflict(number, animal.tag_id, TAKEN)
+        elif on_conflict == "update":
+            mine.append(animal)
+        else:
+            result.conflict(number, animal.tag_id, EXISTS)
+
+    if mine:
+        Animal.objects.bulk_create(
+            mine,
+            update_conflicts=True,
+            unique_fields=["tag_id"],
+            update_fields=UPDATE_FIELDS,
+        )
+        result.updated += len(mine)
+
+    if new:
+        Animal.objects.bulk_create([animal for _, animal in new], ignore_conflicts=True)
+        inserted = set(
+            owned(Animal.objects.all(), user)
+            .filter(tag_id__in=[animal.tag_id for _, animal in new])
+            .values_list("tag_id", flat=True)
+        )
+        for number, animal in new:
+            if animal.tag_id in inserted:
+                result.created += 1
+            else:
+                result.conflict(number, animal.tag_id, TAKEN)
@@ -0,0 +1,54 @@
+"""
+Bulk crop lifecycle transitions (POST /crops/transition/).
+
+Crops move planned -> growing -> harvested (Crop.LIFECYCLE). A transition is
+one `UPDATE ... WHERE status = <previous>` over the selected crops — with a
+field selected, that is the (field, status) index. Crops in any other status
+are left alone.
+
+With harvesting logs the crops are first read (and locked) so each gets its
+ActivityLog: SELECT ... FOR UPDATE, the UPDATE by pk, one bulk_create and one
+rollup bump (bulk_create skips the farm.signals receivers).
+"""
+
+from .models import ActivityLog, Crop
+from .stats import bump_activity_stats, stat_key
+
+
+def transition_crops(user, crops, status, log_harvest=False, date=None, note=""):
+    """
+    Move `crops` (a queryset of the user's crops) still in the status before
+    `status` to it; call inside a transaction. Returns the counts.
+    """
+    crops = crops.filter(status=Crop.LIFECYCLE[status])
+    if not log_harvest:
+        return {"changed": crops.update(status=status), "logged": 0}
+
+    selected = list(
+        # of=self: the live() join must not lock the farm rows as well
+        crops.select_for_update(of=("self",)).values_list(
+            "pk", "farm_id", "field_id", "name"
+        )
+    )
+    if not selected:
+        return {"changed": 0, "logged": 0}
+    changed = Crop.objects.filter(pk__in=[pk for pk, _, _, _ in selected]).update(
+        status=status
+    )
+
+    logs = [
+        ActivityLog(
+            farm_id=farm_id,
+            owner_id=user.pk,  # bulk_create skips ActivityLog.save()
+            field_id=field_id,
+            crop_id=pk,
+            date=date,
+            activity_type="harvesting",
+            description=f"Harvested {name}\n{note}" if note else f"Harvested {name}",
+            created_by_id=user.pk,
+        )
+        for pk, farm_id, field_id, name in selected
+    ]
+    ActivityLog.objects.bulk_create(logs)
+    bump_activity_stats([stat_key(log) for log in logs], +1)
+    return {"changed": changed, "logged": len(logs)}
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from farm.tenancy import POLICIES, disable_statements, enable_statements, rls_role
+
+
+class Command(BaseCommand):
+    help = "Enable / disable Postgres row-level security on the farm tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["enable", "disable", "status"])
+
+    def handle(self, *args, **opts):
+        if opts["action"] == "status":
+            return self.status()
+
+        statements = (
+            enable_statements(rls_role())
+            if opts["action"] == "enable"
+            else disable_statements()
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS(f"Row-level security {opts['action']}d."))
+        if opts["action"] == "enable" and not settings.FARM_RLS_ENABLED:
+            self.stdout.write("Set FARM_RLS_ENABLED=True to switch the API to it.")
+
+    def status(self):
+        tables = [model._meta.db_table for model in POLICIES]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, relrowsecurity FROM pg_class "
+                "WHERE relname = ANY(%s) ORDER BY relname",
+                [tables],
+            )
+            for table, enabled in cursor.fetchall():
+                self.stdout.write(f"{table}: {'on' if enabled else 'off'}")
+        self.stdout.write(f"FARM_RLS_ENABLED={settings.FARM_RLS_ENABLED}")
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from farm import openapi
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the OpenAPI schema served at /swagger.json, /swagger.yaml "
+        "(and read by /swagger/, /redoc/) to OPENAPI_SCHEMA_DIR, for the "
+        "current ENABLE_GOOGLE_LOGIN / ENABLE_API_DOCS. --check only compares "
+        "(CI): fails if the stored files are missing or out of date."
+    )
+    # farm.W001 would only say the files it is about to write are missing
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        bodies = openapi.generate()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if opts["check"]:
+            stale = openapi.stale_files(bodies)
+            if stale:
+                raise CommandError(
+                    f"out of date: {', '.join(stale)}; run manage.py openapi_schema"
+                )
+            self.stdout.write(
+                f"OpenAPI schema in {settings.OPENAPI_SCHEMA_DIR} is current"
+            )
+            return
+
+        openapi.write(bodies)
+        for fmt, body in bodies.items():
+            self.stdout.write(f"{openapi.path(fmt)}: {len(body)} bytes")
+        self.stdout.write(f"generated in {elapsed_ms:.0f} ms")
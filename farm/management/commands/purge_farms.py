@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from farm.models import Farm
+from farm.purge import purge_farm
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the farms marked by DELETE /farms/<id>/ (Farm.deleting_since) "
+        "in bounded batches: the ones whose background purge was cut short, "
+        "or all of them with FARM_PURGE_IN_PROCESS off. Safe to run while a "
+        "worker is purging the same farm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("farms", nargs="*", type=int, metavar="FARM_ID")
+        parser.add_argument(
+            "--batch-size", type=int, help="default: FARM_PURGE_BATCH_SIZE"
+        )
+
+    def handle(self, *args, **opts):
+        farms = Farm.objects.filter(deleting_since__isnull=False)
+        if opts["farms"]:
+            farms = farms.filter(pk__in=opts["farms"])
+        pending = list(farms.order_by("deleting_since").values_list("pk", "name"))
+        if opts["farms"] and len(pending) < len(set(opts["farms"])):
+            missing = set(opts["farms"]) - {pk for pk, _ in pending}
+            raise CommandError(f"not marked for deletion: {sorted(missing)}")
+        if not pending:
+            self.stdout.write("no farms to delete")
+            return
+
+        for pk, name in pending:
+            self.stdout.write(f"farm {pk} ({name})")
+            started = time.perf_counter()
+            deleted = purge_farm(
+                pk, batch_size=opts["batch_size"], progress=self.progress(started)
+            )
+            if deleted is None:
+                self.stdout.write("  already gone")
+                continue
+            self.stdout.write(
+                f"  {sum(deleted.values())} rows in "
+                f"{time.perf_counter() - started:.1f}s: {dict(deleted)}"
+            )
+
+    def progress(self, started):
+        last = {"at": started}
+
+        def report(deleted):
+            now = time.perf_counter()
+            if now - last["at"] >= 5:
+                last["at"] = now
+                self.stdout.write(f"  {dict(deleted)} ({now - started:.0f}s)")
+
+        return report
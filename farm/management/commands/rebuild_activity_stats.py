@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from farm.stats import rebuild_activity_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the ActivityDailyStat rollup from ActivityLog."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--farm", type=int, action="append", help="Only this farm (repeatable)"
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_activity_stats(options["farm"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} rollup rows."))
@@ -0,0 +1,219 @@
+"""
+In-process request metrics (FARM_METRICS), in Prometheus text format at
+/metrics.
+
+MetricsMiddleware records, per route (the resolved URL name: farm-list,
+activity-detail, auth-login, ...) and method:
+
+    http_request_duration_seconds     the request through the whole stack
+    http_request_db_queries           queries it ran, on any database alias
+    http_request_db_duration_seconds  time spent in those queries
+    http_response_serialize_seconds   rendering the response data (DRF)
+    http_response_size_bytes          the body as sent (after compression)
+    http_responses_total              per status code
+
+Histograms are HDR-style: SUB_BUCKETS log-linear buckets per power of two,
+so a bucket's bound is within 1/SUB_BUCKETS of every value in it. Recording
+is O(1), memory depends on the range of values rather than their number, and
+only buckets that have seen a value are exported.
+
+Everything is per process: a scrape sees the worker that answered it.
+"""
+
+import math
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+SUB_BUCKETS = 16
+ZERO = -(2**31)  # bucket index of values <= 0
+
+# (attribute on RouteStats, metric name, help)
+HISTOGRAMS = [
+    (
+        "duration",
+        "http_request_duration_seconds",
+        "Request latency through the middleware stack.",
+    ),
+    ("db_queries", "http_request_db_queries", "Database queries per request."),
+    (
+        "db_seconds",
+        "http_request_db_duration_seconds",
+        "Time per request spent in database queries.",
+    ),
+    (
+        "serialize_seconds",
+        "http_response_serialize_seconds",
+        "Time per request spent rendering response data.",
+    ),
+    ("size", "http_response_size_bytes", "Response body size as sent."),
+]
+
+
+def bucket_index(value):
+    if value <= 0:
+        return ZERO
+    # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    mantissa, exponent = math.frexp(value)
+    return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+
+def upper_bound(index):
+    if index == ZERO:
+        return 0.0
+    exponent, sub = divmod(index, SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = {}  # bucket index -> count
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, value):
+        index = bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+
+    def copy(self):
+        other = Histogram()
+        other.buckets = dict(self.buckets)
+        other.count, other.sum = self.count, self.sum
+        return other
+
+    def cumulative(self):
+        """[(upper bound, count of values below it)] for the non-empty buckets."""
+        seen, result = 0, []
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            result.append((upper_bound(index), seen))
+        return result
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile."""
+        rank = q * self.count
+        for bound, seen in self.cumulative():
+            if seen >= rank:
+                return bound
+        return 0.0
+
+
+class RouteStats:
+    __slots__ = [attr for attr, _, _ in HISTOGRAMS]
+
+    def __init__(self):
+        for attr, _, _ in HISTOGRAMS:
+            setattr(self, attr, Histogram())
+
+
+@dataclass(slots=True)
+class RequestStats:
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}  # (route, method) -> RouteStats
+        self.responses = Counter()  # (route, method, status) -> count
+
+    def record(self, route, method, status, duration, stats, size):
+        key = (route, method)
+        with self._lock:
+            series = self.routes.get(key)
+            if series is None:
+                series = self.routes[key] = RouteStats()
+            series.duration.record(duration)
+            series.db_queries.record(stats.db_queries)
+            series.db_seconds.record(stats.db_seconds)
+            series.serialize_seconds.record(stats.serialize_seconds)
+            if size is not None:
+                series.size.record(size)
+            self.responses[(route, method, status)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            routes = {
+                key: {attr: getattr(series, attr).copy() for attr, _, _ in HISTOGRAMS}
+                for key, series in self.routes.items()
+            }
+            return routes, Counter(self.responses)
+
+    def clear(self):
+        with self._lock:
+            self.routes.clear()
+            self.responses.clear()
+
+
+registry = Registry()
+
+_current = ContextVar("farm_request_metrics", default=None)
+
+
+def start_request():
+    """Count queries / render time in this context until end_request(token)."""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_request():
+    return _current.get()
+
+
+def time_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+def render():
+    """The registry in Prometheus text exposition format (0.0.4)."""
+    routes, responses = registry.snapshot()
+    lines = []
+    for attr, name, help_text in HISTOGRAMS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (route, method), histograms in sorted(routes.items()):
+            histogram = histograms[attr]
+            if not histogram.count:
+                continue
+            labels = _labels(route=route, method=method)
+            for bound, seen in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{labels},le="{bound:.6g}"}} {seen}')
+            lines += [
+                f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}',
+                f"{name}_sum{{{labels}}} {histogram.sum:.9g}",
+                f"{name}_count{{{labels}}} {histogram.count}",
+            ]
+    lines += [
+        "# HELP http_responses_total Responses by route, method and status.",
+        "# TYPE http_responses_total counter",
+    ]
+    for (route, method, status), count in sorted(responses.items()):
+        labels = _labels(route=route, method=method, status=status)
+        lines.append(f"http_responses_total{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,30 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from . import metrics
+
+LOOPBACK = {"127.0.0.1", "::1"}
+
+
+@require_GET
+def prometheus_metrics(request):
+    """
+    Prometheus scrape endpoint. With FARM_METRICS_TOKEN set it wants
+    `Authorization: Bearer <token>`. Without one it answers loopback clients
+    in DEBUG only: behind a same-host reverse proxy every request comes from
+    loopback, so in production the token is required.
+    """
+    token = settings.FARM_METRICS_TOKEN
+    if token:
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        allowed = hmac.compare_digest(given.encode(), token.encode())
+    else:
+        allowed = settings.DEBUG and request.META.get("REMOTE_ADDR") in LOOPBACK
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,275 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connection
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import metrics, profiler, querywatch
+from .compression import available_encodings, compress_response
+from .db import install_execute_wrapper
+from .tenancy import (
+    enter_tenant_role,
+    leave_tenant_role,
+    rls_enabled,
+    verify_rls_active,
+)
+
+
+class RowLevelSecurityMiddleware:
+    """
+    RLS mode only (FARM_RLS_ENABLED): API requests run under the restricted
+    tenant role; farm viewsets add the user id once DRF has authenticated.
+    """
+
+    api_prefix = "/api/"
+
+    def __init__(self, get_response):
+        if not rls_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(self.api_prefix):
+            return self.get_response(request)
+
+        verify_rls_active()
+        enter_tenant_role()
+        try:
+            return self.get_response(request)
+        finally:
+            try:
+                leave_tenant_role()
+            except DatabaseError:
+                # broken transaction — drop the connection rather than
+                # hand a tenant-role session to the next request
+                connection.close()
+
+
+class MetricsMiddleware:
+    """
+    Per-route latency, query count / time, render time and response size
+    (farm/metrics.py, served at /metrics). First in MIDDLEWARE so latency
+    covers the whole stack; static / media files and /metrics itself are not
+    recorded.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    # anything else is recorded as "other": methods are client-controlled
+    methods = frozenset(["GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"])
+
+    def __init__(self, get_response):
+        if not getattr(settings, "FARM_METRICS", True):
+            raise MiddlewareNotUsed
+        install_execute_wrapper(metrics.time_query)
+        self.skip_prefixes = tuple(
+            prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL) if prefix
+        )
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path.startswith(self.skip_prefixes):
+            return self.get_response(request)
+        started = time.perf_counter()
+        stats, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if request.path.startswith(self.skip_prefixes):
+            return await self.get_response(request)
+        started = time.perf_counter()
+        stats, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render (data -> bytes) right after this hook
+        stats = metrics.current_request()
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.serialize_seconds += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, stats, duration):
+        match = request.resolver_match
+        route = match.view_name if match is not None else "unmatched"
+        if route == "metrics":
+            return
+        method = request.method if request.method in self.methods else "other"
+        size = None if response.streaming else len(response.content)
+        metrics.registry.record(
+            route, method, response.status_code, duration, stats, size
+        )
+
+
+class QueryInspectorMiddleware:
+    """
+    Development / tests (FARM_QUERY_INSPECTOR): logs repeated query shapes
+    (N+1), slow queries and query-budget overruns per request, with the code
+    that ran them (farm/querywatch.py).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "FARM_QUERY_INSPECTOR", False):
+            raise MiddlewareNotUsed
+        install_execute_wrapper(querywatch.record_query)
+        self.skip_prefixes = tuple(
+            prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL) if prefix
+        )
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path.startswith(self.skip_prefixes):
+            return self.get_response(request)
+        log, token = querywatch.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            querywatch.end_request(token)
+        querywatch.finish(request, log)
+        return response
+
+    async def __acall__(self, request):
+        if request.path.startswith(self.skip_prefixes):
+            return await self.get_response(request)
+        log, token = querywatch.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            querywatch.end_request(token)
+        querywatch.finish(request, log)
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Opt-in sampling profiler (FARM_PROFILER, farm/profiler.py): samples every
+    request while /admin/profiler/ has the workers armed, and requests sent
+    with X-Farm-Profile or picked at FARM_PROFILER_SAMPLE_RATE. Sync only, so
+    that under ASGI the view runs in the thread being sampled.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "FARM_PROFILER", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.next_poll = 0.0
+
+    def __call__(self, request):
+        sampler = profiler.sampler
+        now = time.monotonic()
+        if now >= self.next_poll:
+            # arming from /admin/profiler/ reaches the other workers this way
+            self.next_poll = now + 1
+            until = profiler.armed_until()
+            if until is not None:
+                sampler.arm(until)
+
+        if sampler.armed is None and not sampler.wants(request):
+            return self.get_response(request)
+        into = sampler.start()
+        try:
+            return self.get_response(request)
+        finally:
+            sampler.stop(request)
+            if into is sampler.requests:
+                profiler.write_requests_profile()
+
+
+class CompressionMiddleware:
+    """
+    Negotiated zstd / br / gzip for API JSON responses over
+    FARM_COMPRESSION_MIN_SIZE, under FARM_COMPRESSION_PATHS but not
+    FARM_COMPRESSION_SKIP_PATHS (see farm/compression.py on BREACH).
+    Streaming responses are compressed chunk by chunk.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.encodings = available_encodings()
+        if not getattr(settings, "FARM_COMPRESSION", True) or not self.encodings:
+            raise MiddlewareNotUsed
+        self.min_size = getattr(settings, "FARM_COMPRESSION_MIN_SIZE", 1024)
+        self.prefixes = tuple(getattr(settings, "FARM_COMPRESSION_PATHS", ["/api/"]))
+        self.skip_prefixes = tuple(
+            getattr(settings, "FARM_COMPRESSION_SKIP_PATHS", ["/api/v1/auth/"])
+        )
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        path = request.path
+        if not path.startswith(self.prefixes) or path.startswith(self.skip_prefixes):
+            return response
+        return compress_response(request, response, self.encodings, self.min_size)
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise with an async path. The stock middleware is sync-only, which
+    under ASGI puts every request below it (async views included) behind a
+    thread that stays blocked for the whole await.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            find = sync_to_async(self.find_file, thread_sensitive=False)
+            static_file = await find(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            # opens / stats the file
+            serve = sync_to_async(self.serve, thread_sensitive=False)
+            return await serve(static_file, request)
+        return await self.get_response(request)
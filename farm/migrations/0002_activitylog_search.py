@@ -0,0 +1,55 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:47
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farm", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="activitylog",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    "description", config="english"
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activitylog",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="activitylog_search_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="animal",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("tag_id"), name="gin_trgm_ops"
+                ),
+                name="animal_tag_id_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="farm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"), name="gin_trgm_ops"
+                ),
+                name="farm_name_trgm",
+            ),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farm", "0002_activitylog_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "activity_type",
+                    models.CharField(
+                        choices=[
+                            ("watering", "Watering"),
+                            ("fertilizing", "Fertilizing"),
+                            ("feeding", "Feeding"),
+                            ("harvesting", "Harvesting"),
+                            ("vet_check", "Vet Check"),
+                            ("other", "Other"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "animal",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="farm.animal",
+                    ),
+                ),
+                (
+                    "farm",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_stats",
+                        to="farm.farm",
+                    ),
+                ),
+                (
+                    "field",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="farm.field",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("farm", "date", "activity_type", "field", "animal"),
+                        name="uniq_activity_daily_stat",
+                        nulls_distinct=False,
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            # backfill from existing logs
+            sql="""
+            INSERT INTO farm_activitydailystat
+                (farm_id, date, activity_type, field_id, animal_id, count)
+            SELECT farm_id, date, activity_type, field_id, animal_id, COUNT(*)
+            FROM farm_activitylog
+            GROUP BY farm_id, date, activity_type, field_id, animal_id
+        """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
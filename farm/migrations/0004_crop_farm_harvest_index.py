@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farm", "0003_activity_daily_stat"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crop",
+            name="farm",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="crops",
+                to="farm.farm",
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE farm_crop
+                SET farm_id = farm_field.farm_id
+                FROM farm_field
+                WHERE farm_crop.field_id = farm_field.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="crop",
+            name="farm",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="crops",
+                to="farm.farm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="crop",
+            index=models.Index(
+                fields=["expected_harvest_date", "status"],
+                name="farm_crop_expecte_b081e9_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farm", "0005_denormalize_owner"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="farm",
+            name="deleting_since",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
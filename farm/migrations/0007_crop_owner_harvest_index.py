@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farm", "0006_farm_deleting_since"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="crop",
+            name="farm_crop_expecte_b081e9_idx",
+        ),
+        migrations.AddIndex(
+            model_name="crop",
+            index=models.Index(
+                fields=["owner", "expected_harvest_date", "status"],
+                name="farm_crop_owner_i_a1c4b3_idx",
+            ),
+        ),
+    ]
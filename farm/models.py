@@ -1,10 +1,44 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 User = get_user_model()
 
+# Postgres text search configuration used for ActivityLog.description.
+# Changing it requires a migration (the tsvector column is generated).
+SEARCH_CONFIG = "english"
+
+
+def owner_field(**kwargs):
+    # copy of farm.owner, maintained in save() — tenant-scoped queries filter
+    # on the table itself instead of joining up to Farm
+    return models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", editable=False, **kwargs
+    )
+
+
+def with_derived_fields(kwargs, source, *derived):
+    """save(update_fields=[source, ...]) must also write the derived columns."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and source in update_fields:
+        kwargs["update_fields"] = {*update_fields, *derived}
+
+
+class FarmQuerySet(models.QuerySet):
+    def live(self):
+        """Without the farms being deleted in the background (farm/purge.py)."""
+        return self.filter(deleting_since__isnull=True)
+
+
+class FarmDataQuerySet(models.QuerySet):
+    def live(self):
+        """Without the rows of farms being deleted (FarmQuerySet.live())."""
+        return self.filter(farm__deleting_since__isnull=True)
+
 
 class Farm(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="farms")
@@ -19,15 +53,37 @@ class Farm(models.Model):
         help_text="Farm size in hectares",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # set by DELETE /farms/<id>/: hidden from the API until farm.purge is done
+    deleting_since = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = FarmQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["owner", "-created_at"])]
+        indexes = [
+            models.Index(fields=["owner", "-created_at"]),
+            # fuzzy lookups by name (?q=) — needs pg_trgm
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"), name="farm_name_trgm"
+            ),
+        ]
 
     def __str__(self):
         # username может быть пустой в некоторых кастомных User — но обычно есть
         return f"{self.name} ({getattr(self.owner, 'username', self.owner_id)})"
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        owner_changed = (
+            self.pk is not None
+            and Farm.objects.filter(pk=self.pk).exclude(owner_id=self.owner_id).exists()
+        )
+        super().save(*args, **kwargs)
+        if owner_changed:
+            # farm changed hands — move the denormalized owner along
+            for model in (Field, Crop, Animal, ActivityLog):
+                model.objects.filter(farm=self).update(owner_id=self.owner_id)
+
 
 class Field(models.Model):
     SOIL_CHOICES = [
@@ -38,6 +94,7 @@ class Field(models.Model):
     ]
 
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name="fields")
+    owner = owner_field()
     name = models.CharField(max_length=100)
     area = models.DecimalField(
         max_digits=6,
@@ -47,6 +104,8 @@ class Field(models.Model):
     )
     soil_type = models.CharField(max_length=20, choices=SOIL_CHOICES, default="loam")
 
+    objects = FarmDataQuerySet.as_manager()
+
     class Meta:
         ordering = ["id"]
         # чтобы в одной ферме не было двух одинаковых полей с одним именем
@@ -60,6 +119,19 @@ class Field(models.Model):
     def __str__(self):
         return f"{self.name} - {self.farm.name}"
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        self.owner_id = self.farm.owner_id
+        with_derived_fields(kwargs, "farm", "owner")
+        farm_changed = (
+            self.pk is not None
+            and Field.objects.filter(pk=self.pk).exclude(farm_id=self.farm_id).exists()
+        )
+        super().save(*args, **kwargs)
+        if farm_changed:
+            # keep the denormalized Crop.farm / Crop.owner in sync
+            self.crops.update(farm_id=self.farm_id, owner_id=self.owner_id)
+
 
 class Crop(models.Model):
     STATUS_CHOICES = [
@@ -67,20 +139,41 @@ class Crop(models.Model):
         ("growing", "Growing"),
         ("harvested", "Harvested"),
     ]
+    # not harvested yet — what the harvest calendar looks at
+    OPEN_STATUSES = ("planned", "growing")
+    # lifecycle for /crops/transition/: status -> the one it is reached from
+    LIFECYCLE = {"growing": "planned", "harvested": "growing"}
 
     field = models.ForeignKey(Field, on_delete=models.CASCADE, related_name="crops")
+    # copy of field.farm, set on save — lets date queries skip the Field join
+    farm = models.ForeignKey(
+        Farm, on_delete=models.CASCADE, related_name="crops", editable=False
+    )
+    owner = owner_field()
     name = models.CharField(max_length=100)
     plant_date = models.DateField(null=True, blank=True)
     expected_harvest_date = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="planned")
 
+    objects = FarmDataQuerySet.as_manager()
+
     class Meta:
         ordering = ["-id"]
-        indexes = [models.Index(fields=["field", "status"])]
+        indexes = [
+            models.Index(fields=["field", "status"]),
+            # harvest calendar: one owner's crops by date
+            models.Index(fields=["owner", "expected_harvest_date", "status"]),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        self.farm_id = self.field.farm_id
+        self.owner_id = self.field.owner_id
+        with_derived_fields(kwargs, "field", "farm", "owner")
+        super().save(*args, **kwargs)
+
 
 class Animal(models.Model):
     HEALTH_CHOICES = [
@@ -90,6 +183,7 @@ class Animal(models.Model):
     ]
 
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name="animals")
+    owner = owner_field()
     species = models.CharField(max_length=50)  # e.g. Cow, Sheep, Chicken
     tag_id = models.CharField(
         max_length=50,
@@ -101,13 +195,26 @@ class Animal(models.Model):
         max_length=20, choices=HEALTH_CHOICES, default="good"
     )
 
+    objects = FarmDataQuerySet.as_manager()
+
     class Meta:
         ordering = ["species", "tag_id"]
-        indexes = [models.Index(fields=["farm", "health_status"])]
+        indexes = [
+            models.Index(fields=["farm", "health_status"]),
+            GinIndex(
+                OpClass(Upper("tag_id"), name="gin_trgm_ops"),
+                name="animal_tag_id_trgm",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.species} #{self.tag_id}"
 
+    def save(self, *args, **kwargs):
+        self.owner_id = self.farm.owner_id
+        with_derived_fields(kwargs, "farm", "owner")
+        super().save(*args, **kwargs)
+
 
 class ActivityLog(models.Model):
     ACTIVITY_CHOICES = [
@@ -120,6 +227,7 @@ class ActivityLog(models.Model):
     ]
 
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name="activities")
+    owner = owner_field(db_index=False)  # covered by (owner, -date, -created_at)
     date = models.DateField()
     activity_type = models.CharField(max_length=20, choices=ACTIVITY_CHOICES)
     description = models.TextField(blank=True)
@@ -156,16 +264,85 @@ class ActivityLog(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Maintained by Postgres, never written from Python
+    search_vector = models.GeneratedField(
+        expression=SearchVector("description", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = FarmDataQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date", "-created_at"]
         indexes = [
             models.Index(fields=["farm", "-date"]),
+            models.Index(fields=["owner", "-date", "-created_at"]),
             models.Index(fields=["activity_type"]),
+            GinIndex(fields=["search_vector"], name="activitylog_search_gin"),
         ]
 
     def __str__(self):
         return f"{self.activity_type} on {self.date} ({self.farm.name})"
 
+    def save(self, *args, **kwargs):
+        self.owner_id = self.farm.owner_id
+        with_derived_fields(kwargs, "farm", "owner")
+        super().save(*args, **kwargs)
+
+
+class ActivityDailyStat(models.Model):
+    """
+    Daily rollup of ActivityLog counts per farm / field / animal.
+    Maintained incrementally by farm.stats (signals + bulk paths);
+    `manage.py rebuild_activity_stats` recomputes it from scratch.
+    """
+
+    farm = models.ForeignKey(
+        Farm, on_delete=models.CASCADE, related_name="activity_stats"
+    )
+    # plain ids: a deleted field/animal must not drop the farm totals
+    field = models.ForeignKey(
+        Field,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    animal = models.ForeignKey(
+        Animal,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    date = models.DateField()
+    activity_type = models.CharField(
+        max_length=20, choices=ActivityLog.ACTIVITY_CHOICES
+    )
+    count = models.IntegerField(default=0)
+
+    objects = FarmDataQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["farm", "date", "activity_type", "field", "animal"],
+                name="uniq_activity_daily_stat",
+                nulls_distinct=False,
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.activity_type} x{self.count} on {self.date} (farm {self.farm_id})"
+        )
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
@@ -0,0 +1,121 @@
+"""
+The OpenAPI document behind /swagger.json, /swagger.yaml and the Swagger /
+ReDoc pages, generated once instead of on every request.
+
+`manage.py openapi_schema` writes it to OPENAPI_SCHEMA_DIR: the Dockerfile
+runs it at build time, and CI keeps the copy in git current with
+`openapi_schema --check`. Workers serve the stored files from memory with an
+ETag, generating them on the first request if they are missing.
+
+The settings in URLCONF_FLAGS add or drop routes, so each combination has its
+own files: schema.json with all of them on, schema.no-google-login.json with
+ENABLE_GOOGLE_LOGIN off (both kept in git), and so on.
+"""
+
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+INFO = openapi.Info(
+    title="Farm API",
+    default_version="v1",
+    description="API for managing farms, fields, crops, animals and activities",
+)
+
+# format -> (file name, content type)
+FORMATS = {
+    "json": ("schema.json", "application/json"),
+    "yaml": ("schema.yaml", "application/yaml"),
+}
+
+# settings that change the URLconf, and so the schema
+URLCONF_FLAGS = ["ENABLE_GOOGLE_LOGIN", "ENABLE_API_DOCS"]
+
+logger = logging.getLogger(__name__)
+
+_documents = {}  # format -> (body, etag); per process
+_lock = threading.Lock()
+
+
+def variant():
+    """'' with every URLCONF_FLAGS setting on, else e.g. '.no-google-login'."""
+    return "".join(
+        ".no-" + flag.removeprefix("ENABLE_").lower().replace("_", "-")
+        for flag in URLCONF_FLAGS
+        if not getattr(settings, flag)
+    )
+
+
+def path(fmt):
+    """The stored file of `fmt` for the current settings."""
+    stem, suffix = FORMATS[fmt][0].rsplit(".", 1)
+    return settings.OPENAPI_SCHEMA_DIR / f"{stem}{variant()}.{suffix}"
+
+
+def generate():
+    """{format: bytes} of the schema for the code as it is now."""
+    # the viewsets read query params while drf_yasg inspects them
+    request = APIView().initialize_request(APIRequestFactory().get("/swagger.json"))
+    # url="": no host / scheme, clients resolve paths against where they
+    # fetched the document from
+    schema = OpenAPISchemaGenerator(INFO, url="").get_schema(request, public=True)
+    return {
+        "json": OpenAPICodecJson([], pretty=True).encode(schema),
+        "yaml": OpenAPICodecYaml([]).encode(schema),
+    }
+
+
+def write(bodies):
+    settings.OPENAPI_SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+    for fmt, body in bodies.items():
+        path(fmt).write_bytes(body)
+
+
+def stale_files(bodies=None):
+    """Stored files that are missing or differ from `bodies` (default: generate())."""
+    bodies = generate() if bodies is None else bodies
+    stale = []
+    for fmt, body in bodies.items():
+        try:
+            if path(fmt).read_bytes() == body:
+                continue
+        except FileNotFoundError:
+            pass
+        stale.append(str(path(fmt)))
+    return stale
+
+
+def _load():
+    try:
+        bodies = {fmt: path(fmt).read_bytes() for fmt in FORMATS}
+    except FileNotFoundError:
+        logger.warning(
+            "no OpenAPI schema in %s, generating it (run `manage.py "
+            "openapi_schema` at build time)",
+            settings.OPENAPI_SCHEMA_DIR,
+        )
+        bodies = generate()
+        try:
+            write(bodies)
+        except OSError:
+            pass  # read-only image: keep it in memory
+    return {
+        fmt: (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        for fmt, body in bodies.items()
+    }
+
+
+def get_document(fmt):
+    """(body, etag) of the schema in `fmt`, loaded once per process."""
+    if not _documents:
+        with _lock:
+            if not _documents:
+                _documents.update(_load())
+    return _documents[fmt]
@@ -0,0 +1,32 @@
+"""
+orjson-backed JSONParser.
+
+UTF-8 bodies are decoded by orjson in one call. Other charsets, bodies orjson
+rejects (so the error message matches DRF's) and installs without orjson go
+through the stock parser.
+"""
+
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            # orjson never accepts NaN/Infinity, same as STRICT_JSON
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,276 @@
+"""
+Opt-in sampling profiler for live workers (FARM_PROFILER).
+
+While a request is being profiled, a sampler thread reads the stack of the
+thread serving it every FARM_PROFILER_INTERVAL_MS (wall clock: time spent
+waiting on Postgres shows up under the psycopg frames). Profiled requests are:
+
+- every request a worker serves while armed: /admin/profiler/ arms all
+  workers for N seconds, through a file in FARM_PROFILER_DIR that each
+  worker looks at at most once a second. Each writes its own profile when
+  the time is up and the requests it caught midway have finished;
+- requests sent with `X-Farm-Profile: <FARM_PROFILER_TOKEN>`, and a
+  FARM_PROFILER_SAMPLE_RATE fraction of all requests. These add up in one
+  profile per worker, rewritten after each of them.
+
+Profiles are collapsed stacks, one `root;frame;...;frame count` line per
+stack, rooted at the request ("GET farm-list"). /admin/profiler/ serves them
+as is (flamegraph.pl, speedscope both read it) or as a speedscope document.
+
+With nothing armed there is no sampler thread and ProfilerMiddleware costs a
+clock read and a header lookup per request; with FARM_PROFILER off it is not
+installed at all.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .querywatch import short_path
+
+MAX_DEPTH = 256
+SWITCH_INTERVAL = 0.0002  # seconds, while sampling
+DRAIN_TIMEOUT = 30  # seconds an ended armed session waits for its requests
+ARM_FILE = "armed"
+PROFILE_NAME = re.compile(r"^[\w.-]+\.txt$")
+FRAME = re.compile(r"^(?P<name>.*) \((?P<file>.*):(?P<line>\d+)\)$")
+
+_labels = {}  # code object -> frame label
+
+
+def frame_label(code):
+    label = _labels.get(code)
+    if label is None:
+        name = getattr(code, "co_qualname", code.co_name)
+        label = f"{name} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def collapse(frame):
+    """The stack under `frame` as a tuple of labels, outermost first."""
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def request_label(request):
+    match = getattr(request, "resolver_match", None)
+    return f"{request.method} {match.view_name if match else 'unresolved'}"
+
+
+class Sampler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stopped = threading.Condition(self._lock)
+        self._thread = None
+        # thread ident -> (the profile it goes to, Counter of its stacks)
+        self.threads = {}
+        self.armed = None  # Counter of the armed session, or None
+        self.armed_started = None
+        self.requests = Counter()  # header / sampled requests, this worker
+
+    def start(self, into=None):
+        """
+        Sample the calling thread until stop() (it is serving a request), for
+        the Counter `into`: by default the armed session's, or else
+        self.requests. Returns that Counter.
+        """
+        with self._lock:
+            if into is None:
+                into = self.requests if self.armed is None else self.armed
+            self.threads[threading.get_ident()] = (into, Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="farm-profiler", daemon=True
+                )
+                self._thread.start()
+        return into
+
+    def stop(self, request):
+        """Stop sampling this thread; add its stacks to its profile under the request."""
+        root = (request_label(request),)
+        with self._lock:
+            into, stacks = self.threads.pop(threading.get_ident())
+            # a copy: the sampler may still be adding to it
+            for stack, count in dict(stacks).items():
+                into[root + stack] += count
+            self._stopped.notify_all()
+
+    def _run(self):
+        interval = settings.FARM_PROFILER_INTERVAL_MS / 1000
+        # a thread waiting for the GIL gets it when the holder blocks (I/O)
+        # or after the switch interval (5 ms): left as is, samples would land
+        # on the next query rather than in the code running now
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, SWITCH_INTERVAL))
+        while True:
+            with self._lock:
+                if not self.threads:
+                    self._thread = None
+                    sys.setswitchinterval(switch_interval)
+                    return
+                targets = list(self.threads.items())
+            frames = sys._current_frames()
+            for ident, (_, stacks) in targets:
+                frame = frames.get(ident)
+                if frame is not None:
+                    stacks[collapse(frame)] += 1
+            del frames
+            time.sleep(interval)
+
+    def arm(self, until):
+        """Profile every request until `until` (time.time()), then write it out."""
+        with self._lock:
+            if self.armed is not None:
+                return
+            self.armed, self.armed_started = Counter(), time.time()
+        timer = threading.Timer(max(until - time.time(), 0), self._disarm)
+        timer.daemon = True
+        timer.start()
+
+    def _disarm(self):
+        with self._lock:
+            stacks, self.armed = self.armed, None
+            started = self.armed_started
+            # requests the session caught mid-way add their stacks in stop()
+            self._stopped.wait_for(
+                lambda: all(into is not stacks for into, _ in self.threads.values()),
+                timeout=DRAIN_TIMEOUT,
+            )
+            stacks = dict(stacks)
+        if not stacks:
+            return
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(started))
+        write_profile(f"armed-{stamp}-{os.getpid()}.txt", stacks)
+
+    def wants(self, request):
+        """Is this request profiled outside an armed session?"""
+        token = settings.FARM_PROFILER_TOKEN
+        if token and request.headers.get("X-Farm-Profile") == token:
+            return True
+        rate = settings.FARM_PROFILER_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+
+sampler = Sampler()
+
+
+def directory():
+    return settings.FARM_PROFILER_DIR
+
+
+def write_profile(name, stacks):
+    directory().mkdir(parents=True, exist_ok=True)
+    lines = [f"{';'.join(stack)} {count}" for stack, count in stacks.items()]
+    path = directory() / name
+    tmp = path.with_name(f"{name}.{threading.get_ident()}.tmp")
+    tmp.write_text("\n".join(sorted(lines)) + "\n")
+    os.replace(tmp, path)
+
+
+def write_requests_profile():
+    with sampler._lock:
+        stacks = dict(sampler.requests)
+    write_profile(f"requests-{os.getpid()}.txt", stacks)
+
+
+def arm_workers(seconds):
+    """Arm every worker sharing FARM_PROFILER_DIR for `seconds` from now."""
+    directory().mkdir(parents=True, exist_ok=True)
+    until = time.time() + seconds
+    (directory() / ARM_FILE).write_text(f"{until}\n")
+    sampler.arm(until)
+    return until
+
+
+def armed_until():
+    """When the current arming ends (time.time()), or None."""
+    try:
+        until = float((directory() / ARM_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+    return until if until > time.time() else None
+
+
+def list_profiles():
+    """[(name, size, mtime)], newest first."""
+    try:
+        paths = [p for p in directory().iterdir() if PROFILE_NAME.match(p.name)]
+    except FileNotFoundError:
+        return []
+    found = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        found.append((path.name, stat.st_size, stat.st_mtime))
+    return sorted(found, key=lambda item: -item[2])
+
+
+def read_profile(name):
+    """The collapsed stacks in profile `name`; FileNotFoundError if unknown."""
+    if not PROFILE_NAME.match(name):
+        raise FileNotFoundError(name)
+    return (directory() / name).read_text()
+
+
+def delete_profiles():
+    for name, _, _ in list_profiles():
+        (directory() / name).unlink(missing_ok=True)
+
+
+def to_speedscope(name, collapsed):
+    """Collapsed stacks as a speedscope document (one "sampled" profile)."""
+    frames, index = [], {}
+    samples, weights = [], []
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if not stack:
+            continue
+        sample = []
+        for label in stack.split(";"):
+            if label not in index:
+                index[label] = len(frames)
+                match = FRAME.match(label)
+                frames.append(
+                    {
+                        "name": match["name"],
+                        "file": match["file"],
+                        "line": int(match["line"]),
+                    }
+                    if match
+                    else {"name": label}
+                )
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(int(count))
+    document = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "farm-api",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "none",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+    return json.dumps(document, separators=(",", ":"))
@@ -0,0 +1,70 @@
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.views.decorators.http import require_http_methods, require_safe
+
+from . import profiler
+
+MAX_ARM_SECONDS = 300
+
+
+@require_http_methods(["GET", "POST"])
+def profiler_index(request):
+    """Arm the workers, list / download / delete the profiles (staff only)."""
+    if request.method == "POST":
+        if request.POST.get("action") == "delete":
+            profiler.delete_profiles()
+            messages.success(request, "Profiles deleted.")
+        else:
+            try:
+                seconds = int(request.POST.get("seconds", ""))
+            except ValueError:
+                seconds = 0
+            if not 1 <= seconds <= MAX_ARM_SECONDS:
+                messages.error(request, f"Seconds must be 1 to {MAX_ARM_SECONDS}.")
+            else:
+                profiler.arm_workers(seconds)
+                messages.success(
+                    request,
+                    f"Profiling every worker for {seconds} s; each writes its "
+                    "profile when the time is up.",
+                )
+        return redirect("admin-profiler")
+
+    until = profiler.armed_until()
+    context = {
+        **admin.site.each_context(request),
+        "title": "Sampling profiler",
+        "profiles": [
+            {"name": name, "size": size, "modified": datetime.fromtimestamp(mtime)}
+            for name, size, mtime in profiler.list_profiles()
+        ],
+        "armed_for": round(until - time.time()) if until else None,
+        "max_seconds": MAX_ARM_SECONDS,
+        "interval_ms": settings.FARM_PROFILER_INTERVAL_MS,
+    }
+    return TemplateResponse(request, "admin/farm_profiler.html", context)
+
+
+@require_safe
+def profiler_download(request, name, fmt):
+    try:
+        collapsed = profiler.read_profile(name)
+    except FileNotFoundError:
+        raise Http404("no such profile") from None
+    stem = name.removesuffix(".txt")
+    if fmt == "speedscope":
+        response = HttpResponse(
+            profiler.to_speedscope(stem, collapsed), content_type="application/json"
+        )
+        filename = f"{stem}.speedscope.json"
+    else:
+        response = HttpResponse(collapsed, content_type="text/plain; charset=utf-8")
+        filename = f"{stem}.collapsed.txt"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,156 @@
+"""
+Background farm deletion.
+
+Deleting a big farm with Farm.delete() lets Django's collector load every
+related pk, run `IN (...)` lists of all of them, SET NULL the activity links
+row by row (ActivityLog.field / crop / animal) and fire the ActivityLog
+post_delete receiver per log — in one transaction holding every lock.
+
+DELETE /farms/<id>/ instead sets Farm.deleting_since (the API stops showing
+the farm at once, FarmQuerySet.live()) and answers 202; `purge_farm` then
+removes the rows in FARM_PURGE_BATCH_SIZE batches, each one statement in its
+own transaction:
+
+1. the ActivityDailyStat rollup rows, then the activity logs — first, so the
+   SET NULLs below have (nearly) nothing left to touch;
+2. crops, animals, fields, each batch clearing the activity links still
+   pointing at it (logs of other farms) in the same statement;
+3. the Farm row itself, with nothing left to cascade.
+
+It runs on a per-process daemon thread after the request commits
+(FARM_PURGE_IN_PROCESS). A purge cut short (worker restart, error) leaves
+the farm hidden with part of its rows; `manage.py purge_farms` finishes it,
+and every step is safe to repeat. Progress is kept in the "shared" cache for
+/farms/deletions/.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .health import forget_health_summary
+from .models import ActivityDailyStat, ActivityLog, Animal, Crop, Farm, Field
+
+PROGRESS_CACHE = "shared"
+PROGRESS_TTL = 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.SimpleQueue()
+_thread = None
+_lock = threading.Lock()
+
+
+def _progress_key(farm_id):
+    return f"farm-purge:{farm_id}"
+
+
+def _delete_batch_sql(model, links=()):
+    """
+    DELETE of one batch of a farm's `model` rows, params [farm_id, batch
+    size]; `links`: the ActivityLog columns pointing at them, set to NULL.
+    """
+    table = model._meta.db_table
+    logs = ActivityLog._meta.db_table
+    sql = f'WITH batch AS (SELECT "id" FROM "{table}" WHERE "farm_id" = %s LIMIT %s)'
+    for i, column in enumerate(links):
+        sql += (
+            f', unlinked_{i} AS (UPDATE "{logs}" SET "{column}" = NULL '
+            f'WHERE "{column}" IN (SELECT "id" FROM batch))'
+        )
+    return sql + f' DELETE FROM "{table}" WHERE "id" IN (SELECT "id" FROM batch)'
+
+
+# (progress label, statement), in order
+STEPS = [
+    ("activity_stats", _delete_batch_sql(ActivityDailyStat)),
+    ("activity_logs", _delete_batch_sql(ActivityLog)),
+    ("crops", _delete_batch_sql(Crop, ["crop_id"])),
+    ("animals", _delete_batch_sql(Animal, ["animal_id"])),
+    ("fields", _delete_batch_sql(Field, ["field_id"])),
+]
+
+
+def mark_for_deletion(farm):
+    """Hide `farm` from the API and purge it once the transaction commits."""
+    farm.deleting_since = timezone.now()
+    Farm.objects.filter(pk=farm.pk).update(deleting_since=farm.deleting_since)
+    report_progress(farm.pk, Counter(), done=False)
+    transaction.on_commit(lambda: schedule_purge(farm.pk))
+
+
+def schedule_purge(farm_id):
+    """Purge `farm_id` on this process' purge thread (FARM_PURGE_IN_PROCESS)."""
+    global _thread
+    if not settings.FARM_PURGE_IN_PROCESS:
+        return
+    _queue.put(farm_id)
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name="farm-purge", daemon=True)
+            _thread.start()
+
+
+def _run():
+    while True:
+        farm_id = _queue.get()
+        try:
+            purge_farm(farm_id)
+        except Exception:
+            logger.exception(
+                "purging farm %s failed; `manage.py purge_farms` resumes it", farm_id
+            )
+        finally:
+            connection.close()  # this thread's own
+
+
+def purge_farm(farm_id, batch_size=None, progress=None):
+    """
+    Delete farm `farm_id` and everything under it in bounded batches.
+    `progress(deleted)` after each batch; returns the Counter of rows
+    deleted per STEPS label, or None if the farm is gone already.
+    """
+    batch_size = batch_size or settings.FARM_PURGE_BATCH_SIZE
+    farm = Farm.objects.filter(pk=farm_id).only("owner_id").first()
+    if farm is None:
+        return None
+
+    deleted = Counter()
+    for label, sql in STEPS:
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [farm_id, batch_size])
+                rows = cursor.rowcount
+            deleted[label] += rows
+            report_progress(farm_id, deleted, done=False)
+            if progress is not None:
+                progress(deleted)
+            if rows < batch_size:
+                break
+
+    # only the (now empty) related tables are left for the collector
+    Farm.objects.filter(pk=farm_id).delete()
+    deleted["farms"] += 1
+    report_progress(farm_id, deleted, done=True)
+    forget_health_summary(farm.owner_id)
+    return deleted
+
+
+def report_progress(farm_id, deleted, done):
+    caches[PROGRESS_CACHE].set(
+        _progress_key(farm_id),
+        {"deleted": dict(deleted), "done": done, "updated": time.time()},
+        timeout=PROGRESS_TTL,
+    )
+
+
+def get_progress(farm_id):
+    """{"deleted": {label: rows}, "done": bool, "updated": time.time()} or None."""
+    return caches[PROGRESS_CACHE].get(_progress_key(farm_id))
@@ -0,0 +1,77 @@
+"""
+pytest plugin, loaded from pyproject.toml (`-p farm.pytest_plugin`): query
+budgets for endpoint tests.
+
+    def test_farm_list(client, query_budget):
+        client.get("/api/v1/farms/")
+
+fails the test if a request made during it runs more queries than its
+route's FARM_QUERY_BUDGETS entry, or repeats one query shape
+FARM_NPLUSONE_THRESHOLD times (N+1). The report names the code that ran
+them. Budgets for one test:
+
+    @pytest.mark.query_budget(**{"farm-list": 2})
+
+The fixture turns FARM_QUERY_INSPECTOR on for the test, so it has to be set
+up before the test client's first request (which is when Django builds the
+middleware chain).
+"""
+
+import pytest
+from django.test import override_settings
+
+from farm import querywatch
+
+_requests = pytest.StashKey()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(**budgets): max queries per route name in this test, "
+        "over FARM_QUERY_BUDGETS (query_budget fixture)",
+    )
+
+
+@pytest.fixture
+def query_budget(request):
+    """[(method, path, route, QueryLog)] of the requests the test has made."""
+    seen = []
+
+    def collect(http_request, route, log):
+        seen.append((http_request.method, http_request.get_full_path(), route, log))
+
+    querywatch.listeners.append(collect)
+    request.node.stash[_requests] = seen
+    try:
+        with override_settings(FARM_QUERY_INSPECTOR=True):
+            yield seen
+    finally:
+        querywatch.listeners.remove(collect)
+
+
+def over_budget(item, seen):
+    marker = item.get_closest_marker("query_budget")
+    budgets = marker.kwargs if marker else {}
+    failures = []
+    for method, path, route, log in seen:
+        budget = budgets.get(route, querywatch.budget_for(route))
+        found = querywatch.problems(log, route, budget)
+        if found:
+            failures.append(
+                f"{method} {path} ({route}): {len(log)} queries\n" + "\n".join(found)
+            )
+    return failures
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    # checked here rather than at fixture teardown so that it is reported as
+    # the test failing, not as an error
+    result = yield
+    seen = item.stash.get(_requests, None)
+    if seen:
+        failures = over_budget(item, seen)
+        if failures:
+            pytest.fail("\n\n".join(failures), pytrace=False)
+    return result
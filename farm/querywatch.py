@@ -0,0 +1,205 @@
+"""
+Query inspector for development and tests (FARM_QUERY_INSPECTOR, on with
+DEBUG).
+
+QueryInspectorMiddleware collects the SQL each request runs, on any database
+alias and in sync_to_async threads too, and when the request ends it logs
+these to "farm.querywatch":
+
+- N+1 shapes: one fingerprint (the statement with its literals, placeholders
+  and IN / VALUES lists folded) run FARM_NPLUSONE_THRESHOLD times or more,
+  with the lines of code that issued it;
+- slow queries: FARM_SLOW_QUERY_MS or more;
+- requests over the budget of their route in FARM_QUERY_BUDGETS.
+
+farm/pytest_plugin.py turns the same findings into test failures (the
+query_budget fixture).
+"""
+
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:''|[^'])*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s|\$\d+")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")  # (?, ?, ...)
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")  # VALUES (...), (...)
+_SPACE = re.compile(r"\s+")
+
+# frames in these only pass a query (or the request) through: the ORM, this
+# module, the middleware chain
+_PASS_THROUGH = (
+    os.path.join("django", "db", ""),
+    os.path.join("django", "utils", "asyncio.py"),
+    os.path.join("farm", "middleware.py"),
+    __file__,
+)
+
+
+def fingerprint(sql):
+    """`sql` with every value folded: queries that differ only in values match."""
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _ROWS.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def short_path(filename):
+    # the most specific root: site-packages may sit inside BASE_DIR (.venv)
+    roots = sorted({str(settings.BASE_DIR), *filter(None, sys.path)}, key=len)
+    for root in reversed(roots):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1 :]
+    return filename
+
+
+def call_site(frame, skip=()):
+    """
+    "farm/admin.py:70 in fields_count": the innermost project frame above
+    the ORM (and the `skip` code objects), plus the library frame that ran
+    the query if that's not the same one ("... via
+    rest_framework/fields.py:104 in get_attribute").
+    """
+    project = str(settings.BASE_DIR) + os.sep
+    caller = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if frame.f_code not in skip and not any(
+            part in filename for part in _PASS_THROUGH
+        ):
+            where = f"{short_path(filename)}:{frame.f_lineno} in {frame.f_code.co_name}"
+            if filename.startswith(project) and "site-packages" not in filename:
+                return where if caller is None else f"{where} via {caller}"
+            caller = caller or where
+        frame = frame.f_back
+    return caller or "?"
+
+
+@dataclass(slots=True)
+class Query:
+    sql: str
+    alias: str
+    seconds: float
+    site: str
+
+
+@dataclass
+class QueryLog:
+    """The queries of one request, in order."""
+
+    queries: list = field(default_factory=list)
+
+    def add(self, sql, alias, seconds, site):
+        self.queries.append(Query(sql, alias, seconds, site))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold):
+        """[(fingerprint, [Query, ...])] run `threshold` times or more, most first."""
+        groups = defaultdict(list)
+        for query in self.queries:
+            groups[(query.alias, fingerprint(query.sql))].append(query)
+        found = [
+            (shape, queries)
+            for (_, shape), queries in groups.items()
+            if len(queries) >= threshold
+        ]
+        return sorted(found, key=lambda item: -len(item[1]))
+
+    def slow(self, seconds):
+        return [query for query in self.queries if query.seconds >= seconds]
+
+
+_current = ContextVar("farm_query_log", default=None)
+
+# called with (request, route, log) after each inspected request; the
+# pytest plugin collects through this
+listeners = []
+
+
+def start_request():
+    log = QueryLog()
+    return log, _current.set(log)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    log = _current.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        connection = context["connection"]
+        # other wrappers (metrics.time_query) may sit above this one
+        wrappers = {
+            getattr(wrapper, "__code__", None)
+            for wrapper in connection.execute_wrappers
+        }
+        log.add(
+            sql,
+            connection.alias,
+            time.perf_counter() - started,
+            call_site(sys._getframe(1), wrappers),
+        )
+
+
+def route_of(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "unmatched"
+
+
+def budget_for(route):
+    return getattr(settings, "FARM_QUERY_BUDGETS", {}).get(route)
+
+
+def problems(log, route, budget=None):
+    """Human-readable findings for one request's queries, [] if it is clean."""
+    threshold = getattr(settings, "FARM_NPLUSONE_THRESHOLD", 5)
+    slow_ms = getattr(settings, "FARM_SLOW_QUERY_MS", 100)
+    found = []
+    if budget is not None and len(log) > budget:
+        found.append(f"{len(log)} queries, budget for {route} is {budget}")
+    for shape, queries in log.repeated(threshold):
+        sites = Counter(query.site for query in queries)
+        lines = [f"N+1: {len(queries)} x {shape[:300]}"]
+        lines += [f"    {count} x {site}" for site, count in sites.most_common(3)]
+        found.append("\n".join(lines))
+    for query in log.slow(slow_ms / 1000):
+        found.append(
+            f"slow: {query.seconds * 1000:.0f} ms {query.sql[:300]}\n    {query.site}"
+        )
+    return found
+
+
+def finish(request, log):
+    route = route_of(request)
+    found = problems(log, route, budget_for(route))
+    if found:
+        logger.warning(
+            "%s %s (%s): %d queries\n%s",
+            request.method,
+            request.path,
+            route,
+            len(log),
+            "\n".join(found),
+        )
+    for listener in list(listeners):
+        listener(request, route, log)
@@ -0,0 +1,59 @@
+"""
+orjson-backed JSONRenderer.
+
+Drop-in for DRF's JSONRenderer: the same JSON for the same data (compact,
+UTF-8, \\u2028/\\u2029 escaped). Anything orjson doesn't encode natively —
+datetimes (DRF's "Z" suffix), Decimal, lazy strings, querysets — goes through
+DRF's own encoder. Indented output, non-default UNICODE/COMPACT/STRICT_JSON
+settings and values orjson refuses (e.g. ints over 64 bits) use the stock
+renderer, as does everything when orjson is not installed.
+
+The bytes differ in two ways:
+
+- floats in exponent form are spelled the way orjson spells them: 1e16 and
+  0.00001 where json.dumps writes 1e+16 and 1e-05 (e.g. a tiny search_rank).
+  They parse back to the same float;
+- NaN/Infinity floats are written as null instead of raising under
+  STRICT_JSON.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_NON_STR_KEYS
+    )
+
+_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
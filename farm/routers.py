@@ -0,0 +1,111 @@
+"""
+Read-replica routing (DB_REPLICAS in settings).
+
+Everything uses "default" (the primary) unless a request opts in: the farm
+viewsets do for GET/HEAD/OPTIONS (ReplicaReadsMixin), which makes the
+request's reads go to one randomly picked replica. Auth, OTP, admin, writes
+and migrations never touch a replica.
+
+Read-your-writes: a write pins the user to the primary for
+DB_REPLICA_PIN_SECONDS (longer than the expected replica lag). Pins live in
+the "shared" cache so every worker sees them.
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from . import tenancy
+
+PIN_CACHE = "shared"
+# seconds an unreachable replica is skipped before it is tried again
+RETRY_DOWN_AFTER = 10
+
+logger = logging.getLogger(__name__)
+
+_read_alias = ContextVar("farm_read_alias", default=None)
+_down_until = {}  # alias -> monotonic time; per process
+
+
+def replica_aliases():
+    return getattr(settings, "DB_REPLICA_ALIASES", [])
+
+
+def _pin_key(user):
+    return f"db-primary-pin:{user.pk}"
+
+
+def pin_to_primary(user):
+    if replica_aliases() and user.is_authenticated:
+        caches[PIN_CACHE].set(
+            _pin_key(user), True, timeout=settings.DB_REPLICA_PIN_SECONDS
+        )
+
+
+def is_pinned(user):
+    return bool(caches[PIN_CACHE].get(_pin_key(user)))
+
+
+@contextmanager
+def replica_scope():
+    """Wrap a request; reads go to the primary unless use_replica() is called."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        alias = _read_alias.get()
+        _read_alias.reset(token)
+        if alias is not None and tenancy.rls_enabled():
+            try:
+                tenancy.leave_tenant_role(using=alias)
+            except DatabaseError:
+                connections[alias].close()
+
+
+def use_replica(user):
+    """
+    Send the rest of the request's reads to a replica, unless there are none
+    or `user` wrote recently. Returns the alias used for reads.
+    """
+    now = time.monotonic()
+    aliases = [a for a in replica_aliases() if _down_until.get(a, 0) <= now]
+    if not aliases or is_pinned(user):
+        return DEFAULT_DB_ALIAS
+    alias = random.choice(aliases)
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        logger.warning("replica %s unavailable, reading from the primary", alias)
+        _down_until[alias] = now + RETRY_DOWN_AFTER
+        return DEFAULT_DB_ALIAS
+    if tenancy.rls_enabled():
+        # same session state RowLevelSecurityMiddleware + the viewset put on
+        # the primary connection
+        tenancy.enter_tenant_role(using=alias)
+        tenancy.set_current_user(user, using=alias)
+    _read_alias.set(alias)
+    return alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the primary's rows
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
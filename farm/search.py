@@ -0,0 +1,62 @@
+"""
+Search helpers for the farm API.
+
+- ActivityLog: Postgres full-text search over the generated `search_vector`
+  column (GIN index), ranked, with highlighted snippets.
+- Farm.name / Animal.tag_id: trigram similarity (pg_trgm GIN indexes).
+"""
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+
+from .models import SEARCH_CONFIG
+
+SEARCH_PARAM = "q"
+
+
+def get_search_term(request) -> str:
+    return (request.query_params.get(SEARCH_PARAM) or "").strip()
+
+
+def search_activity_logs(queryset, term: str):
+    """
+    Filter by `search_vector @@ websearch_to_tsquery(term)`, order by rank.
+    Headline is computed by Postgres only for rows that end up in the page.
+    """
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type="websearch")
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(
+            search_rank=SearchRank(F("search_vector"), query),
+            search_snippet=SearchHeadline(
+                "description",
+                query,
+                config=SEARCH_CONFIG,
+                start_sel="<mark>",
+                stop_sel="</mark>",
+                max_fragments=2,
+            ),
+        )
+        .order_by("-search_rank", "-date", "-created_at")
+    )
+
+
+def trigram_search(queryset, field_name: str, term: str):
+    """
+    Substring or fuzzy match on `field_name`, best matches first.
+    Goes through UPPER(field) so both `LIKE` and `%` (pg_trgm.similarity_threshold)
+    hit the gin_trgm_ops expression index; similarity() runs for matched rows only.
+    """
+    key = term.upper()
+    return (
+        queryset.alias(search_key=Upper(field_name))
+        .filter(Q(search_key__contains=key) | Q(search_key__trigram_similar=key))
+        .annotate(similarity=TrigramSimilarity(field_name, term))
+        .order_by("-similarity", field_name)
+    )
@@ -1,17 +1,33 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from .models import ActivityLog, Animal, Crop, Farm, Field, UserProfile
+from .sparse import SparseFieldsMixin
+from .tenancy import owned
 
 User = get_user_model()
 
 
+def limit_related(serializer, user, **models):
+    """
+    Writable relations only accept the user's own rows, and none of a farm
+    being deleted (the purge would trip over rows added under it).
+    """
+    for name, model in models.items():
+        field = serializer.fields.get(name)
+        if isinstance(field, serializers.RelatedField):
+            field.queryset = owned(model.objects.live(), user)
+
+
 # ==========================
 # Farm
 # ==========================
-class FarmSerializer(serializers.ModelSerializer):
+class FarmSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source="owner.username")
 
     class Meta:
@@ -23,25 +39,26 @@ class FarmSerializer(serializers.ModelSerializer):
 # ==========================
 # Field
 # ==========================
-class FieldSerializer(serializers.ModelSerializer):
+class FieldSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     farm = serializers.PrimaryKeyRelatedField(queryset=Farm.objects.all())
 
     class Meta:
         model = Field
         fields = ["id", "farm", "name", "area", "soil_type"]
         read_only_fields = ["id"]
+        expandable_fields = {"farm": FarmSerializer}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            self.fields["farm"].queryset = Farm.objects.filter(owner=request.user)
+            limit_related(self, request.user, farm=Farm)
 
 
 # ==========================
 # Crop
 # ==========================
-class CropSerializer(serializers.ModelSerializer):
+class CropSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     field = serializers.PrimaryKeyRelatedField(queryset=Field.objects.all())
     status_display = serializers.CharField(source="get_status_display", read_only=True)
 
@@ -57,20 +74,70 @@ class CropSerializer(serializers.ModelSerializer):
             "status_display",
         ]
         read_only_fields = ["id", "status_display"]
+        # farm: the denormalized Crop.farm
+        expandable_fields = {"field": FieldSerializer, "farm": FarmSerializer}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            self.fields["field"].queryset = Field.objects.filter(
-                farm__owner=request.user
-            )
+            limit_related(self, request.user, field=Field)
+
+
+class HarvestCalendarQuerySerializer(serializers.Serializer):
+    """Query params of /crops/harvest-calendar/."""
+
+    days = serializers.IntegerField(min_value=1, max_value=366, default=14)
+    farm = serializers.IntegerField(required=False)
+    include_overdue = serializers.BooleanField(default=True)
+    overdue_limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+
+
+class CropTransitionSerializer(serializers.Serializer):
+    """
+    Body of /crops/transition/: move the crops of a field or farm to the
+    next status, optionally only those with plant_date / expected_harvest_date
+    (date_field, by default the one matching the new status) in a window.
+    """
+
+    status = serializers.ChoiceField(choices=Crop.STATUS_CHOICES)
+    field = serializers.IntegerField(required=False)
+    farm = serializers.IntegerField(required=False)
+    date_field = serializers.ChoiceField(
+        choices=["plant_date", "expected_harvest_date"], required=False
+    )
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    # harvesting activity log per crop (status=harvested only)
+    log_harvest = serializers.BooleanField(default=False)
+    date = serializers.DateField(required=False)
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate_status(self, value):
+        if value not in Crop.LIFECYCLE:
+            raise ValidationError(f"Crops can't move back to {value}.")
+        return value
+
+    def validate(self, attrs):
+        if "field" not in attrs and "farm" not in attrs:
+            raise ValidationError("Select the crops with field and/or farm.")
+        if attrs.get("date_from") and attrs.get("date_to"):
+            if attrs["date_from"] > attrs["date_to"]:
+                raise ValidationError("date_from must be before date_to.")
+        if attrs["log_harvest"] and attrs["status"] != "harvested":
+            raise ValidationError("log_harvest only goes with status=harvested.")
+        attrs.setdefault(
+            "date_field",
+            "plant_date" if attrs["status"] == "growing" else "expected_harvest_date",
+        )
+        attrs.setdefault("date", timezone.localdate())
+        return attrs
 
 
 # ==========================
 # Animal
 # ==========================
-class AnimalSerializer(serializers.ModelSerializer):
+class AnimalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     farm = serializers.PrimaryKeyRelatedField(queryset=Farm.objects.all())
     health_status_display = serializers.CharField(
         source="get_health_status_display", read_only=True
@@ -88,18 +155,80 @@ class AnimalSerializer(serializers.ModelSerializer):
             "health_status_display",
         ]
         read_only_fields = ["id", "health_status_display"]
+        expandable_fields = {"farm": FarmSerializer}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            self.fields["farm"].queryset = Farm.objects.filter(owner=request.user)
+            limit_related(self, request.user, farm=Farm)
+
+
+class AnimalImportQuerySerializer(serializers.Serializer):
+    """Query params of /animals/import/."""
+
+    on_conflict = serializers.ChoiceField(choices=["skip", "update"], default="skip")
+    # rows without a farm column / key go here
+    farm = serializers.IntegerField(required=False)
+
+
+class AnimalImportRowSerializer(serializers.Serializer):
+    """
+    One row of an /animals/import/ upload. `farm` is a plain id: farm.imports
+    checks it against the user's farms, loaded once per import.
+    """
+
+    farm = serializers.IntegerField(required=False)
+    species = serializers.CharField(max_length=50)
+    tag_id = serializers.CharField(max_length=50)
+    birth_date = serializers.DateField(required=False, allow_null=True)
+    health_status = serializers.ChoiceField(
+        choices=Animal.HEALTH_CHOICES, default="good"
+    )
+
+
+class AnimalHealthBatchSerializer(serializers.Serializer):
+    """
+    Body of /animals/health/: the new health_status and which animals get
+    it — the listed tag_ids and/or the ones matching farm / species /
+    current_status (all given criteria apply, at least one is needed).
+    """
+
+    health_status = serializers.ChoiceField(choices=Animal.HEALTH_CHOICES)
+    tag_ids = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        required=False,
+        allow_empty=False,
+        max_length=10000,
+    )
+    farm = serializers.IntegerField(required=False)
+    species = serializers.CharField(max_length=50, required=False)
+    current_status = serializers.ChoiceField(
+        choices=Animal.HEALTH_CHOICES, required=False
+    )
+    # of the vet_check logs
+    date = serializers.DateField(required=False)
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate(self, attrs):
+        if not attrs.keys() & {"tag_ids", "farm", "species", "current_status"}:
+            raise ValidationError(
+                "Select animals with tag_ids, farm, species or current_status."
+            )
+        attrs.setdefault("date", timezone.localdate())
+        return attrs
+
+
+class HealthSummaryQuerySerializer(serializers.Serializer):
+    """Query params of /animals/health-summary/."""
+
+    farm = serializers.IntegerField(required=False)
 
 
 # ==========================
 # ActivityLog
 # ==========================
-class ActivityLogSerializer(serializers.ModelSerializer):
+class ActivityLogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     farm = serializers.PrimaryKeyRelatedField(queryset=Farm.objects.all())
     field = serializers.PrimaryKeyRelatedField(
         queryset=Field.objects.all(), required=False, allow_null=True
@@ -127,16 +256,20 @@ class ActivityLogSerializer(serializers.ModelSerializer):
             "created_at",
         ]
         read_only_fields = ["id", "created_by", "created_at"]
+        expandable_fields = {
+            "farm": FarmSerializer,
+            "field": FieldSerializer,
+            "crop": CropSerializer,
+            "animal": AnimalSerializer,
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            user = request.user
-            self.fields["farm"].queryset = Farm.objects.filter(owner=user)
-            self.fields["field"].queryset = Field.objects.filter(farm__owner=user)
-            self.fields["crop"].queryset = Crop.objects.filter(field__farm__owner=user)
-            self.fields["animal"].queryset = Animal.objects.filter(farm__owner=user)
+            limit_related(
+                self, request.user, farm=Farm, field=Field, crop=Crop, animal=Animal
+            )
 
     def validate(self, attrs):
         """
@@ -149,7 +282,7 @@ class ActivityLogSerializer(serializers.ModelSerializer):
 
         if field and field.farm_id != farm.id:
             raise ValidationError("Field does not belong to the selected farm.")
-        if crop and crop.field.farm_id != farm.id:
+        if crop and crop.farm_id != farm.id:
             raise ValidationError("Crop does not belong to the selected farm.")
         if animal and animal.farm_id != farm.id:
             raise ValidationError("Animal does not belong to the selected farm.")
@@ -157,6 +290,45 @@ class ActivityLogSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ActivityLogSearchSerializer(ActivityLogSerializer):
+    """ActivityLog row + rank and highlighted snippet for `?q=` searches."""
+
+    search_rank = serializers.FloatField(read_only=True)
+    search_snippet = serializers.CharField(read_only=True)
+
+    class Meta(ActivityLogSerializer.Meta):
+        fields = ActivityLogSerializer.Meta.fields + ["search_rank", "search_snippet"]
+        read_only_fields = ActivityLogSerializer.Meta.read_only_fields + [
+            "search_rank",
+            "search_snippet",
+        ]
+
+
+class ActivityStatsQuerySerializer(serializers.Serializer):
+    """Query params of /activities/stats/."""
+
+    bucket = serializers.ChoiceField(choices=["day", "week", "month"], default="day")
+    by = serializers.ChoiceField(choices=["field", "animal"], required=False)
+    farm = serializers.IntegerField(required=False)
+    field = serializers.IntegerField(required=False)
+    animal = serializers.IntegerField(required=False)
+    activity_type = serializers.ChoiceField(
+        choices=ActivityLog.ACTIVITY_CHOICES, required=False
+    )
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        # default window: last 365 days
+        date_to = attrs.get("date_to") or timezone.localdate()
+        date_from = attrs.get("date_from") or date_to - timedelta(days=365)
+        if date_from > date_to:
+            raise ValidationError("date_from must be before date_to.")
+        attrs["date_from"] = date_from
+        attrs["date_to"] = date_to
+        return attrs
+
+
 # ==========================
 # UserProfile
 # ==========================
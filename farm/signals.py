@@ -0,0 +1,80 @@
+from allauth.socialaccount.models import SocialApp
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .health import forget_health_summary
+from .models import ActivityLog, Animal, Farm, Field
+from .stats import bump_activity_stats, stat_key, unlink_activity_stats
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=ActivityLog)
+def remember_activity_stat_key(sender, instance, raw=False, **kwargs):
+    # key before the update, so a changed date/type/link moves the count
+    instance._stat_key_before = None
+    if raw or instance.pk is None:
+        return
+    old = (
+        ActivityLog.objects.filter(pk=instance.pk)
+        .only("farm_id", "date", "activity_type", "field_id", "animal_id")
+        .first()
+    )
+    if old is not None:
+        instance._stat_key_before = stat_key(old)
+
+
+@receiver(post_save, sender=ActivityLog)
+def count_activity(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_key = stat_key(instance)
+    old_key = getattr(instance, "_stat_key_before", None)
+    if created or old_key is None:
+        bump_activity_stats([new_key], +1)
+    elif old_key != new_key:
+        bump_activity_stats([old_key], -1)
+        bump_activity_stats([new_key], +1)
+
+
+@receiver(post_delete, sender=ActivityLog)
+def uncount_activity(sender, instance, origin=None, **kwargs):
+    if _deleted_with_farm(origin):
+        return
+    bump_activity_stats([stat_key(instance)], -1)
+
+
+@receiver(post_delete, sender=Field)
+@receiver(post_delete, sender=Animal)
+def unlink_activity(sender, instance, origin=None, **kwargs):
+    # its logs were SET NULL; their rollup rows follow
+    if _deleted_with_farm(origin):
+        return
+    column = "field_id" if sender is Field else "animal_id"
+    unlink_activity_stats(column, [instance.pk])
+
+
+def _deleted_with_farm(origin):
+    # farm (or owner) delete cascades to its stat rows as well — nothing to
+    # update, and re-creating them would point at a deleted farm
+    # origin: the instance or queryset delete() was called on
+    origin_model = getattr(origin, "model", None) or type(origin)
+    return issubclass(origin_model, (Farm, User))
+
+
+@receiver(post_save, sender=Animal)
+def drop_health_summary(sender, instance, raw=False, **kwargs):
+    # no post_delete twin: see farm/health.py
+    owner_id = instance.owner_id
+    transaction.on_commit(lambda: forget_health_summary(owner_id))
+
+
+@receiver(post_save, sender=SocialApp)
+@receiver(post_delete, sender=SocialApp)
+def forget_social_app(sender, **kwargs):
+    # imported here: google_oauth pulls in httpx, which boot doesn't need
+    from .google_oauth import forget_credentials
+
+    forget_credentials()
@@ -0,0 +1,141 @@
+"""
+Sparse fieldsets and expansion for farm resources (GET only).
+
+- `?fields=id,name` keeps only those keys, and only the columns behind them
+  in the SELECT list (`.only()`, or the values() list on the fast path).
+- `?expand=farm,field` replaces a PK with the related object, serialized
+  read-only and joined in the same query (`select_related`).
+
+Names a serializer doesn't know (or can't expand) are a 400.
+"""
+
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def _csv_param(request, name):
+    raw = request.query_params.get(name) or ""
+    return {item.strip() for item in raw.split(",") if item.strip()}
+
+
+def get_sparse_params(request, serializer_class):
+    """
+    Serializer context entries for `request`: {"fields": frozenset | None,
+    "expand": frozenset}. Raises ValidationError on names `serializer_class`
+    doesn't declare.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return {"fields": None, "expand": frozenset()}
+
+    meta = serializer_class.Meta
+    expandable = getattr(meta, "expandable_fields", {})
+    fields = _csv_param(request, FIELDS_PARAM)
+    expand = _csv_param(request, EXPAND_PARAM)
+    unknown_fields = fields - {*meta.fields, *expandable}
+    unknown_expand = expand - set(expandable)
+    errors = {}
+    if unknown_fields:
+        errors[FIELDS_PARAM] = f"Unknown fields: {', '.join(sorted(unknown_fields))}."
+    if unknown_expand:
+        errors[EXPAND_PARAM] = f"Can't expand: {', '.join(sorted(unknown_expand))}."
+    if errors:
+        raise ValidationError(errors)
+
+    fields = frozenset(fields) or None
+    expand = frozenset(expand)
+    if fields is not None:
+        expand &= fields
+    return {"fields": fields, "expand": expand}
+
+
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin applying the context's `fields` / `expand` to the
+    top-level serializer. Meta.expandable_fields maps a relation name to the
+    serializer used when it is expanded.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+
+        expand = self.context.get("expand") or ()
+        for name, serializer_class in getattr(
+            self.Meta, "expandable_fields", {}
+        ).items():
+            if name in expand:
+                fields[name] = serializer_class(read_only=True)
+
+        only = self.context.get("fields")
+        if only is not None:
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+def _select_paths(serializer, model, prefix=""):
+    """select_related() paths and only() columns needed to serialize `serializer`."""
+    related, columns = set(), set()
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        attrs = field.source_attrs
+        path = prefix + "__".join(attrs)
+
+        if isinstance(field, serializers.BaseSerializer):
+            rel = model._meta.get_field(attrs[0])
+            nested_related, nested_columns = _select_paths(
+                field, rel.related_model, path + "__"
+            )
+            related |= {path, *nested_related}
+            columns |= nested_columns or {path}
+            continue
+
+        if len(attrs) > 1:
+            related.add(prefix + "__".join(attrs[:-1]))
+            columns.add(path)
+            continue
+
+        try:
+            columns.add(prefix + model._meta.get_field(attrs[0]).name)
+        except FieldDoesNotExist:
+            name = attrs[0]
+            if name.startswith("get_") and name.endswith("_display"):
+                columns.add(prefix + name[4:-8])
+            # otherwise an annotation (search_rank, ...) — nothing to load
+    return related, columns
+
+
+@lru_cache(maxsize=256)
+def _query_plan(serializer_class, fields, expand):
+    serializer = serializer_class(context={"fields": fields, "expand": expand})
+    return _select_paths(serializer, serializer.Meta.model)
+
+
+def sparse_queryset(
+    queryset, serializer_class, fields=None, expand=frozenset(), keep=()
+):
+    """
+    Join what the serializer reads through relations; with a `fields`
+    selection, also narrow the SELECT list to the columns those fields need
+    (plus `keep`, columns the view itself reads).
+    """
+    related, columns = _query_plan(serializer_class, fields, expand)
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    if fields is not None:
+        queryset = queryset.only(*sorted({*columns, *keep}))
+    return queryset
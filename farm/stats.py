@@ -0,0 +1,128 @@
+"""
+ActivityDailyStat maintenance.
+
+Every ActivityLog contributes +1 to the row keyed by
+(farm, date, activity_type, field, animal). Single-row writes are tracked by
+the signals in farm/signals.py; bulk paths (bulk_create / update) must call
+`bump_activity_stats` themselves. Deleting a field or animal sets the logs'
+link to NULL; `unlink_activity_stats` moves their counts the same way.
+"""
+
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import ActivityDailyStat, ActivityLog
+
+BUCKETS = {
+    "day": F("date"),
+    "week": TruncWeek("date"),
+    "month": TruncMonth("date"),
+}
+
+SPLITS = ("field", "animal")
+
+
+def stat_key(log):
+    return (log.farm_id, log.date, log.activity_type, log.field_id, log.animal_id)
+
+
+def bump_activity_stats(keys, delta=1):
+    """
+    Add `delta` to the rollup rows for each key (duplicates are summed).
+    One INSERT ... ON CONFLICT DO UPDATE per call.
+    """
+    counts = Counter(keys)
+    if not counts:
+        return
+
+    table = ActivityDailyStat._meta.db_table
+    rows = []
+    params = []
+    for key, n in counts.items():
+        rows.append("(%s, %s, %s, %s, %s, %s)")
+        params.extend([*key, n * delta])
+
+    sql = (
+        f'INSERT INTO "{table}" '
+        '("farm_id", "date", "activity_type", "field_id", "animal_id", "count") '
+        f"VALUES {', '.join(rows)} "
+        "ON CONFLICT ON CONSTRAINT uniq_activity_daily_stat "
+        f'DO UPDATE SET "count" = "{table}"."count" + EXCLUDED."count"'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def unlink_activity_stats(column, ids):
+    """
+    Move the counts of rows keyed by deleted fields / animals (`column`:
+    "field_id" or "animal_id") onto the rows without one, as the SET NULL
+    on their logs does. One DELETE ... RETURNING + upsert.
+    """
+    if not ids:
+        return
+    table = ActivityDailyStat._meta.db_table
+    # the key without `column`, which the INSERT leaves NULL
+    kept = ", ".join(
+        f'"{name}"'
+        for name in ("farm_id", "date", "activity_type", "field_id", "animal_id")
+        if name != column
+    )
+    sql = (
+        f'WITH moved AS (DELETE FROM "{table}" WHERE "{column}" = ANY(%s) '
+        f'RETURNING {kept}, "count") '
+        f'INSERT INTO "{table}" ({kept}, "count") '
+        f'SELECT {kept}, SUM("count") FROM moved GROUP BY {kept} '
+        "ON CONFLICT ON CONSTRAINT uniq_activity_daily_stat "
+        f'DO UPDATE SET "count" = "{table}"."count" + EXCLUDED."count"'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [list(ids)])
+
+
+@transaction.atomic
+def rebuild_activity_stats(farm_ids=None):
+    """Recompute the rollup from ActivityLog (all farms or the given ones)."""
+    stats = ActivityDailyStat.objects.all()
+    logs = ActivityLog.objects.all()
+    if farm_ids is not None:
+        stats = stats.filter(farm_id__in=farm_ids)
+        logs = logs.filter(farm_id__in=farm_ids)
+    stats.delete()
+
+    grouped = (
+        logs.order_by()
+        .values("farm_id", "date", "activity_type", "field_id", "animal_id")
+        .annotate(n=Count("id"))
+    )
+    sql, params = grouped.query.sql_with_params()
+    table = ActivityDailyStat._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{table}" '
+            '("farm_id", "date", "activity_type", "field_id", "animal_id", "count") '
+            f"{sql}",
+            params,
+        )
+        return cursor.rowcount
+
+
+def activity_frequency(queryset, bucket="day", split=None):
+    """
+    Counts per bucket / activity_type (/ field or animal) from the rollup.
+    `queryset` is an already-scoped ActivityDailyStat queryset.
+    """
+    group_by = ["bucket", "activity_type"]
+    if split:
+        group_by.append(split)
+
+    return (
+        queryset.filter(count__gt=0)
+        .annotate(bucket=BUCKETS[bucket])
+        .values(*group_by)
+        .annotate(count=Sum("count"))
+        .order_by(*group_by)
+    )
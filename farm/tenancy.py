@@ -0,0 +1,139 @@
+"""
+Tenant scoping for farm data.
+
+Default mode: querysets are filtered on the denormalized `owner_id` column.
+
+RLS mode (FARM_RLS_ENABLED=True): Postgres row-level security does the
+scoping. For API requests RowLevelSecurityMiddleware switches the connection
+to FARM_RLS_ROLE and the farm viewsets set `app.current_user_id` once DRF has
+authenticated the user; policies on the farm tables only expose that user's
+rows, including to raw SQL. Admin, migrations and management commands keep
+running as the connection's own role — the table owner, which RLS does not
+apply to (so the app must connect as the owner, not a separate login role).
+
+Set up the role/policies with `manage.py farm_rls enable` (needs a role that
+may CREATE ROLE and own the tables).
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .db import USER_SETTING
+from .models import ActivityDailyStat, ActivityLog, Animal, Crop, Farm, Field
+
+POLICY_NAME = "farm_tenant_isolation"
+
+_CURRENT_USER = f"NULLIF(current_setting('{USER_SETTING}', true), '')::bigint"
+
+# model -> USING clause of its policy
+POLICIES = {
+    Farm: f"owner_id = {_CURRENT_USER}",
+    Field: f"owner_id = {_CURRENT_USER}",
+    Crop: f"owner_id = {_CURRENT_USER}",
+    Animal: f"owner_id = {_CURRENT_USER}",
+    ActivityLog: f"owner_id = {_CURRENT_USER}",
+    # rollup has no owner column; farm_farm is itself filtered by its policy
+    ActivityDailyStat: "farm_id IN (SELECT id FROM farm_farm)",
+}
+
+_verified = False
+
+
+def rls_enabled() -> bool:
+    return getattr(settings, "FARM_RLS_ENABLED", False)
+
+
+def rls_role() -> str:
+    return getattr(settings, "FARM_RLS_ROLE", "farm_tenant")
+
+
+def owned(queryset, user):
+    """Scope a farm-related queryset to `user`."""
+    if rls_enabled():
+        return queryset  # Postgres policies do it
+    return queryset.filter(owner=user)
+
+
+def enter_tenant_role(using=DEFAULT_DB_ALIAS):
+    """Start of an API request: restricted role, no user yet (sees nothing)."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('role', %s, false), set_config(%s, '', false)",
+            [rls_role(), USER_SETTING],
+        )
+
+
+def set_current_user(user, using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config(%s, %s, false)",
+            [USER_SETTING, str(user.pk) if user and user.pk else ""],
+        )
+
+
+def leave_tenant_role(using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('role', 'none', false), set_config(%s, '', false)",
+            [USER_SETTING],
+        )
+
+
+def verify_rls_active():
+    """
+    Fail closed: in RLS mode querysets are unfiltered, so refuse to serve
+    if the policies are not actually enforced. Checked once per process.
+    """
+    global _verified
+    if _verified:
+        return
+    tables = [model._meta.db_table for model in POLICIES]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class "
+            "WHERE relname = ANY(%s) AND relrowsecurity",
+            [tables],
+        )
+        active = {row[0] for row in cursor.fetchall()}
+    missing = sorted(set(tables) - active)
+    if missing:
+        raise ImproperlyConfigured(
+            "FARM_RLS_ENABLED is set but row-level security is not enabled on "
+            f"{', '.join(missing)}. Run `manage.py farm_rls enable`."
+        )
+    _verified = True
+
+
+def enable_statements(role):
+    yield (
+        "DO $$ BEGIN "
+        f"IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = '{role}') THEN "
+        f'CREATE ROLE "{role}" NOLOGIN; '
+        "END IF; END $$"
+    )
+    yield f'GRANT "{role}" TO CURRENT_USER'
+    # the restricted role still needs the rest of the schema (auth, tokens, ...)
+    yield f'GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO "{role}"'
+    yield f'GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO "{role}"'
+    yield (
+        "ALTER DEFAULT PRIVILEGES IN SCHEMA public "
+        f'GRANT SELECT, INSERT, UPDATE, DELETE ON TABLES TO "{role}"'
+    )
+    yield (
+        "ALTER DEFAULT PRIVILEGES IN SCHEMA public "
+        f'GRANT USAGE, SELECT ON SEQUENCES TO "{role}"'
+    )
+    for model, using in POLICIES.items():
+        table = model._meta.db_table
+        yield f'DROP POLICY IF EXISTS {POLICY_NAME} ON "{table}"'
+        yield f'CREATE POLICY {POLICY_NAME} ON "{table}" TO "{role}" USING ({using})'
+        # no FORCE: the owning role (migrations, admin) stays unrestricted
+        yield f'ALTER TABLE "{table}" ENABLE ROW LEVEL SECURITY'
+
+
+def disable_statements():
+    for model in POLICIES:
+        table = model._meta.db_table
+        yield f'ALTER TABLE "{table}" DISABLE ROW LEVEL SECURITY'
+        yield f'DROP POLICY IF EXISTS {POLICY_NAME} ON "{table}"'
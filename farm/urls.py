@@ -6,8 +6,6 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
-from .auth_views import set_password
-from .email_otp_views import send_email_code, verify_email_code
 from .views import (
     ActivityLogViewSet,
     AnimalViewSet,
@@ -18,6 +16,7 @@ from .views import (
     RegisterView,
     UserProfileViewSet,
     me,
+    set_password,
 )
 
 router = DefaultRouter()
@@ -41,11 +40,7 @@ urlpatterns = [
     path("auth/logout/", LogoutView.as_view(), name="auth-logout"),
     path("auth/me/", me, name="auth-me"),
     path("auth/set-password/", set_password, name="auth-set-password"),
-    # ==========================
-    # EMAIL OTP
-    # ==========================
-    path("auth/email/send-code/", send_email_code, name="send_email_code"),
-    path("auth/email/verify-code/", verify_email_code, name="verify_email_code"),
+    # EMAIL OTP: config/auth_urls.py, loaded on first use
     # ==========================
     # API resources
     # ==========================
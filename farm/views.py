@@ -1,22 +1,62 @@
+from datetime import timedelta
+
 from allauth.account.models import EmailAddress
-from rest_framework import permissions, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import ActivityLog, Animal, Crop, Farm, Field, UserProfile
+from .email_otp_views import create_and_send_otp
+from .fastpath import fast_list_enabled, row_serializer_for
+from .health import (
+    cached_health_summary,
+    forget_health_summary,
+    refresh_health_summary,
+    set_health_status,
+    summary_rows,
+)
+from .imports import import_animals, read_upload
+from .lifecycle import transition_crops
+from .models import (
+    ActivityDailyStat,
+    ActivityLog,
+    Animal,
+    Crop,
+    Farm,
+    Field,
+    UserProfile,
+)
+from .parsers import FastJSONParser
+from .purge import get_progress, mark_for_deletion
+from .routers import pin_to_primary, replica_scope, use_replica
+from .search import get_search_term, search_activity_logs, trigram_search
 from .serializers import (
+    ActivityLogSearchSerializer,
     ActivityLogSerializer,
+    ActivityStatsQuerySerializer,
+    AnimalHealthBatchSerializer,
+    AnimalImportQuerySerializer,
     AnimalSerializer,
     CropSerializer,
+    CropTransitionSerializer,
     FarmSerializer,
     FieldSerializer,
+    HarvestCalendarQuerySerializer,
+    HealthSummaryQuerySerializer,
+    RegisterSerializer,
     UserProfileSerializer,
 )
-
-
-# OPTIONAL: если хочешь сразу отправлять OTP при регистрации
+from .sparse import get_sparse_params, sparse_queryset
+from .stats import activity_frequency
+from .tenancy import owned, rls_enabled, set_current_user
 
 
 class IsOwnerRelatedPermission(permissions.BasePermission):
@@ -30,77 +70,451 @@ class IsOwnerRelatedPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         user = request.user
 
-        if isinstance(obj, Farm):
-            return obj.owner == user
-        if isinstance(obj, Field):
-            return obj.farm.owner == user
-        if isinstance(obj, Crop):
-            return obj.field.farm.owner == user
-        if isinstance(obj, Animal):
-            return obj.farm.owner == user
-        if isinstance(obj, ActivityLog):
-            return obj.farm.owner == user
+        # every farm-related model carries owner_id — no FK walk needed
+        if isinstance(obj, (Farm, Field, Crop, Animal, ActivityLog)):
+            return obj.owner_id == user.pk
         if isinstance(obj, UserProfile):
-            return obj.user == user
+            return obj.user_id == user.pk
 
         return False
 
 
-class FarmViewSet(viewsets.ModelViewSet):
+class TenantScopedMixin:
+    """RLS mode: tell Postgres who the (DRF-authenticated) user is."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if rls_enabled():
+            set_current_user(request.user)
+
+
+class ReplicaReadsMixin:
+    """
+    Safe-method requests read from a replica (farm/routers.py) unless the
+    user wrote in the last DB_REPLICA_PIN_SECONDS; other methods set that pin.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            use_replica(request.user)
+        else:
+            pin_to_primary(request.user)
+
+
+class SparseFieldsViewMixin:
+    """
+    ?fields= / ?expand= on reads (farm/sparse.py): passed to the serializer
+    through its context, and turned into only() / select_related() here.
+    """
+
+    # IsOwnerRelatedPermission reads owner_id on detail routes
+    sparse_keep_columns = ("owner",)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(get_sparse_params(self.request, self.get_serializer_class()))
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+        params = get_sparse_params(self.request, self.get_serializer_class())
+        return sparse_queryset(
+            queryset,
+            self.get_serializer_class(),
+            params["fields"],
+            params["expand"],
+            keep=self.sparse_keep_columns,
+        )
+
+
+class FastListMixin:
+    """
+    list(): serialize the page from values_list() rows via RowSerializer
+    (farm/fastpath.py) — same JSON as the ModelSerializer, one query,
+    no per-row model instances or lazy FK fetches.
+    """
+
+    def list(self, request, *args, **kwargs):
+        context = self.get_serializer_context()
+        fast = row_serializer_for(
+            self.get_serializer_class(),
+            context.get("fields"),
+            context.get("expand", frozenset()),
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        if not fast_list_enabled() or fast is None or not fast.supports(queryset):
+            return super().list(request, *args, **kwargs)
+
+        page = self.paginate_queryset(fast.rows(queryset))
+        if page is not None:
+            return self.get_paginated_response(fast.to_representation(page))
+        return Response(fast.to_representation(fast.rows(queryset)))
+
+
+class FarmViewSet(
+    TenantScopedMixin,
+    ReplicaReadsMixin,
+    SparseFieldsViewMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = FarmSerializer
     permission_classes = [IsAuthenticated, IsOwnerRelatedPermission]
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return Farm.objects.none()
-        return Farm.objects.filter(owner=self.request.user)
+        qs = owned(Farm.objects.live(), self.request.user)
+        term = get_search_term(self.request)
+        if term:
+            qs = trigram_search(qs, "name", term)
+        return qs
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def destroy(self, request, *args, **kwargs):
+        """
+        202: the farm is hidden at once and its data deleted in the
+        background, in batches (farm/purge.py); /farms/deletions/ shows
+        how far it got.
+        """
+        farm = self.get_object()
+        mark_for_deletion(farm)
+        return Response(
+            {"id": farm.pk, "deleting_since": farm.deleting_since},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-class FieldViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["get"])
+    def deletions(self, request):
+        """The user's farms still being deleted, with the rows removed so far."""
+        farms = (
+            owned(Farm.objects.filter(deleting_since__isnull=False), request.user)
+            .order_by("deleting_since")
+            .values_list("pk", "name", "deleting_since")
+        )
+        results = []
+        for pk, name, since in farms:
+            progress = get_progress(pk) or {}
+            results.append(
+                {
+                    "id": pk,
+                    "name": name,
+                    "deleting_since": since,
+                    "deleted": progress.get("deleted", {}),
+                }
+            )
+        return Response({"results": results})
+
+
+class FieldViewSet(
+    TenantScopedMixin,
+    ReplicaReadsMixin,
+    SparseFieldsViewMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = FieldSerializer
     permission_classes = [IsAuthenticated, IsOwnerRelatedPermission]
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return Field.objects.none()
-        return Field.objects.filter(farm__owner=self.request.user)
+        return owned(Field.objects.live(), self.request.user)
 
 
-class CropViewSet(viewsets.ModelViewSet):
+class CropViewSet(
+    TenantScopedMixin,
+    ReplicaReadsMixin,
+    SparseFieldsViewMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = CropSerializer
     permission_classes = [IsAuthenticated, IsOwnerRelatedPermission]
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return Crop.objects.none()
-        return Crop.objects.filter(field__farm__owner=self.request.user)
+        return owned(Crop.objects.live(), self.request.user)
+
+    @action(detail=False, methods=["get"], url_path="harvest-calendar")
+    def harvest_calendar(self, request):
+        """
+        Not-yet-harvested crops due within ?days= (default 14), grouped by
+        week of expected_harvest_date, plus the first ?overdue_limit= (100)
+        overdue ones; overdue_truncated tells if there are more.
+        Single-table queries on Crop (owner, expected_harvest_date, status).
+        """
+        params = HarvestCalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        today = timezone.localdate()
+        until = today + timedelta(days=p["days"])
+
+        qs = owned(Crop.objects.live(), request.user).filter(
+            status__in=Crop.OPEN_STATUSES
+        )
+        if "farm" in p:
+            qs = qs.filter(farm_id=p["farm"])
+        qs = qs.order_by("expected_harvest_date", "id")
+        columns = ["id", "name", "farm", "field", "status", "expected_harvest_date"]
+
+        overdue, truncated = [], False
+        if p["include_overdue"]:
+            limit = p["overdue_limit"]
+            rows = qs.filter(expected_harvest_date__lt=today).values(*columns)
+            overdue = list(rows[: limit + 1])
+            truncated = len(overdue) > limit
+            del overdue[limit:]
+        for row in overdue:
+            row["overdue"] = True
+
+        weeks = {}
+        upcoming = (
+            qs.filter(expected_harvest_date__range=(today, until))
+            .annotate(week=TruncWeek("expected_harvest_date"))
+            .values(*columns, "week")
+        )
+        for row in upcoming:
+            week = row.pop("week")
+            row["overdue"] = False
+            weeks.setdefault(week, []).append(row)
+
+        return Response(
+            {
+                "today": today,
+                "until": until,
+                "overdue": overdue,
+                "overdue_truncated": truncated,
+                "weeks": [
+                    {"week_start": week, "crops": crops}
+                    for week, crops in weeks.items()
+                ],
+            }
+        )
+
+    @action(detail=False, methods=["post"])
+    def transition(self, request):
+        """
+        Move the crops of a field / farm (optionally within a plant_date or
+        expected_harvest_date window) to the next status — planned ->
+        growing -> harvested — in one UPDATE; log_harvest adds a harvesting
+        activity per crop. Crops in other statuses are left alone.
+        """
+        params = CropTransitionSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        crops = owned(Crop.objects.live(), request.user)
+        if "field" in p:
+            crops = crops.filter(field_id=p["field"])
+        if "farm" in p:
+            crops = crops.filter(farm_id=p["farm"])
+        if "date_from" in p:
+            crops = crops.filter(**{f"{p['date_field']}__gte": p["date_from"]})
+        if "date_to" in p:
+            crops = crops.filter(**{f"{p['date_field']}__lte": p["date_to"]})
+
+        with transaction.atomic():
+            result = transition_crops(
+                request.user,
+                crops,
+                p["status"],
+                log_harvest=p["log_harvest"],
+                date=p["date"],
+                note=p["note"],
+            )
+        return Response(
+            {
+                "status": p["status"],
+                "from_status": Crop.LIFECYCLE[p["status"]],
+                **result,
+            }
+        )
 
 
-class AnimalViewSet(viewsets.ModelViewSet):
+class AnimalViewSet(
+    TenantScopedMixin,
+    ReplicaReadsMixin,
+    SparseFieldsViewMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = AnimalSerializer
     permission_classes = [IsAuthenticated, IsOwnerRelatedPermission]
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return Animal.objects.none()
-        return Animal.objects.filter(farm__owner=self.request.user)
+        qs = owned(Animal.objects.live(), self.request.user)
+        term = get_search_term(self.request)
+        if term:
+            qs = trigram_search(qs, "tag_id", term)
+        return qs
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        url_name="import",
+        parser_classes=[MultiPartParser, FastJSONParser],
+    )
+    def bulk_import(self, request):
+        """
+        Register many animals at once: a multipart `file` (CSV with a header
+        row, JSON array or JSON Lines) or a JSON array body. Existing tag_ids
+        are skipped, or overwritten with ?on_conflict=update (the user's own
+        animals only); ?farm= is the farm of rows without one.
+        Responds with the counts and the rejected rows (farm/imports.py).
+        """
+        params = AnimalImportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        if "file" in request.FILES:
+            rows = read_upload(request.FILES["file"])
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            raise ValidationError(
+                {"file": ["Upload a file, or send a JSON array of animals."]}
+            )
 
+        with transaction.atomic():
+            result = import_animals(
+                request.user, rows, on_conflict=p["on_conflict"], farm=p.get("farm")
+            )
+        if result.created or result.updated:
+            refresh_health_summary(request.user.pk)
+        return Response(result.as_dict())
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        owner_id = instance.owner_id
+        transaction.on_commit(lambda: forget_health_summary(owner_id))
+
+    @action(detail=False, methods=["post"], url_path="health", url_name="health")
+    def set_health(self, request):
+        """
+        Set health_status on many animals at once (tag_ids and/or farm /
+        species / current_status) and log a vet_check for each, in one
+        transaction and a fixed number of queries.
+        Responds with the counts, tag_ids not found and the affected farms'
+        health summary.
+        """
+        params = AnimalHealthBatchSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        animals = owned(Animal.objects.live(), request.user)
+        if "tag_ids" in p:
+            animals = animals.filter(tag_id__in=p["tag_ids"])
+        if "farm" in p:
+            animals = animals.filter(farm_id=p["farm"])
+        if "species" in p:
+            animals = animals.filter(species__iexact=p["species"])
+        if "current_status" in p:
+            animals = animals.filter(health_status=p["current_status"])
+
+        with transaction.atomic():
+            result = set_health_status(
+                request.user,
+                animals,
+                p["health_status"],
+                p["date"],
+                note=p["note"],
+                tag_ids=p.get("tag_ids"),
+            )
+        summary = refresh_health_summary(request.user.pk)
+        return Response(
+            {
+                "health_status": p["health_status"],
+                **result,
+                "farms": summary_rows(summary, result["farms"]),
+            }
+        )
 
-class ActivityLogViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["get"], url_path="health-summary")
+    def health_summary(self, request):
+        """Animals per health_status on each of the user's farms (?farm= one)."""
+        params = HealthSummaryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        farms = owned(Farm.objects.live(), request.user)
+        if "farm" in p:
+            farms = farms.filter(pk=p["farm"])
+        farm_ids = list(farms.order_by("pk").values_list("pk", flat=True))
+        summary = cached_health_summary(request.user.pk)
+        return Response({"results": summary_rows(summary, farm_ids)})
+
+
+class ActivityLogViewSet(
+    TenantScopedMixin,
+    ReplicaReadsMixin,
+    SparseFieldsViewMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ActivityLogSerializer
     permission_classes = [IsAuthenticated, IsOwnerRelatedPermission]
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return ActivityLog.objects.none()
-        return ActivityLog.objects.filter(farm__owner=self.request.user)
+        qs = owned(ActivityLog.objects.live(), self.request.user)
+        term = get_search_term(self.request)
+        if term:
+            qs = search_activity_logs(qs, term)
+        return qs
+
+    def get_serializer_class(self):
+        # ?q= adds search_rank / search_snippet to each row
+        if self.action == "list" and get_search_term(self.request):
+            return ActivityLogSearchSerializer
+        return ActivityLogSerializer
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """
+        Activity counts per day/week/month and activity_type, served from the
+        daily rollup. ?by=field|animal splits each bucket further.
+        """
+        params = ActivityStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        qs = ActivityDailyStat.objects.filter(
+            farm__in=owned(Farm.objects.live(), request.user),
+            date__range=(p["date_from"], p["date_to"]),
+        )
+        for name in ("farm", "field", "animal", "activity_type"):
+            if name in p:
+                qs = qs.filter(**{name: p[name]})
+
+        return Response(
+            {
+                "bucket": p["bucket"],
+                "by": p.get("by"),
+                "date_from": p["date_from"],
+                "date_to": p["date_to"],
+                "results": list(activity_frequency(qs, p["bucket"], p.get("by"))),
+            }
+        )
+
 
 class UserProfileViewSet(viewsets.ModelViewSet):
     serializer_class = UserProfileSerializer
@@ -117,17 +531,6 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-# farm/views.py
-
-from django.db import transaction
-from rest_framework import permissions, status
-from rest_framework.response import Response
-from rest_framework.views import APIView
-
-from .serializers import RegisterSerializer
-from .email_otp_views import create_and_send_otp  # путь поправь, если файл иначе называется
-
-
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -205,3 +608,19 @@ def me(request):
             "email_verified": verified,
         }
     )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def set_password(request):
+    password = request.data.get("password") or ""
+    password2 = request.data.get("password2") or ""
+
+    if password != password2:
+        return Response({"detail": "Passwords do not match"}, status=400)
+
+    validate_password(password, request.user)
+    request.user.set_password(password)
+    request.user.save(update_fields=["password"])
+
+    return Response({"detail": "Password set"}, status=200)
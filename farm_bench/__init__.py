@@ -0,0 +1,9 @@
+"""
+Development tooling for the farm app: the bench_* / loadtest_* management
+commands, seed_farm_data, and the helpers they share (benchmarking.py).
+
+They drive the API through Django's test client, spawn gunicorn and fake
+upstream servers, so they live outside `farm` and are only installed with
+ENABLE_BENCH_TOOLS (default: DJANGO_DEBUG). The Docker image leaves the
+package out.
+"""
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class FarmBenchConfig(AppConfig):
+    name = "farm_bench"
+    verbose_name = "Farm benchmarks"
@@ -0,0 +1,396 @@
+"""
+Helpers shared by the bench_* management commands.
+
+Benchmarks run against the configured database. Seeded rows live inside a
+transaction that is rolled back at the end unless --keep is given.
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from farm.models import ActivityLog, Animal, Crop, Farm, Field
+from farm.stats import rebuild_activity_stats
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def bench_transaction(keep=False):
+    """Run the block in a transaction; roll it back unless `keep`."""
+    try:
+        with transaction.atomic():
+            yield
+            if not keep:
+                raise Rollback
+    except Rollback:
+        pass
+
+
+def api_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+def test_hosts():
+    # the test client talks to "testserver"
+    return override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+
+
+class FakeHTTPServer:
+    """
+    Minimal keep-alive HTTP/1.1 server on 127.0.0.1 standing in for an
+    upstream API (Google token endpoint, JWKS, ...). Runs its own event loop
+    in a thread. `routes` maps path -> (status, JSON payload); every
+    response is delayed by `delay` seconds.
+    """
+
+    def __init__(self, routes, delay=0.0):
+        self.routes = routes
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self._server = server
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _shutdown(self):
+        self._server.close()
+        current = asyncio.current_task()
+        handlers = [task for task in asyncio.all_tasks() if task is not current]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while request_line := await reader.readline():
+                path = request_line.split()[1].decode().split("?")[0]
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                status, payload = self.routes.get(path, (404, {"error": "not_found"}))
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _pin_to_cpus(count):
+    cores = sorted(os.sched_getaffinity(0))[:count]
+    return lambda: os.sched_setaffinity(0, cores)
+
+
+@contextmanager
+def gunicorn_server(*args, env=None, cpus=None, startup_timeout=60):
+    """
+    Run `gunicorn *args` bound to a free local port for the duration of the
+    block, optionally pinned to `cpus` cores. Yields (base_url, seconds from
+    spawn until it answered HTTP).
+    """
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", f"--bind=127.0.0.1:{port}", *args],
+        env={**os.environ, **(env or {})},
+        preexec_fn=_pin_to_cpus(cpus) if cpus else None,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = started + startup_timeout
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {server.returncode}")
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError("gunicorn did not come up") from None
+                time.sleep(0.05)
+        yield base_url, time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def http_load(
+    base_url, url, concurrency, duration, headers=None, probe=None, probe_every=0.5
+):
+    """
+    `concurrency` keep-alive clients GET `url` back to back for `duration`
+    seconds, after one warm-up round. `probe` (sync, run in a thread) is
+    sampled every `probe_every` seconds meanwhile. Returns (req/s, latency
+    samples in ms, non-200 count, probe values).
+    """
+    samples, errors, probes = [], 0, []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=30
+    ) as client:
+        await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                resp = await client.get(url)
+                samples.append((time.perf_counter() - t0) * 1000)
+                if resp.status_code != 200:
+                    errors += 1
+
+        async def sampler():
+            while probe is not None and time.perf_counter() < deadline:
+                probes.append(await asyncio.to_thread(probe))
+                await asyncio.sleep(probe_every)
+
+        started = time.perf_counter()
+        await asyncio.gather(sampler(), *(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return len(samples) / elapsed, samples, errors, probes
+
+
+@contextmanager
+def committed_tenant(prefix, **seed_options):
+    """
+    Seed one user's farm data and commit it, for benchmarks that hit a
+    separate server process. Yields (user, row counts); deleted afterwards.
+    """
+    User = get_user_model()
+    User.objects.filter(username__startswith=prefix).delete()  # interrupted run
+    with bench_transaction(keep=True):
+        users, counts = seed_farm_data(users=1, prefix=prefix, **seed_options)
+    try:
+        yield users[0], counts
+    finally:
+        User.objects.filter(username__startswith=prefix).delete()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = max(0, min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(samples_ms):
+    return {
+        "n": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms, default=0.0), 3),
+    }
+
+
+def time_calls(fn, repeat=20, warmup=2):
+    """Call `fn` warmup + repeat times; return per-call wall time in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def analyze(*models):
+    """Refresh planner statistics after bulk inserts."""
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+
+def explain(queryset):
+    return queryset.explain(analyze=True, buffers=True)
+
+
+def bulk_insert(model, objs, batch_size=5000, progress=None):
+    """
+    bulk_create from a generator without materializing it; `progress(model,
+    rows so far)` after each batch.
+    """
+    objs = iter(objs)
+    created = 0
+    while batch := list(islice(objs, batch_size)):
+        model.objects.bulk_create(batch)
+        created += len(batch)
+        if progress is not None:
+            progress(model, created)
+    return created
+
+
+def seed_farm_data(
+    users=10,
+    farms_per_user=3,
+    fields_per_farm=10,
+    crops_per_field=5,
+    animals_per_farm=50,
+    logs_per_farm=500,
+    prefix="bench",
+    seed=42,
+    batch_size=5000,
+    progress=None,
+):
+    """
+    Synthetic tenants via bulk_create. Denormalized columns (owner, Crop.farm)
+    are filled in here since bulk_create skips save(); the activity rollup is
+    rebuilt at the end. Same arguments, same rows (dates relative to today).
+    `progress` goes to bulk_insert. Returns (users, row counts).
+    """
+    rnd = random.Random(seed)
+    today = timezone.localdate()
+    User = get_user_model()
+
+    owners = User.objects.bulk_create(
+        User(username=f"{prefix}-{i}", email=f"{prefix}-{i}@example.com")
+        for i in range(users)
+    )
+    farms = Farm.objects.bulk_create(
+        Farm(owner=u, name=f"Farm {u.pk}-{i}", location="Tashkent", size_hectares=120)
+        for u in owners
+        for i in range(farms_per_user)
+    )
+    fields = Field.objects.bulk_create(
+        (
+            Field(
+                farm=f,
+                owner_id=f.owner_id,
+                name=f"Field {i}",
+                area=rnd.randint(1, 50),
+                soil_type=rnd.choice(Field.SOIL_CHOICES)[0],
+            )
+            for f in farms
+            for i in range(fields_per_farm)
+        ),
+        batch_size=batch_size,
+    )
+
+    def crops():
+        statuses = [s for s, _ in Crop.STATUS_CHOICES]
+        for field in fields:
+            for _ in range(crops_per_field):
+                harvest = today + timedelta(days=rnd.randint(-180, 365))
+                yield Crop(
+                    field=field,
+                    farm_id=field.farm_id,
+                    owner_id=field.owner_id,
+                    name=rnd.choice(["Wheat", "Cotton", "Tomato", "Melon"]),
+                    plant_date=harvest - timedelta(days=120),
+                    expected_harvest_date=harvest,
+                    status=rnd.choice(statuses),
+                )
+
+    def animals():
+        health = [s for s, _ in Animal.HEALTH_CHOICES]
+        for farm in farms:
+            for i in range(animals_per_farm):
+                yield Animal(
+                    farm=farm,
+                    owner_id=farm.owner_id,
+                    species=rnd.choice(["Cow", "Sheep", "Goat", "Chicken"]),
+                    tag_id=f"{prefix}-{farm.pk}-{i}",
+                    birth_date=today - timedelta(days=rnd.randint(30, 3000)),
+                    health_status=rnd.choice(health),
+                )
+
+    def logs():
+        activity_types = [s for s, _ in ActivityLog.ACTIVITY_CHOICES]
+        notes = ["Watered the north rows", "Found aphids on leaves", "Routine check"]
+        fields_by_farm = {}
+        for field in fields:
+            fields_by_farm.setdefault(field.farm_id, []).append(field.pk)
+        for farm in farms:
+            for _ in range(logs_per_farm):
+                yield ActivityLog(
+                    farm=farm,
+                    owner_id=farm.owner_id,
+                    date=today - timedelta(days=rnd.randint(0, 365)),
+                    activity_type=rnd.choice(activity_types),
+                    description=rnd.choice(notes),
+                    field_id=rnd.choice(fields_by_farm.get(farm.pk, [None])),
+                    created_by_id=farm.owner_id,
+                )
+
+    counts = {
+        "users": len(owners),
+        "farms": len(farms),
+        "fields": len(fields),
+        "crops": bulk_insert(Crop, crops(), batch_size, progress),
+        "animals": bulk_insert(Animal, animals(), batch_size, progress),
+        "activity_logs": bulk_insert(ActivityLog, logs(), batch_size, progress),
+    }
+    rebuild_activity_stats([f.pk for f in farms])
+    analyze(Farm, Field, Crop, Animal, ActivityLog)
+    return owners, counts
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from farm.compression import available_encodings, compress, compress_chunks
+from farm_bench.benchmarking import (
+    api_client,
+    bench_transaction,
+    seed_farm_data,
+    test_hosts,
+)
+
+ENDPOINTS = [
+    "/api/v1/farms/",
+    "/api/v1/fields/",
+    "/api/v1/crops/",
+    "/api/v1/animals/",
+    "/api/v1/activities/",
+    "/api/v1/activities/?q=aphids",
+    "/api/v1/activities/stats/?bucket=week&by=field",
+    "/api/v1/crops/harvest-calendar/?days=90",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Bytes on the wire and CPU cost of each negotiated encoding, per "
+        "endpoint (identity body fetched once, then compressed offline)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=16 * 1024,
+            help="Chunk size for the streaming (flush per chunk) figures",
+        )
+
+    def handle(self, *args, **opts):
+        encodings = available_encodings()
+        self.stdout.write(f"encodings: {', '.join(encodings)}")
+
+        with bench_transaction(), test_hosts():
+            users, counts = seed_farm_data(users=1, prefix="bench-gz")
+            self.stdout.write(f"seeded {counts}")
+            client = api_client(users[0])
+            bodies = {}
+            for url in ENDPOINTS:
+                resp = client.get(url, HTTP_ACCEPT_ENCODING="identity")
+                assert resp.status_code == 200, (url, resp.status_code)
+                bodies[url] = resp.content
+
+        for url, body in bodies.items():
+            self.stdout.write(f"\n{url} ({len(body)} bytes)")
+            chunks = [
+                body[i : i + opts["chunk_size"]]
+                for i in range(0, len(body), opts["chunk_size"])
+            ]
+            for encoding in encodings:
+                started = time.process_time()
+                for _ in range(opts["repeat"]):
+                    size = len(compress(body, encoding))
+                cpu_ms = (time.process_time() - started) * 1000 / opts["repeat"]
+                streamed = sum(len(c) for c in compress_chunks(chunks, encoding))
+                self.stdout.write(
+                    f"  {encoding:<5} {size:>8} bytes "
+                    f"({size / len(body):6.1%})  cpu {cpu_ms:7.3f} ms  "
+                    f"streamed {streamed:>8} bytes"
+                )
@@ -0,0 +1,136 @@
+import time
+
+import jwt
+from allauth.socialaccount.internal import jwtkit
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from farm import google_oidc
+from farm_bench.benchmarking import FakeHTTPServer, summarize
+
+AUDIENCE = "bench-client-id"
+DISCOVERY_PATH = "/.well-known/openid-configuration"
+JWKS_PATH = "/oauth2/v3/certs"
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    google_oidc.CACHE_ALIAS: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench-google-id-token",
+    },
+}
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update(kid=kid, alg="RS256", use="sig")
+    return private_key, jwk
+
+
+def sign(private_key, kid, issuer):
+    now = int(time.time())
+    claims = {
+        "iss": issuer,
+        "aud": AUDIENCE,
+        "sub": "1234567890",
+        "email": "bench@example.com",
+        "email_verified": True,
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+class Command(BaseCommand):
+    help = (
+        "id_token verification offline against a fake discovery/JWKS server: "
+        "allauth's fetch-per-login path vs the cached JWKS (farm.google_oidc), "
+        "plus key rotation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--delay", type=float, default=0.05, help="Upstream latency (s)"
+        )
+
+    def handle(self, *args, **opts):
+        old_key, old_jwk = make_key("key-1")
+        new_key, new_jwk = make_key("key-2")
+        routes = {JWKS_PATH: (200, {"keys": [old_jwk]})}
+
+        with FakeHTTPServer(routes, delay=opts["delay"]) as upstream:
+            issuer = upstream.base_url
+            routes[DISCOVERY_PATH] = (
+                200,
+                {"issuer": issuer, "jwks_uri": upstream.base_url + JWKS_PATH},
+            )
+            token = sign(old_key, "key-1", issuer)
+
+            with override_settings(
+                GOOGLE_OIDC_DISCOVERY_URL=upstream.base_url + DISCOVERY_PATH,
+                CACHES=LOCAL_CACHES,
+            ):
+                google_oidc._memo.clear()
+
+                def allauth_verify():
+                    return jwtkit.verify_and_decode(
+                        credential=token,
+                        keys_url=upstream.base_url + JWKS_PATH,
+                        issuer=issuer,
+                        audience=AUDIENCE,
+                        lookup_kid=jwtkit.lookup_kid_jwk,
+                    )
+
+                def cached_verify():
+                    return google_oidc.verify_id_token(token, AUDIENCE)
+
+                self.measure(
+                    "allauth (fetch per login)", allauth_verify, upstream, opts
+                )
+                self.measure(
+                    "cached JWKS, cold", cached_verify, upstream, {"repeat": 1}
+                )
+                self.measure("cached JWKS, warm", cached_verify, upstream, opts)
+
+                # Google publishes key-2 and starts signing with it
+                routes[JWKS_PATH] = (200, {"keys": [old_jwk, new_jwk]})
+                rotated = sign(new_key, "key-2", issuer)
+                # pretend the cached copy is older than JWKS_MIN_REFRESH
+                for entry in google_oidc._memo.values():
+                    entry["fetched_at"] -= google_oidc.JWKS_MIN_REFRESH
+                self.measure(
+                    "rotated kid (one refetch)",
+                    lambda: google_oidc.verify_id_token(rotated, AUDIENCE),
+                    upstream,
+                    opts,
+                )
+
+                forged = sign(make_key("key-x")[0], "key-x", issuer)
+                before = upstream.requests
+                for _ in range(opts["repeat"]):
+                    try:
+                        google_oidc.verify_id_token(forged, AUDIENCE)
+                    except jwt.PyJWTError:
+                        pass
+                    else:
+                        raise AssertionError("token with unknown kid accepted")
+                self.stdout.write(
+                    f"{'unknown kid x' + str(opts['repeat']):<28} rejected, "
+                    f"{upstream.requests - before} upstream requests"
+                )
+                google_oidc._memo.clear()
+
+    def measure(self, label, fn, upstream, opts):
+        before = upstream.requests
+        samples = []
+        for _ in range(opts["repeat"]):
+            t0 = time.perf_counter()
+            claims = fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+            assert claims["aud"] == AUDIENCE
+        self.stdout.write(
+            f"{label:<28} {summarize(samples)}  "
+            f"upstream requests: {upstream.requests - before}"
+        )
@@ -0,0 +1,113 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from farm.models import Crop, Farm, Field
+from farm_bench.benchmarking import (
+    analyze,
+    api_client,
+    bench_transaction,
+    explain,
+    summarize,
+    test_hosts,
+    time_calls,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark /crops/harvest-calendar/ against N synthetic crops."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--crops", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--farms-per-user", type=int, default=5)
+        parser.add_argument("--fields-per-farm", type=int, default=20)
+        parser.add_argument("--days", type=int, default=14)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep seeded rows (no rollback)"
+        )
+
+    def handle(self, *args, **opts):
+        with bench_transaction(keep=opts["keep"]), test_hosts():
+            user = self.seed(opts)
+            client = api_client(user)
+            url = f"/api/v1/crops/harvest-calendar/?days={opts['days']}"
+
+            def call():
+                resp = client.get(url)
+                assert resp.status_code == 200, resp.status_code
+
+            stats = summarize(time_calls(call, repeat=opts["repeat"]))
+            self.stdout.write(f"{url} at {opts['crops']} crops: {stats}")
+
+            # the view's two queries: the overdue page, then the window
+            today = timezone.localdate()
+            qs = Crop.objects.filter(
+                owner=user, status__in=Crop.OPEN_STATUSES
+            ).order_by("expected_harvest_date", "id")
+            overdue = qs.filter(expected_harvest_date__lt=today)[:101]
+            upcoming = qs.filter(
+                expected_harvest_date__range=(
+                    today,
+                    today + timedelta(days=opts["days"]),
+                )
+            )
+            self.stdout.write(explain(overdue))
+            self.stdout.write(explain(upcoming))
+
+    def seed(self, opts):
+        rnd = random.Random(42)
+        users = [
+            User.objects.create_user(username=f"bench-calendar-{i}")
+            for i in range(opts["users"])
+        ]
+        farms = Farm.objects.bulk_create(
+            Farm(owner=u, name=f"Farm {i}")
+            for u in users
+            for i in range(opts["farms_per_user"])
+        )
+        fields = Field.objects.bulk_create(
+            (
+                Field(farm=f, owner_id=f.owner_id, name=f"Field {i}", area=10)
+                for f in farms
+                for i in range(opts["fields_per_farm"])
+            ),
+            batch_size=opts["batch_size"],
+        )
+
+        today = timezone.localdate()
+        statuses = [s for s, _ in Crop.STATUS_CHOICES]
+        batch = []
+        for i in range(opts["crops"]):
+            field = fields[i % len(fields)]
+            harvest = today + timedelta(days=rnd.randint(-180, 365))
+            batch.append(
+                Crop(
+                    field=field,
+                    # bulk_create skips Crop.save()
+                    farm_id=field.farm_id,
+                    owner_id=field.owner_id,
+                    name=f"Crop {i}",
+                    plant_date=harvest - timedelta(days=120),
+                    expected_harvest_date=harvest,
+                    status=rnd.choice(statuses),
+                )
+            )
+            if len(batch) >= opts["batch_size"]:
+                Crop.objects.bulk_create(batch)
+                batch.clear()
+        Crop.objects.bulk_create(batch)
+
+        analyze(Farm, Field, Crop)
+        self.stdout.write(
+            f"seeded {len(users)} users, {len(farms)} farms, "
+            f"{len(fields)} fields, {opts['crops']} crops"
+        )
+        return users[0]
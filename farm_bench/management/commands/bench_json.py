@@ -0,0 +1,92 @@
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from farm.models import ActivityLog, Animal, Crop, Farm, Field
+from farm.parsers import FastJSONParser
+from farm.renderers import FastJSONRenderer, orjson
+from farm.serializers import (
+    ActivityLogSerializer,
+    AnimalSerializer,
+    CropSerializer,
+    FarmSerializer,
+    FieldSerializer,
+)
+from farm_bench.benchmarking import (
+    bench_transaction,
+    seed_farm_data,
+    summarize,
+    time_calls,
+)
+
+CASES = {
+    "farms": (FarmSerializer, Farm),
+    "fields": (FieldSerializer, Field),
+    "crops": (CropSerializer, Crop),
+    "animals": (AnimalSerializer, Animal),
+    "activities": (ActivityLogSerializer, ActivityLog),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Encode/decode time of DRF's JSONRenderer/JSONParser vs the orjson "
+        "classes for each farm serializer's list payload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        if orjson is None:
+            self.stdout.write("orjson is not installed: both sides use stdlib json")
+        rows, repeat = opts["rows"], opts["repeat"]
+
+        with bench_transaction():
+            users, _ = seed_farm_data(
+                users=1,
+                farms_per_user=max(1, rows // 50),
+                fields_per_farm=max(1, rows // 50),
+                animals_per_farm=rows,
+                logs_per_farm=rows,
+                prefix="bench-json",
+            )
+            payloads = {
+                name: serializer_class(
+                    model.objects.filter(owner=users[0])[:rows], many=True
+                ).data
+                for name, (serializer_class, model) in CASES.items()
+            }
+            # raw values() rows: dates, datetimes and Decimals hit the encoder
+            payloads["farms (values)"] = list(
+                Farm.objects.filter(owner=users[0]).values()
+            )
+
+        stock_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        stock_parser, fast_parser = JSONParser(), FastJSONParser()
+
+        for name, data in payloads.items():
+            body = stock_renderer.render(data)
+            parsed = stock_parser.parse(io.BytesIO(body))
+            # compared as values: orjson spells some floats differently
+            fast_body = fast_renderer.render(data)
+            if stock_parser.parse(io.BytesIO(fast_body)) != parsed:
+                raise CommandError(f"{name}: rendered JSON differs")
+            if fast_parser.parse(io.BytesIO(body)) != parsed:
+                raise CommandError(f"{name}: parsed data differs")
+
+            self.stdout.write(f"\n{name} ({len(data)} rows, {len(body)} bytes)")
+            for label, fn in (
+                ("render stock", lambda data=data: stock_renderer.render(data)),
+                ("render fast", lambda data=data: fast_renderer.render(data)),
+                (
+                    "parse stock",
+                    lambda body=body: stock_parser.parse(io.BytesIO(body)),
+                ),
+                ("parse fast", lambda body=body: fast_parser.parse(io.BytesIO(body))),
+            ):
+                stats = summarize(time_calls(fn, repeat=repeat))
+                self.stdout.write(f"  {label:<13} {stats}")
@@ -0,0 +1,151 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farm import metrics
+from farm.middleware import MetricsMiddleware
+from farm.models import Farm
+from farm_bench.benchmarking import bench_transaction, seed_farm_data, test_hosts
+
+MIDDLEWARE_PATH = "farm.middleware.MetricsMiddleware"
+
+
+def per_call_us(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+class Command(BaseCommand):
+    help = (
+        "Overhead of MetricsMiddleware: interleaved runs of API requests with "
+        "and without it, plus its fixed per-request and per-query cost "
+        "measured in isolation. Fails if the overhead exceeds --max-overhead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=10)
+        parser.add_argument("--requests", type=int, default=30)
+        parser.add_argument("--max-overhead", type=float, default=2.0)
+
+    def handle(self, *args, **opts):
+        if MIDDLEWARE_PATH not in settings.MIDDLEWARE or not settings.FARM_METRICS:
+            raise CommandError("MetricsMiddleware is not enabled (FARM_METRICS)")
+        fixed_us, query_us = self.isolated_costs()
+
+        with bench_transaction(), test_hosts():
+            users, _ = seed_farm_data(
+                users=1,
+                farms_per_user=5,
+                fields_per_farm=5,
+                animals_per_farm=20,
+                logs_per_farm=100,
+                prefix="bench-metrics",
+            )
+            farm = Farm.objects.filter(owner=users[0]).first()
+            urls = [
+                "/api/v1/farms/",
+                f"/api/v1/farms/{farm.pk}/",
+                "/api/v1/activities/",
+                "/api/v1/auth/me/",
+            ]
+            auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(users[0])}"}
+            rows = [self.compare(url, auth, opts) for url in urls]
+
+        self.stdout.write(
+            f"\nMetricsMiddleware alone: {fixed_us:.1f} us per request "
+            f"+ {query_us:.2f} us per query"
+        )
+        self.stdout.write(
+            f"{'':<28}{'without':>10}{'with':>10}{'measured':>10}{'estimate':>10}"
+        )
+        worst = 0.0
+        for url, off_ms, on_ms, queries in rows:
+            measured = (on_ms / off_ms - 1) * 100
+            estimate = (fixed_us + query_us * queries) / 1000 / off_ms * 100
+            worst = max(worst, estimate)
+            self.stdout.write(
+                f"{url:<28}{off_ms:8.2f}ms{on_ms:8.2f}ms"
+                f"{measured:+9.2f}%{estimate:9.2f}%"
+            )
+        self.stdout.write(
+            "(measured: medians of interleaved runs, noisy at this size; "
+            "estimate: isolated cost / request time)"
+        )
+        if worst > opts["max_overhead"]:
+            raise CommandError(
+                f"overhead {worst:.2f}% is over {opts['max_overhead']:.1f}%"
+            )
+
+    def compare(self, url, auth, opts):
+        on = Client(**auth)
+        off = Client(**auth)
+        without = [m for m in settings.MIDDLEWARE if m != MIDDLEWARE_PATH]
+        with override_settings(MIDDLEWARE=without):
+            off.handler.load_middleware()
+
+        samples = {True: [], False: []}
+        for round_ in range(opts["rounds"]):
+            # alternate which side goes first so drift hits both
+            for enabled in (True, False) if round_ % 2 else (False, True):
+                self.set_query_timer(enabled)
+                client = on if enabled else off
+                client.get(url)  # warm up
+                for _ in range(opts["requests"]):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    samples[enabled].append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{url}: {response.status_code}")
+        self.set_query_timer(True)
+
+        metrics.registry.clear()
+        on.get(url)
+        (series,) = metrics.registry.snapshot()[0].values()
+        queries = series["db_queries"].sum
+        self.stdout.write(f"{url}: {queries:.0f} queries")
+        return (
+            url,
+            statistics.median(samples[False]),
+            statistics.median(samples[True]),
+            queries,
+        )
+
+    def set_query_timer(self, enabled):
+        wrappers = connection.execute_wrappers
+        if enabled and metrics.time_query not in wrappers:
+            wrappers.insert(0, metrics.time_query)
+        elif not enabled and metrics.time_query in wrappers:
+            wrappers.remove(metrics.time_query)
+
+    def isolated_costs(self, repeat=20000):
+        request = RequestFactory().get("/api/v1/farms/")
+        request.resolver_match = resolve("/api/v1/farms/")
+        response = HttpResponse(b"x" * 2048)
+        inner = lambda request: response  # noqa: E731
+        middleware = MetricsMiddleware(inner)
+        fixed = per_call_us(lambda: middleware(request), repeat) - per_call_us(
+            lambda: inner(request), repeat
+        )
+
+        def execute(sql, params, many, context):
+            return None
+
+        stats, token = metrics.start_request()
+        try:
+            per_query = per_call_us(
+                lambda: metrics.time_query(execute, "", None, False, {}), repeat
+            ) - per_call_us(lambda: execute("", None, False, {}), repeat)
+        finally:
+            metrics.end_request(token)
+        metrics.registry.clear()
+        return fixed, per_query
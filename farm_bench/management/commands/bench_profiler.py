@@ -0,0 +1,113 @@
+import statistics
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farm import profiler
+from farm.middleware import ProfilerMiddleware
+from farm.models import Farm
+from farm_bench.benchmarking import bench_transaction, seed_farm_data, test_hosts
+
+
+def per_call_us(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+class Command(BaseCommand):
+    help = (
+        "Cost of the sampling profiler: ProfilerMiddleware per request while "
+        "disarmed (fails over --max-disarmed-us), and API request latency "
+        "with every request sampled vs none."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=6)
+        parser.add_argument("--requests", type=int, default=30)
+        parser.add_argument("--max-disarmed-us", type=float, default=2.0)
+
+    def handle(self, *args, **opts):
+        with override_settings(FARM_PROFILER=True, FARM_PROFILER_SAMPLE_RATE=0):
+            disarmed_us = self.disarmed_cost()
+            with bench_transaction(), test_hosts():
+                users, _ = seed_farm_data(
+                    users=1,
+                    farms_per_user=5,
+                    fields_per_farm=5,
+                    animals_per_farm=20,
+                    logs_per_farm=100,
+                    prefix="bench-profiler",
+                )
+                farm = Farm.objects.filter(owner=users[0]).first()
+                client = Client(
+                    HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(users[0])}"
+                )
+                urls = [
+                    "/api/v1/farms/",
+                    f"/api/v1/farms/{farm.pk}/",
+                    "/api/v1/activities/",
+                ]
+                rows = [self.compare(client, url, opts) for url in urls]
+
+        self.stdout.write(
+            f"\nProfilerMiddleware disarmed: {disarmed_us:.2f} us per request"
+        )
+        self.stdout.write(
+            f"sampling every {settings.FARM_PROFILER_INTERVAL_MS:g} ms "
+            f"while armed:\n{'':<28}{'disarmed':>10}{'armed':>10}{'overhead':>10}"
+        )
+        for url, off_ms, on_ms, samples in rows:
+            self.stdout.write(
+                f"{url:<28}{off_ms:8.2f}ms{on_ms:8.2f}ms"
+                f"{(on_ms / off_ms - 1) * 100:+9.1f}%  ({samples} samples)"
+            )
+        if disarmed_us > opts["max_disarmed_us"]:
+            raise CommandError(
+                f"disarmed cost {disarmed_us:.2f} us is over "
+                f"{opts['max_disarmed_us']:g} us"
+            )
+
+    def disarmed_cost(self, repeat=50000):
+        request = RequestFactory().get("/api/v1/farms/")
+        response = HttpResponse(b"x")
+        inner = lambda request: response  # noqa: E731
+        middleware = ProfilerMiddleware(inner)
+        middleware(request)  # first call polls the arm file
+        return per_call_us(lambda: middleware(request), repeat) - per_call_us(
+            lambda: inner(request), repeat
+        )
+
+    def compare(self, client, url, opts):
+        sampler = profiler.sampler
+        samples = {True: [], False: []}
+        sampled = 0
+        for round_ in range(opts["rounds"]):
+            # alternate which side goes first so drift hits both
+            for armed in (True, False) if round_ % 2 else (False, True):
+                client.get(url)  # warm up
+                for _ in range(opts["requests"]):
+                    stacks = Counter()
+                    started = time.perf_counter()
+                    if armed:
+                        sampler.start(stacks)
+                    response = client.get(url)
+                    if armed:
+                        sampler.stop(response.wsgi_request)
+                    samples[armed].append((time.perf_counter() - started) * 1000)
+                    sampled += sum(stacks.values())
+                if response.status_code != 200:
+                    raise CommandError(f"{url}: {response.status_code}")
+        return (
+            url,
+            statistics.median(samples[False]),
+            statistics.median(samples[True]),
+            sampled,
+        )
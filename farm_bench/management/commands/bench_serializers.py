@@ -0,0 +1,101 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from farm.fastpath import row_serializer_for
+from farm.models import ActivityLog, Animal, Crop, Farm, Field
+from farm.search import search_activity_logs
+from farm.serializers import (
+    ActivityLogSearchSerializer,
+    ActivityLogSerializer,
+    AnimalSerializer,
+    CropSerializer,
+    FarmSerializer,
+    FieldSerializer,
+)
+from farm_bench.benchmarking import (
+    api_client,
+    bench_transaction,
+    seed_farm_data,
+    summarize,
+    test_hosts,
+    time_calls,
+)
+
+CASES = {
+    "farms": (FarmSerializer, lambda u: Farm.objects.filter(owner=u)),
+    "fields": (FieldSerializer, lambda u: Field.objects.filter(owner=u)),
+    "crops": (CropSerializer, lambda u: Crop.objects.filter(owner=u)),
+    "animals": (AnimalSerializer, lambda u: Animal.objects.filter(owner=u)),
+    "activities": (
+        ActivityLogSerializer,
+        lambda u: ActivityLog.objects.filter(owner=u),
+    ),
+    "activities?q=": (
+        ActivityLogSearchSerializer,
+        lambda u: search_activity_logs(ActivityLog.objects.filter(owner=u), "aphids"),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Rows/s of the ModelSerializer list path vs the values() fast path "
+        "(farm/fastpath.py), with a byte-for-byte check of the JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500, help="Rows per page")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--users", type=int, default=2)
+        parser.add_argument("--logs-per-farm", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        rows, repeat = opts["rows"], opts["repeat"]
+        renderer = JSONRenderer()
+
+        with bench_transaction(), test_hosts():
+            users, counts = seed_farm_data(
+                users=opts["users"],
+                farms_per_user=max(1, rows // 100),
+                logs_per_farm=opts["logs_per_farm"],
+                prefix="bench-ser",
+            )
+            self.stdout.write(f"seeded {counts}")
+            user = users[0]
+
+            for name, (serializer_class, make_qs) in CASES.items():
+                fast = row_serializer_for(serializer_class)
+                if fast is None:
+                    raise CommandError(f"{serializer_class.__name__}: no fast path")
+
+                def model_path(make_qs=make_qs, serializer_class=serializer_class):
+                    page = list(make_qs(user)[:rows])
+                    return serializer_class(page, many=True).data
+
+                def fast_path(make_qs=make_qs, fast=fast):
+                    return fast.to_representation(fast.rows(make_qs(user)[:rows]))
+
+                expected = renderer.render(model_path())
+                if renderer.render(fast_path()) != expected:
+                    raise CommandError(f"{name}: fast path JSON differs")
+                n = len(model_path())
+
+                self.stdout.write(f"\n{name} ({n} rows, {len(expected)} bytes)")
+                for label, fn in (("serializer", model_path), ("fast path", fast_path)):
+                    stats = summarize(time_calls(fn, repeat=repeat))
+                    rate = n / (stats["mean_ms"] / 1000) if stats["mean_ms"] else 0
+                    self.stdout.write(f"  {label:<11} {rate:>10,.0f} rows/s  {stats}")
+
+            # whole request, default page size
+            client = api_client(user)
+            self.stdout.write("\nGET /api/v1/activities/ (end to end)")
+            for enabled in (False, True):
+                with override_settings(FARM_FAST_LIST=enabled):
+
+                    def call():
+                        resp = client.get("/api/v1/activities/")
+                        assert resp.status_code == 200, resp.status_code
+
+                    stats = summarize(time_calls(call, repeat=repeat))
+                    self.stdout.write(f"  FARM_FAST_LIST={enabled}: {stats}")
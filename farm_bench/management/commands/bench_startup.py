@@ -0,0 +1,112 @@
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+# what a fresh worker does before it can answer its first API request
+BOOT = """
+import time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver, resolve
+get_wsgi_application()
+resolve({url!r})
+if {eager!r}:
+    get_resolver().reverse_dict  # imports every URLconf, as before lazy_urls
+print(time.perf_counter() - started)
+"""
+
+# label -> (env overrides, load every URLconf up front)
+PROFILES = {
+    "eager urls": ({}, True),
+    "as configured": ({}, False),
+    "no api docs": ({"ENABLE_API_DOCS": "False"}, False),
+    "no docs, no google": (
+        {"ENABLE_API_DOCS": "False", "ENABLE_GOOGLE_LOGIN": "False"},
+        False,
+    ),
+}
+BUDGET_PROFILE = "as configured"
+
+
+def parse_importtime(stderr):
+    """Self import time (ms) per top-level package from `-X importtime`."""
+    totals = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    return totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker boot time (Django setup, middleware, URL resolution of --url) "
+        "in fresh interpreters: lazy vs eager URLconfs and with the optional "
+        "app stacks left out, plus an -X importtime breakdown per package. "
+        "--budget fails the command when the current settings boot slower."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/api/v1/farms/")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--top", type=int, default=12)
+        parser.add_argument(
+            "--budget",
+            type=float,
+            metavar="MS",
+            help=f'max median boot time of "{BUDGET_PROFILE}"',
+        )
+
+    def handle(self, *args, **opts):
+        results = {}
+        for label, (env, eager) in PROFILES.items():
+            script = BOOT.format(url=opts["url"], eager=eager)
+            boots = [
+                float(self.boot(script, env).stdout) * 1000
+                for _ in range(opts["repeat"])
+            ]
+            imports = parse_importtime(self.boot(script, env, "importtime").stderr)
+            results[label] = (statistics.median(boots), imports)
+            self.stdout.write(f"{label}: {statistics.median(boots):.0f} ms")
+
+        self.stdout.write(
+            f"\nboot to resolving {opts['url']} "
+            f"(median of {opts['repeat']} fresh processes)"
+        )
+        for label, (boot_ms, imports) in results.items():
+            self.stdout.write(
+                f"{label:<20} {boot_ms:7.0f} ms  "
+                f"imports {sum(imports.values()):7.0f} ms"
+            )
+
+        _, eager_imports = results["eager urls"]
+        self.stdout.write("\nimport time (ms) by top-level package")
+        self.stdout.write(" " * 22 + "".join(f"{label[:18]:>20}" for label in results))
+        for package, _ in eager_imports.most_common(opts["top"]):
+            self.stdout.write(
+                f"{package:<22}"
+                + "".join(
+                    f"{imports[package]:20.1f}" for _, imports in results.values()
+                )
+            )
+
+        boot_ms, _ = results[BUDGET_PROFILE]
+        if opts["budget"] is not None and boot_ms > opts["budget"]:
+            raise CommandError(
+                f"boot took {boot_ms:.0f} ms, over the {opts['budget']:.0f} ms budget"
+            )
+
+    def boot(self, script, env, *xoptions):
+        flags = [arg for option in xoptions for arg in ("-X", option)]
+        return subprocess.run(
+            [sys.executable, "-W", "ignore", *flags, "-c", script],
+            env={**os.environ, **env},
+            check=True,
+            capture_output=True,
+            text=True,
+        )
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import os
+import platform
+import subprocess
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from functools import partial
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farm.models import ActivityLog, Animal, Crop, Farm, Field
+from farm_bench.benchmarking import (
+    committed_tenant,
+    gunicorn_server,
+    http_load,
+    summarize,
+    test_hosts,
+    time_calls,
+)
+
+PREFIX = "bench-suite"
+QUIET = {"GUNICORN_ACCESSLOG": "", "GUNICORN_LOGLEVEL": "warning"}
+
+# (name, url); {farm} is the first of the user's farms
+ENDPOINTS = [
+    ("farm-list", "/api/v1/farms/"),
+    ("farm-detail", "/api/v1/farms/{farm}/"),
+    ("field-list", "/api/v1/fields/"),
+    ("crop-list", "/api/v1/crops/"),
+    ("crop-harvest-calendar", "/api/v1/crops/harvest-calendar/?days=60"),
+    ("animal-list", "/api/v1/animals/"),
+    ("animal-health-summary", "/api/v1/animals/health-summary/"),
+    ("activity-list", "/api/v1/activities/"),
+    ("activity-list-expanded", "/api/v1/activities/?expand=farm,field"),
+    ("activity-list-page-20", "/api/v1/activities/?page=20"),
+    ("activity-stats", "/api/v1/activities/stats/?bucket=week"),
+    ("auth-me", "/api/v1/auth/me/"),
+]
+
+# (phase, metric, higher is better) that --compare fails on; p99 is
+# reported but too noisy at these sample sizes to gate on
+GATED = [
+    ("client", "p50_ms", False),
+    ("client", "queries", False),
+    ("http", "rps", True),
+    ("http", "p50_ms", False),
+]
+REPORTED = GATED + [("client", "p99_ms", False), ("http", "p99_ms", False)]
+
+
+def git(*args):
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def dataset(user):
+    """Row counts of what `user` owns: the size every endpoint runs against."""
+    return {
+        "farms": Farm.objects.filter(owner=user).count(),
+        "fields": Field.objects.filter(owner=user).count(),
+        "crops": Crop.objects.filter(owner=user).count(),
+        "animals": Animal.objects.filter(owner=user).count(),
+        "activity_logs": ActivityLog.objects.filter(owner=user).count(),
+    }
+
+
+@contextmanager
+def existing_user(username):
+    """Like committed_tenant, for data that is already there: (user, counts)."""
+    User = get_user_model()
+    try:
+        user = User.objects.get(username=username)
+    except User.DoesNotExist:
+        raise CommandError(f"no user {username!r} (see seed_farm_data)") from None
+    yield user, dataset(user)
+
+
+def count_queries(fn):
+    """Queries `fn()` runs, on every database alias."""
+    with ExitStack() as stack:
+        captured = [
+            stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        ]
+        fn()
+    return sum(len(context) for context in captured)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main API endpoints, in process through the test client "
+        "(latency, queries per request) and over HTTP against the production "
+        "gunicorn profile (throughput, latency), and write the results as a "
+        "JSON baseline (bench-results/<commit>.json). --compare BASELINE "
+        "prints the changes from an earlier run and fails on regressions over "
+        "--tolerance: run both on the same machine, one after the other."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", help="run against this (seed_farm_data) user's data"
+        )
+        parser.add_argument(
+            "--logs-per-farm",
+            type=int,
+            default=500,
+            help="size of the dataset seeded when there is no --user",
+        )
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--no-http", action="store_true")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=5.0)
+        parser.add_argument("--cpus", type=int, default=1)
+        parser.add_argument("--only", nargs="+", metavar="ENDPOINT")
+        parser.add_argument("--output", type=Path)
+        parser.add_argument("--compare", type=Path, metavar="BASELINE")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=20.0,
+            help="percent; run-to-run noise on one shared core is 10-15%%",
+        )
+
+    def handle(self, *args, **opts):
+        endpoints = [
+            (name, url)
+            for name, url in ENDPOINTS
+            if not opts["only"] or name in opts["only"]
+        ]
+        if not endpoints:
+            raise CommandError(f"--only: pick from {[n for n, _ in ENDPOINTS]}")
+
+        if opts["user"]:
+            data = existing_user(opts["user"])
+        else:
+            data = committed_tenant(
+                PREFIX, farms_per_user=3, logs_per_farm=opts["logs_per_farm"]
+            )
+        with data as (user, _):
+            farm = Farm.objects.filter(owner=user).order_by("pk").first()
+            if farm is None:
+                raise CommandError(f"{user.username} has no farms")
+            urls = [(name, url.format(farm=farm.pk)) for name, url in endpoints]
+            headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+            results = {
+                "meta": self.meta(dataset(user), opts),
+                "endpoints": {name: {"url": url} for name, url in urls},
+            }
+            with test_hosts():
+                self.client_phase(urls, headers, results, opts)
+            if not opts["no_http"]:
+                self.http_phase(urls, headers, results, opts)
+        connection.close()
+
+        output = opts["output"] or self.default_output(results["meta"])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n")
+        self.report(results)
+        self.stdout.write(f"\nwritten to {output}")
+
+        if opts["compare"]:
+            self.compare(json.loads(opts["compare"].read_text()), results, opts)
+
+    def meta(self, counts, opts):
+        return {
+            "commit": git("rev-parse", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+            "created": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "cpus": opts["cpus"],
+            "cpus_available": len(os.sched_getaffinity(0)),
+            "dataset": counts,
+            "requests": opts["requests"],
+            "concurrency": opts["concurrency"],
+            "duration": opts["duration"],
+        }
+
+    def default_output(self, meta):
+        name = (meta["commit"] or "worktree")[:12] + ("-dirty" if meta["dirty"] else "")
+        return settings.BASE_DIR / "bench-results" / f"{name}.json"
+
+    def client_phase(self, urls, headers, results, opts):
+        client = Client(HTTP_AUTHORIZATION=headers["Authorization"])
+        for name, url in urls:
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{name} {url}: {response.status_code}")
+            get = partial(client.get, url)
+            queries = count_queries(get)
+            samples = time_calls(get, repeat=opts["requests"])
+            results["endpoints"][name]["client"] = {
+                **summarize(samples),
+                "queries": queries,
+            }
+            self.stdout.write(f"client {name}: {results['endpoints'][name]['client']}")
+
+    def http_phase(self, urls, headers, results, opts):
+        config = str(settings.BASE_DIR / "config" / "gunicorn.conf.py")
+        env = {**QUIET, "DJANGO_ALLOWED_HOSTS": "127.0.0.1"}
+        server = gunicorn_server("-c", config, env=env, cpus=opts["cpus"])
+        with server as (base_url, _):
+            for name, url in urls:
+                rps, samples, errors, _ = asyncio.run(
+                    http_load(
+                        base_url,
+                        url,
+                        opts["concurrency"],
+                        opts["duration"],
+                        headers=headers,
+                    )
+                )
+                results["endpoints"][name]["http"] = {
+                    "rps": round(rps, 1),
+                    **summarize(samples),
+                    "errors": errors,
+                }
+                self.stdout.write(f"http {name}: {results['endpoints'][name]['http']}")
+
+    def report(self, results):
+        meta = results["meta"]
+        self.stdout.write(
+            f"\n{meta['commit'] or 'no git'}{' (dirty)' if meta['dirty'] else ''}, "
+            f"{meta['cpus']} core(s), dataset {meta['dataset']}"
+        )
+        self.stdout.write(
+            f"{'':<26}{'queries':>8}{'p50':>9}{'p99':>9}"
+            f"{'http req/s':>12}{'p50':>9}{'p99':>9}"
+        )
+        for name, row in results["endpoints"].items():
+            client, http = row.get("client", {}), row.get("http")
+            line = (
+                f"{name:<26}{client['queries']:>8}"
+                f"{client['p50_ms']:>7.2f}ms{client['p99_ms']:>7.2f}ms"
+            )
+            if http:
+                line += (
+                    f"{http['rps']:>12.1f}{http['p50_ms']:>7.1f}ms"
+                    f"{http['p99_ms']:>7.1f}ms"
+                )
+            self.stdout.write(line)
+
+    def compare(self, baseline, results, opts):
+        old_meta, new_meta = baseline["meta"], results["meta"]
+        self.stdout.write(
+            f"\nvs {old_meta['commit'] or 'no git'} ({old_meta['created']})"
+        )
+        for key in ("dataset", "cpus", "concurrency", "requests"):
+            if old_meta.get(key) != new_meta.get(key):
+                self.stdout.write(
+                    f"  warning: {key} differs ({old_meta.get(key)} -> "
+                    f"{new_meta.get(key)}), not like for like"
+                )
+
+        regressions = []
+        for name, row in results["endpoints"].items():
+            old_row = baseline["endpoints"].get(name)
+            if old_row is None:
+                continue
+            changes = []
+            for phase, metric, higher_is_better in REPORTED:
+                old = old_row.get(phase, {}).get(metric)
+                new = row.get(phase, {}).get(metric)
+                if old is None or new is None:
+                    continue
+                change = (new / old - 1) * 100 if old else 0.0
+                changes.append(f"{phase} {metric} {old:g}->{new:g} ({change:+.1f}%)")
+                worse = -change if higher_is_better else change
+                if (phase, metric, higher_is_better) not in GATED:
+                    continue
+                if metric == "queries" and new > old:
+                    regressions.append(f"{name}: {old} -> {new} queries")
+                elif metric != "queries" and worse > opts["tolerance"]:
+                    regressions.append(f"{name}: {phase} {metric} {change:+.1f}%")
+            self.stdout.write(f"{name:<26}" + "; ".join(changes))
+
+        if regressions:
+            raise CommandError(
+                f"regressions over {opts['tolerance']:g}%:\n  "
+                + "\n  ".join(regressions)
+            )
+        self.stdout.write(f"no regressions over {opts['tolerance']:g}%")
@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from farm import tenancy
+from farm.models import ActivityLog, Animal, Crop, Farm, Field
+from farm_bench.benchmarking import (
+    api_client,
+    bench_transaction,
+    seed_farm_data,
+    summarize,
+    test_hosts,
+    time_calls,
+)
+
+LIST_ENDPOINTS = {
+    Farm: "/api/v1/farms/",
+    Field: "/api/v1/fields/",
+    Crop: "/api/v1/crops/",
+    Animal: "/api/v1/animals/",
+    ActivityLog: "/api/v1/activities/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare owner_id filtering with Postgres row-level security: "
+        "list latency and query plans for the same synthetic dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--farms-per-user", type=int, default=3)
+        parser.add_argument("--logs-per-farm", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument(
+            "--no-plans", action="store_true", help="Skip EXPLAIN ANALYZE output"
+        )
+
+    def handle(self, *args, **opts):
+        # everything, including CREATE ROLE / policies, is rolled back
+        with bench_transaction(), test_hosts():
+            users, counts = seed_farm_data(
+                users=opts["users"],
+                farms_per_user=opts["farms_per_user"],
+                logs_per_farm=opts["logs_per_farm"],
+                prefix="bench-rls",
+            )
+            self.stdout.write(f"seeded {counts}")
+            user = users[0]
+
+            with override_settings(FARM_RLS_ENABLED=False):
+                owner_filter = self.measure(user, opts)
+                plans = {
+                    m: self.plan(m.objects.filter(owner=user)) for m in LIST_ENDPOINTS
+                }
+
+            with connection.cursor() as cursor:
+                # flush deferred FK checks from the seed, or ALTER TABLE refuses
+                cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+                for sql in tenancy.enable_statements(tenancy.rls_role()):
+                    cursor.execute(sql)
+            with override_settings(FARM_RLS_ENABLED=True):
+                tenancy._verified = False
+                rls = self.measure(user, opts)
+                tenancy.enter_tenant_role()
+                tenancy.set_current_user(user)
+                rls_plans = {m: self.plan(m.objects.all()) for m in LIST_ENDPOINTS}
+                tenancy.leave_tenant_role()
+
+        for model, url in LIST_ENDPOINTS.items():
+            self.stdout.write(f"\n{url}")
+            self.stdout.write(f"  owner_id filter: {owner_filter[url]}")
+            self.stdout.write(f"  rls:             {rls[url]}")
+            if not opts["no_plans"]:
+                self.stdout.write("  -- owner_id filter plan --")
+                self.stdout.write(plans[model])
+                self.stdout.write("  -- rls plan --")
+                self.stdout.write(rls_plans[model])
+
+    def measure(self, user, opts):
+        client = api_client(user)
+        results = {}
+        for url in LIST_ENDPOINTS.values():
+
+            def call(url=url):
+                resp = client.get(url)
+                assert resp.status_code == 200, (url, resp.status_code)
+
+            results[url] = summarize(time_calls(call, repeat=opts["repeat"]))
+        return results
+
+    def plan(self, queryset):
+        # what a list page runs: ordered, LIMIT page size
+        return queryset[:10].explain(analyze=True)
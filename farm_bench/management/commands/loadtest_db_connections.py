@@ -0,0 +1,109 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farm_bench.benchmarking import (
+    committed_tenant,
+    gunicorn_server,
+    http_load,
+    summarize,
+)
+
+PREFIX = "loadtest-db"
+
+# env overrides per mode, on top of the current environment
+MODES = {
+    "per-request": {"DB_POOL": "none", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "none", "DB_CONN_MAX_AGE": "600"},
+    "psycopg-pool": {"DB_POOL": "psycopg"},
+    "pgbouncer": {"DB_POOL": "pgbouncer"},
+}
+
+
+def backend_count():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            )
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()  # runs on a pool thread: don't count itself next time
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests/s and latency of an API endpoint served by gunicorn under "
+        "each DB connection mode (DB_POOL / DB_CONN_MAX_AGE). Seeds a small "
+        "committed dataset and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modes", nargs="+", choices=MODES, default=list(MODES)[:3]
+        )
+        parser.add_argument(
+            "--pgbouncer",
+            metavar="HOST:PORT",
+            help="PgBouncer (transaction mode) in front of the same database; "
+            "adds the pgbouncer mode",
+        )
+        parser.add_argument("--url", default="/api/v1/farms/")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=10.0)
+
+    def handle(self, *args, **opts):
+        modes = list(opts["modes"])
+        if opts["pgbouncer"] and "pgbouncer" not in modes:
+            modes.append("pgbouncer")
+        if "pgbouncer" in modes and not opts["pgbouncer"]:
+            raise CommandError("the pgbouncer mode needs --pgbouncer HOST:PORT")
+
+        seed = committed_tenant(PREFIX, fields_per_farm=5, logs_per_farm=20)
+        with seed as (user, counts):
+            self.stdout.write(f"seeded {counts}")
+            headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+            results = {mode: self.run_mode(mode, headers, opts) for mode in modes}
+        connection.close()
+
+        self.stdout.write(
+            f"\n{opts['url']}  gunicorn {opts['workers']}x{opts['threads']} "
+            f"threads, {opts['concurrency']} clients, {opts['duration']:.0f}s"
+        )
+        for mode, (rps, stats, errors, backends) in results.items():
+            self.stdout.write(
+                f"{mode:<14} {rps:8.1f} req/s  p50 {stats['p50_ms']:7.2f} ms  "
+                f"p99 {stats['p99_ms']:7.2f} ms  errors {errors}  "
+                f"peak backends {backends}"
+            )
+
+    def run_mode(self, mode, headers, opts):
+        env = {**MODES[mode], "DJANGO_ALLOWED_HOSTS": "127.0.0.1"}
+        if mode == "pgbouncer":
+            host, _, port = opts["pgbouncer"].rpartition(":")
+            env.update(DB_HOST=host, DB_PORT=port)
+        with gunicorn_server(
+            "config.wsgi:application",
+            f"--workers={opts['workers']}",
+            "--worker-class=gthread",
+            f"--threads={opts['threads']}",
+            "--log-level=warning",
+            env=env,
+        ) as (base_url, _):
+            rps, samples, errors, backends = asyncio.run(
+                http_load(
+                    base_url,
+                    opts["url"],
+                    opts["concurrency"],
+                    opts["duration"],
+                    headers=headers,
+                    probe=backend_count,
+                )
+            )
+        self.stdout.write(f"{mode}: {rps:.1f} req/s")
+        return rps, summarize(samples), errors, max(backends, default=0)
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import httpx
+from allauth.socialaccount.models import SocialApp
+from asgiref.sync import async_to_sync
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from farm_bench.benchmarking import FakeHTTPServer, summarize, test_hosts
+
+TOKEN_PATH = "/token"
+EXCHANGE_URL = "/auth/google/exchange/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test /auth/google/exchange/ against a local mock token endpoint "
+        "with a fixed upstream delay: the ASGI app at rising concurrency vs one "
+        "sync (WSGI) worker thread."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delay", type=float, default=0.5, help="Upstream latency (s)"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 10, 50, 100]
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=3, help="Requests per client slot"
+        )
+        parser.add_argument(
+            "--sync-requests",
+            type=int,
+            default=5,
+            help="Requests for the sync baseline (0 to skip)",
+        )
+
+    def handle(self, *args, **opts):
+        routes = {TOKEN_PATH: (200, {"access_token": "fake", "expires_in": 3599})}
+        app, created = SocialApp.objects.get_or_create(
+            provider="google",
+            defaults={"name": "Google (loadtest)", "client_id": "x", "secret": "y"},
+        )
+        try:
+            with FakeHTTPServer(routes, delay=opts["delay"]) as upstream, test_hosts():
+                with override_settings(
+                    GOOGLE_OAUTH_TOKEN_URL=upstream.base_url + TOKEN_PATH
+                ):
+                    self.run_sync_baseline(opts)
+                    for concurrency in opts["concurrency"]:
+                        async_to_sync(self.run_asgi)(concurrency, opts)
+                self.stdout.write(
+                    f"\nupstream saw {upstream.requests} requests over "
+                    f"{upstream.connections} connections"
+                )
+        finally:
+            if created:
+                app.delete()
+
+    def report(self, label, n, elapsed, samples):
+        self.stdout.write(
+            f"{label:<28} {n:>5} req in {elapsed:6.2f}s = {n / elapsed:8.1f} req/s  "
+            f"{summarize(samples)}"
+        )
+
+    def run_sync_baseline(self, opts):
+        n = opts["sync_requests"]
+        if not n:
+            return
+        client = Client()
+        samples = []
+        started = time.perf_counter()
+        for _ in range(n):
+            t0 = time.perf_counter()
+            resp = client.post(
+                EXCHANGE_URL, {"code": "c"}, content_type="application/json"
+            )
+            assert resp.status_code == 200, resp.content
+            samples.append((time.perf_counter() - t0) * 1000)
+        self.report("wsgi, 1 sync thread", n, time.perf_counter() - started, samples)
+
+    async def run_asgi(self, concurrency, opts):
+        transport = httpx.ASGITransport(app=get_asgi_application())
+        samples = []
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://localhost", timeout=None
+        ) as client:
+
+            async def worker():
+                for _ in range(opts["rounds"]):
+                    t0 = time.perf_counter()
+                    resp = await client.post(EXCHANGE_URL, json={"code": "c"})
+                    assert resp.status_code == 200, resp.text
+                    samples.append((time.perf_counter() - t0) * 1000)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        self.report(f"asgi, concurrency {concurrency}", len(samples), elapsed, samples)
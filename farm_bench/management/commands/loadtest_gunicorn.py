@@ -0,0 +1,107 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farm_bench.benchmarking import (
+    committed_tenant,
+    gunicorn_server,
+    http_load,
+    summarize,
+)
+
+PREFIX = "loadtest-gunicorn"
+QUIET = {"GUNICORN_ACCESSLOG": "", "GUNICORN_LOGLEVEL": "warning"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput of the production gunicorn profile (config/gunicorn.conf.py) "
+        "pinned to 1, 2, 4, ... cores, next to the old single sync worker; "
+        "plus time from process start to the first response."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cpus", type=int, nargs="+", default=[1, 2, 4, 8])
+        parser.add_argument(
+            "--worker-class",
+            nargs="+",
+            choices=["gthread", "uvicorn"],
+            default=["gthread"],
+        )
+        parser.add_argument("--url", default="/api/v1/farms/")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=10.0)
+
+    def handle(self, *args, **opts):
+        available = len(os.sched_getaffinity(0))
+        cpus = [n for n in opts["cpus"] if n <= available]
+        if len(cpus) < len(opts["cpus"]):
+            self.stdout.write(f"only {available} core(s) here: running {cpus}")
+        config = str(settings.BASE_DIR / "config" / "gunicorn.conf.py")
+
+        old_startup = self.old_startup_steps()
+        rows = []
+        seed = committed_tenant(PREFIX, fields_per_farm=5, logs_per_farm=20)
+        with seed as (user, counts):
+            self.stdout.write(f"seeded {counts}")
+            headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+            legacy = ("config.wsgi:application", "--log-level=warning")
+            rows.append(("old CMD: 1 sync worker", 1, legacy, {}))
+            for kind in opts["worker_class"]:
+                for n in cpus:
+                    env = {**QUIET, "GUNICORN_WORKER_CLASS": kind}
+                    rows.append((f"profile: {kind}", n, ("-c", config), env))
+            results = [
+                (label, n, self.run(args, env, n, headers, opts))
+                for label, n, args, env in rows
+            ]
+        connection.close()
+
+        self.stdout.write(
+            f"\n{opts['url']}  {opts['concurrency']} clients, "
+            f"{opts['duration']:.0f}s per run"
+        )
+        self.stdout.write(
+            "old CMD also ran collectstatic + migrate before gunicorn: "
+            f"+{old_startup:.2f}s per container start"
+        )
+        for label, n, (rps, stats, errors, startup) in results:
+            self.stdout.write(
+                f"{label:<24} {n:>2} core(s) {rps:8.1f} req/s  "
+                f"p99 {stats['p99_ms']:8.2f} ms  errors {errors}  "
+                f"first response after {startup:5.2f}s"
+            )
+
+    def run(self, args, env, cpus, headers, opts):
+        env = {**env, "DJANGO_ALLOWED_HOSTS": "127.0.0.1"}
+        with gunicorn_server(*args, env=env, cpus=cpus) as (base_url, startup):
+            rps, samples, errors, _ = asyncio.run(
+                http_load(
+                    base_url,
+                    opts["url"],
+                    opts["concurrency"],
+                    opts["duration"],
+                    headers=headers,
+                )
+            )
+        return rps, summarize(samples), errors, startup
+
+    def old_startup_steps(self):
+        """What the old CMD ran before gunicorn (migrate only checked here)."""
+        manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+        with tempfile.TemporaryDirectory() as static_root:
+            env = {**os.environ, "DJANGO_STATIC_ROOT": static_root}
+            started = time.perf_counter()
+            for step in (["collectstatic", "--noinput"], ["migrate", "--check"]):
+                subprocess.run(
+                    [*manage, *step], env=env, check=True, capture_output=True
+                )
+            return time.perf_counter() - started
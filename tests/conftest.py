@@ -0,0 +1,150 @@
+import datetime
+import weakref
+
+import httpx
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farm import http_client
+from farm.models import ActivityLog, Animal, Crop, Farm, Field
+
+User = get_user_model()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "postgres: needs Postgres features beyond the ORM (row-level security, "
+        "full-text search, pg_trgm); "
+        "skipped where the test database can't provide them",
+    )
+
+
+@pytest.fixture(autouse=True)
+def _local_caches(settings):
+    # in memory and empty: nothing shared with other runs through the
+    # on-disk "oauth" / "shared" caches
+    settings.CACHES = {
+        alias: {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"tests-{alias}",
+        }
+        for alias in settings.CACHES
+    }
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _no_background_purge(settings):
+    # purges run in the test's transaction, through purge_farm()
+    settings.FARM_PURGE_IN_PROCESS = False
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user("alice")
+
+
+@pytest.fixture
+def other_user(db):
+    return User.objects.create_user("bob")
+
+
+@pytest.fixture
+def client_for(db):
+    """client_for(user): an APIClient sending `user`'s JWT, like real clients."""
+
+    def client_for(user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    return client_for
+
+
+@pytest.fixture
+def api_client(client_for, user):
+    return client_for(user)
+
+
+@pytest.fixture
+def make_farm(db):
+    """make_farm(owner, name, ...): a farm with a bit of everything under it."""
+    return _make_farm
+
+
+def _make_farm(owner, name="North", fields=1, crops=1, animals=1, logs=1):
+    """A farm with `fields` fields of `crops` crops, `animals` and `logs`."""
+    today = datetime.date.today()
+    farm = Farm.objects.create(owner=owner, name=name, location="Valley")
+    for i in range(fields):
+        field = Field.objects.create(farm=farm, name=f"{name} field {i}", area=5)
+        for j in range(crops):
+            Crop.objects.create(
+                field=field,
+                name=f"Wheat {i}.{j}",
+                plant_date=today - datetime.timedelta(days=30),
+                expected_harvest_date=today + datetime.timedelta(days=3),
+                status="growing",
+            )
+    for i in range(animals):
+        Animal.objects.create(farm=farm, species="cow", tag_id=f"{name}-{i}")
+    for i in range(logs):
+        ActivityLog.objects.create(
+            farm=farm,
+            field=farm.fields.first(),
+            animal=farm.animals.first(),
+            date=today,
+            activity_type="watering",
+            description=f"watered {i}",
+        )
+    return farm
+
+
+@pytest.fixture
+def farm(make_farm, user):
+    return make_farm(user)
+
+
+@pytest.fixture
+def mock_upstream(monkeypatch, settings):
+    """
+    mock_upstream(handler): outbound HTTP through farm.http_client is
+    answered by `handler` (httpx.MockTransport), retries without backoff.
+    """
+    settings.OUTBOUND_HTTP_RETRY_BACKOFF = 0
+
+    def mock_upstream(handler):
+        transport = httpx.MockTransport(handler)
+        monkeypatch.setattr(
+            http_client, "_client_options", lambda: {"transport": transport}
+        )
+        monkeypatch.setattr(http_client, "_sync_client", None)
+        monkeypatch.setattr(http_client, "_clients", weakref.WeakKeyDictionary())
+
+    return mock_upstream
+
+
+class Clock:
+    """Stand-in for the `time` module of the code under test."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """A Clock; monkeypatch it over the module's `time` to move time by hand."""
+    return Clock()
@@ -0,0 +1,63 @@
+"""The ActivityDailyStat rollup kept in step with ActivityLog (farm.stats)."""
+
+import datetime
+
+from django.db.models import Sum
+
+from farm.models import ActivityDailyStat, ActivityLog, Farm
+from farm.stats import rebuild_activity_stats
+
+
+def counted(**filters):
+    return ActivityDailyStat.objects.filter(**filters).aggregate(n=Sum("count"))["n"]
+
+
+def test_log_delete_decrements(farm):
+    assert counted(farm=farm) == 1
+    ActivityLog.objects.get(farm=farm).delete()
+    assert counted(farm=farm) == 0
+
+
+def test_owner_delete_cascades(user, make_farm):
+    make_farm(user, logs=3)
+    user.delete()  # no stat rows re-created for the farm being deleted
+    assert not Farm.objects.exists()
+    assert not ActivityDailyStat.objects.exists()
+
+
+def test_field_delete_moves_counts_to_no_field(user, make_farm):
+    farm = make_farm(user, fields=2, logs=0)
+    first, second = farm.fields.order_by("pk")
+    today = datetime.date.today()
+    for field in (first, first, second, None):
+        ActivityLog.objects.create(
+            farm=farm, field=field, date=today, activity_type="watering"
+        )
+
+    first_id = first.pk
+    first.delete()
+
+    assert counted(field_id=first_id) is None
+    assert counted(farm=farm, field__isnull=True) == 3  # merged with the NULL row
+    assert counted(field=second) == 1
+    rebuilt = list(ActivityDailyStat.objects.values_list("field_id", "count"))
+    rebuild_activity_stats()
+    assert sorted(rebuilt, key=str) == sorted(
+        ActivityDailyStat.objects.values_list("field_id", "count"), key=str
+    )
+
+
+def test_animal_delete_moves_counts_to_no_animal(farm):
+    animal = farm.animals.get()
+    animal_id = animal.pk
+    animal.delete()
+    assert counted(animal_id=animal_id) is None
+    assert counted(farm=farm, animal__isnull=True) == 1
+
+
+def test_stats_endpoint_is_scoped_to_the_user(client_for, user, other_user, make_farm):
+    make_farm(user, logs=2)
+    make_farm(other_user, name="South", logs=5)
+    response = client_for(user).get("/api/v1/activities/stats/")
+    assert response.status_code == 200
+    assert [row["count"] for row in response.json()["results"]] == [2]
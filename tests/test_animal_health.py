@@ -0,0 +1,111 @@
+"""POST /animals/health/ and GET /animals/health-summary/ (farm.health)."""
+
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from farm.health import cached_health_summary
+from farm.models import ActivityDailyStat, ActivityLog, Animal
+
+URL = "/api/v1/animals/health/"
+
+
+@pytest.fixture
+def herd(make_farm, user):
+    """Two farms: North with cows N-0..N-2 (N-0 sick), South with sheep S-0."""
+    north = make_farm(user, name="North", animals=0, logs=0)
+    south = make_farm(user, name="South", animals=0, logs=0)
+    for i in range(3):
+        Animal.objects.create(
+            farm=north,
+            species="cow",
+            tag_id=f"N-{i}",
+            health_status="sick" if i == 0 else "good",
+        )
+    Animal.objects.create(farm=south, species="sheep", tag_id="S-0")
+    return north, south
+
+
+def test_counts_and_missing_tags(api_client, herd):
+    north, _ = herd
+    response = api_client.post(
+        URL,
+        {"health_status": "sick", "tag_ids": ["N-0", "N-1", "nope", "N-1"]},
+        format="json",
+    )
+    assert response.status_code == 200, response.content
+    data = response.json()
+    assert data["selected"] == 2
+    assert data["changed"] == 1  # N-0 was sick already
+    assert data["logged"] == 2  # ... but gets its vet_check all the same
+    assert data["missing"] == ["nope"]
+    assert data["farms"] == [
+        {"farm": north.pk, "good": 1, "sick": 2, "critical": 0, "total": 3}
+    ]
+    assert Animal.objects.get(tag_id="N-1").health_status == "sick"
+
+
+def test_vet_check_logs_and_rollup(api_client, user, herd):
+    north, _ = herd
+    day = datetime.date(2026, 3, 2)
+    api_client.post(
+        URL,
+        {
+            "health_status": "critical",
+            "farm": north.pk,
+            "current_status": "good",
+            "date": day,
+            "note": "fever",
+        },
+        format="json",
+    )
+
+    logs = ActivityLog.objects.filter(activity_type="vet_check").order_by(
+        "animal__tag_id"
+    )
+    assert [log.animal.tag_id for log in logs] == ["N-1", "N-2"]
+    assert {log.date for log in logs} == {day}
+    assert {log.owner_id for log in logs} == {user.pk}
+    assert logs[0].description == "Health status: good -> critical\nfever"
+    stats = ActivityDailyStat.objects.filter(
+        farm=north, date=day, activity_type="vet_check"
+    )
+    assert sorted(stats.values_list("animal__tag_id", "count")) == [
+        ("N-1", 1),
+        ("N-2", 1),
+    ]
+
+
+def test_summary_is_refreshed(api_client, user, herd):
+    north, south = herd
+    cached_health_summary(user.pk)  # cached before the change
+    api_client.post(URL, {"health_status": "sick", "species": "SHEEP"}, format="json")
+
+    response = api_client.get("/api/v1/animals/health-summary/")
+    assert response.json()["results"] == [
+        {"farm": north.pk, "good": 2, "sick": 1, "critical": 0, "total": 3},
+        {"farm": south.pk, "good": 0, "sick": 1, "critical": 0, "total": 1},
+    ]
+
+
+def test_other_users_animals_are_untouched(client_for, other_user, herd):
+    response = client_for(other_user).post(
+        URL, {"health_status": "critical", "tag_ids": ["N-1"]}, format="json"
+    )
+    assert response.json()["selected"] == 0
+    assert response.json()["missing"] == ["N-1"]
+    assert Animal.objects.get(tag_id="N-1").health_status == "good"
+
+
+def test_needs_a_selection(api_client, herd):
+    response = api_client.post(URL, {"health_status": "sick"}, format="json")
+    assert response.status_code == 400
+
+
+def test_locks_only_the_animals(api_client, herd):
+    with CaptureQueriesContext(connection) as queries:
+        api_client.post(URL, {"health_status": "sick", "species": "cow"}, format="json")
+    [locking] = [q["sql"] for q in queries if "FOR UPDATE" in q["sql"]]
+    assert 'FOR UPDATE OF "farm_animal"' in locking
@@ -0,0 +1,187 @@
+"""POST /animals/import/ (farm.imports)."""
+
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from farm import imports
+from farm.imports import import_animals
+from farm.models import Animal
+
+URL = "/api/v1/animals/import/"
+
+
+@pytest.fixture
+def farms(make_farm, user, other_user):
+    """(the user's farm, another user's farm holding tag T-OTHER)."""
+    mine = make_farm(user, animals=0, logs=0)
+    theirs = make_farm(other_user, name="South", animals=0, logs=0)
+    Animal.objects.create(farm=theirs, species="goat", tag_id="T-OTHER")
+    return mine, theirs
+
+
+def upload(client, name, body, content_type="application/octet-stream", **params):
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    return client.post(
+        f"{URL}?{query}",
+        {"file": SimpleUploadedFile(name, body, content_type=content_type)},
+        format="multipart",
+    )
+
+
+def tags(user):
+    return dict(Animal.objects.filter(owner=user).values_list("tag_id", "species"))
+
+
+def test_csv(api_client, user, farms):
+    mine, _ = farms
+    body = (
+        "tag_id,species,birth_date,health_status,farm,extra\n"
+        f"T-1,cow,2024-01-02,sick,{mine.pk},x\n"
+        "T-2,sheep,,,,\n"  # empty cells: defaults, ?farm=
+    ).encode()
+    response = upload(api_client, "herd.csv", body, farm=mine.pk)
+    assert response.status_code == 200, response.content
+    assert response.json()["created"] == 2
+    t1 = Animal.objects.get(tag_id="T-1")
+    assert (str(t1.birth_date), t1.health_status, t1.owner_id) == (
+        "2024-01-02",
+        "sick",
+        user.pk,
+    )
+    assert Animal.objects.get(tag_id="T-2").health_status == "good"
+
+
+def test_json_lines_and_arrays(api_client, user, farms):
+    mine, _ = farms
+    rows = [{"tag_id": f"T-{i}", "species": "cow", "farm": mine.pk} for i in range(3)]
+    jsonl = "\n".join(json.dumps(row) for row in rows[:2]) + "\n\n"
+    response = upload(api_client, "herd.jsonl", jsonl.encode())
+    assert response.json()["created"] == 2
+
+    response = upload(
+        api_client, "herd", json.dumps(rows).encode(), content_type="application/json"
+    )
+    assert response.json()["created"] == 1  # T-0, T-1 exist already
+    assert response.json()["conflicted"] == 2
+
+    body = [{"tag_id": "T-9", "species": "pig", "farm": mine.pk}]
+    response = api_client.post(URL, body, format="json")
+    assert response.json()["created"] == 1
+    assert set(tags(user)) == {"T-0", "T-1", "T-2", "T-9"}
+
+
+def test_large_json_arrays_are_refused(api_client, farms, settings):
+    settings.FARM_IMPORT_JSON_MAX_BYTES = 100
+    mine, _ = farms
+    rows = [{"tag_id": f"T-{i}", "species": "cow", "farm": mine.pk} for i in range(5)]
+    response = upload(api_client, "herd.json", json.dumps(rows).encode())
+    assert response.status_code == 400
+    assert "JSON Lines" in response.json()["detail"]
+    assert not Animal.objects.filter(tag_id="T-0").exists()
+
+
+@pytest.mark.parametrize(
+    "name, body",
+    [
+        ("herd.txt", b"tag_id\nT-1\n"),
+        ("herd.json", b"[{"),
+        ("herd.json", b'{"tag_id": "T-1"}'),
+        ("herd.jsonl", b'{"tag_id": "T-1", "species": "cow"}\n{oops\n'),
+        ("herd.csv", b"tag_id,species\n\xff\xfe,cow\n"),
+    ],
+)
+def test_unreadable_uploads(api_client, farms, name, body):
+    mine, _ = farms
+    response = upload(api_client, name, body, farm=mine.pk)
+    assert response.status_code == 400
+    assert not Animal.objects.filter(tag_id="T-1").exists()
+
+
+def test_needs_a_file_or_array(api_client, farms):
+    response = api_client.post(URL, {"tag_id": "T-1"}, format="json")
+    assert response.status_code == 400
+    assert "file" in response.json()
+
+
+def test_skip_and_update(api_client, user, farms):
+    mine, _ = farms
+    Animal.objects.create(farm=mine, species="cow", tag_id="T-1")
+    rows = [
+        {"tag_id": "T-1", "species": "bull", "farm": mine.pk, "health_status": "sick"},
+        {"tag_id": "T-2", "species": "cow", "farm": mine.pk},
+    ]
+
+    data = api_client.post(URL, rows, format="json").json()
+    assert (data["created"], data["updated"], data["conflicted"]) == (1, 0, 1)
+    assert data["conflicts"] == [{"row": 1, "tag_id": "T-1", "reason": "exists"}]
+    assert tags(user)["T-1"] == "cow"
+
+    data = api_client.post(f"{URL}?on_conflict=update", rows, format="json").json()
+    assert (data["created"], data["updated"], data["conflicted"]) == (0, 2, 0)
+    t1 = Animal.objects.get(tag_id="T-1")
+    assert (t1.species, t1.health_status) == ("bull", "sick")
+
+
+def test_taken_and_duplicate_tags(api_client, user, farms):
+    mine, _ = farms
+    rows = [
+        {"tag_id": "T-OTHER", "species": "cow", "farm": mine.pk},
+        {"tag_id": "T-1", "species": "cow", "farm": mine.pk},
+        {"tag_id": "T-1", "species": "pig", "farm": mine.pk},
+    ]
+    data = api_client.post(f"{URL}?on_conflict=update", rows, format="json").json()
+    assert data["created"] == 1
+    assert data["conflicts"] == [
+        {"row": 1, "tag_id": "T-OTHER", "reason": "taken"},
+        {"row": 3, "tag_id": "T-1", "reason": "duplicate"},
+    ]
+    # the other account's animal is untouched, the first T-1 wins
+    assert Animal.objects.get(tag_id="T-OTHER").species == "goat"
+    assert tags(user) == {"T-1": "cow"}
+
+
+def test_foreign_and_deleting_farms(api_client, user, make_farm, farms):
+    mine, theirs = farms
+    going = make_farm(user, name="Going", animals=0, logs=0)
+    going.deleting_since = timezone.now()
+    going.save()
+    rows = [
+        {"tag_id": "T-1", "species": "cow", "farm": theirs.pk},
+        {"tag_id": "T-2", "species": "cow", "farm": going.pk},
+        {"tag_id": "T-3", "species": "cow"},  # no ?farm= either
+        {"tag_id": "T-4"},
+        {"tag_id": "T-5", "species": "cow", "farm": mine.pk},
+    ]
+    data = api_client.post(URL, rows, format="json").json()
+    assert (data["created"], data["invalid"]) == (1, 4)
+    assert [(error["row"], list(error["errors"])) for error in data["errors"]] == [
+        (1, ["farm"]),
+        (2, ["farm"]),
+        (3, ["farm"]),
+        (4, ["species"]),
+    ]
+    assert set(tags(user)) == {"T-5"}
+
+    for farm in (theirs, going):
+        response = api_client.post(f"{URL}?farm={farm.pk}", rows[3:], format="json")
+        assert response.status_code == 400
+        assert "farm" in response.json()
+
+
+def test_batches_and_report_limits(user, farms, monkeypatch):
+    mine, _ = farms
+    monkeypatch.setattr(imports, "MAX_REPORTED", 2)
+    Animal.objects.create(farm=mine, species="cow", tag_id="T-0")
+    rows = [{"tag_id": f"T-{i}", "species": "cow"} for i in range(7)]
+    rows += [{"tag_id": "T-1"}] * 3  # invalid: no species
+
+    result = import_animals(user, rows, farm=mine.pk, batch_size=2)
+
+    assert (result.created, result.conflicted, result.invalid) == (6, 1, 3)
+    assert len(Animal.objects.filter(owner=user)) == 7
+    report = result.as_dict()
+    assert len(report["errors"]) == 2
+    assert report["truncated"]
@@ -0,0 +1,183 @@
+"""CompressionMiddleware and farm.compression."""
+
+import asyncio
+import gzip
+import json
+import os
+
+import brotli
+import pytest
+import zstandard
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from farm.compression import negotiate
+from farm.middleware import CompressionMiddleware
+
+ALL = ["zstd", "br", "gzip"]
+BODY = {"results": [{"id": i, "name": f"Farm {i}"} for i in range(100)]}
+
+DECODE = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, br, zstd", "zstd"),  # ties go to the server's order
+        ("gzip, br", "br"),
+        ("gzip", "gzip"),
+        ("zstd;q=0.5, gzip", "gzip"),  # the client's q wins
+        ("zstd;q=0, br;q=0, gzip", "gzip"),
+        ("GZIP;Q=1", "gzip"),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "br"),
+        ("gzip;q=0", None),
+        ("gzip;q=nope", None),
+        ("identity", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_negotiate(header, expected):
+    assert negotiate(header, ALL) == expected
+
+
+def test_negotiate_server_order():
+    assert negotiate("gzip, zstd", ["gzip", "zstd"]) == "gzip"
+    assert negotiate("zstd", ["gzip"]) is None
+
+
+@pytest.fixture
+def middleware(settings):
+    """middleware(response) -> CompressionMiddleware returning `response`."""
+    settings.FARM_COMPRESSION_MIN_SIZE = 1024
+
+    def build(response):
+        return CompressionMiddleware(lambda request: response)
+
+    return build
+
+
+def get(path="/api/v1/farms/", accept="zstd, br, gzip"):
+    return RequestFactory().get(path, headers={"Accept-Encoding": accept})
+
+
+@pytest.mark.parametrize("encoding", ALL)
+def test_compresses_json(middleware, encoding):
+    identity = JsonResponse(BODY)
+    size = len(identity.content)
+    identity["ETag"] = '"abc"'
+
+    response = middleware(identity)(get(accept=encoding))
+
+    assert response["Content-Encoding"] == encoding
+    assert response["Vary"] == "Accept-Encoding"
+    assert int(response["Content-Length"]) == len(response.content) < size
+    assert json.loads(DECODE[encoding](response.content)) == BODY
+    assert response["ETag"] == 'W/"abc"'
+
+
+def test_identity_still_varies(middleware):
+    response = middleware(JsonResponse(BODY))(get(accept="identity"))
+    assert not response.has_header("Content-Encoding")
+    assert response["Vary"] == "Accept-Encoding"
+
+
+def test_min_size(middleware, settings):
+    small = {"results": []}
+    response = middleware(JsonResponse(small))(get())
+    assert not response.has_header("Content-Encoding")
+    assert not response.has_header("Vary")
+
+    settings.FARM_COMPRESSION_MIN_SIZE = 100
+    response = middleware(JsonResponse({"results": ["abc" * 50]}))(get())
+    assert response["Content-Encoding"] == "zstd"
+
+
+@pytest.mark.parametrize(
+    "path, response",
+    [
+        ("/api/v1/farms/", HttpResponse("x" * 4096, content_type="text/html")),
+        ("/api/v1/farms/", HttpResponse("x" * 4096, content_type="text/csv")),
+        ("/api/v1/auth/login/", JsonResponse(BODY)),
+        ("/api/v1/auth/email/verify/", JsonResponse(BODY)),
+        ("/admin/", JsonResponse(BODY)),
+    ],
+)
+def test_skipped(middleware, path, response):
+    body = response.content
+    response = middleware(response)(get(path))
+    assert not response.has_header("Content-Encoding")
+    assert not response.has_header("Vary")
+    assert response.content == body
+
+
+def test_json_suffix_types(middleware):
+    response = JsonResponse(BODY, content_type="application/problem+json")
+    assert middleware(response)(get())["Content-Encoding"] == "zstd"
+
+
+def test_already_encoded(middleware):
+    response = HttpResponse(gzip.compress(b"x" * 4096), content_type="application/json")
+    response["Content-Encoding"] = "gzip"
+    body = response.content
+    response = middleware(response)(get(accept="br"))
+    assert response["Content-Encoding"] == "gzip"
+    assert response.content == body
+
+
+def test_incompressible_body_is_kept(middleware):
+    response = HttpResponse(os.urandom(4096), content_type="application/json")
+    body = response.content
+    response = middleware(response)(get(accept="gzip"))
+    assert not response.has_header("Content-Encoding")
+    assert response.content == body
+
+
+def rows():
+    for i in range(50):
+        yield json.dumps({"id": i}).encode() + b"\n"
+
+
+@pytest.mark.parametrize("encoding", ALL)
+def test_streaming(middleware, encoding):
+    response = StreamingHttpResponse(rows(), content_type="application/json")
+    response["Content-Length"] = "1"
+
+    response = middleware(response)(get(accept=encoding))
+
+    assert response["Content-Encoding"] == encoding
+    assert response["Vary"] == "Accept-Encoding"
+    assert not response.has_header("Content-Length")
+    chunks = list(response.streaming_content)
+    assert len(chunks) > 2  # flushed per row, not buffered
+    assert DECODE[encoding](b"".join(chunks)) == b"".join(rows())
+
+
+def test_async_streaming(middleware):
+    async def arows():
+        for row in rows():
+            yield row
+
+    response = StreamingHttpResponse(arows(), content_type="application/json")
+    response = middleware(response)(get(accept="gzip"))
+    assert response["Content-Encoding"] == "gzip"
+
+    async def collect():
+        return [chunk async for chunk in response.streaming_content]
+
+    assert gzip.decompress(b"".join(asyncio.run(collect()))) == b"".join(rows())
+
+
+def test_through_the_stack(api_client, make_farm, user, settings):
+    settings.FARM_COMPRESSION_MIN_SIZE = 256  # read when the stack is built
+    make_farm(user, fields=5)
+    plain = api_client.get("/api/v1/fields/")
+    response = api_client.get("/api/v1/fields/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == plain.content
@@ -0,0 +1,149 @@
+"""POST /crops/transition/ (farm.lifecycle)."""
+
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from farm.models import ActivityDailyStat, ActivityLog, Crop
+
+URL = "/api/v1/crops/transition/"
+DAY = datetime.date(2026, 6, 1)
+
+
+@pytest.fixture
+def field(make_farm, user):
+    """A field with crops planted / due 10 and 20 days around DAY."""
+    farm = make_farm(user, crops=0, animals=0, logs=0)
+    field = farm.fields.get()
+    for name, status, offset in [
+        ("early", "planned", -10),
+        ("late", "planned", 10),
+        ("ripe", "growing", -10),
+        ("green", "growing", 20),
+        ("done", "harvested", -20),
+    ]:
+        date = DAY + datetime.timedelta(days=offset)
+        Crop.objects.create(
+            field=field,
+            name=name,
+            status=status,
+            plant_date=date,
+            expected_harvest_date=date,
+        )
+    return field
+
+
+def statuses(field):
+    return dict(field.crops.values_list("name", "status"))
+
+
+def post(client, **body):
+    return client.post(URL, body, format="json")
+
+
+def test_moves_one_step(api_client, field):
+    response = post(api_client, status="growing", field=field.pk)
+    assert response.status_code == 200, response.content
+    assert response.json() == {
+        "status": "growing",
+        "from_status": "planned",
+        "changed": 2,
+        "logged": 0,
+    }
+    assert statuses(field) == {
+        "early": "growing",
+        "late": "growing",
+        "ripe": "growing",
+        "green": "growing",
+        "done": "harvested",
+    }
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        ({"status": "planned"}, "status"),  # no way back
+        ({"status": "growing", "farm": None}, "farm"),
+        ({"status": "growing", "log_harvest": True}, "non_field_errors"),
+        (
+            {"status": "growing", "date_from": "2026-06-02", "date_to": "2026-06-01"},
+            "non_field_errors",
+        ),
+    ],
+)
+def test_rejected(api_client, field, body, error):
+    body.setdefault("field", field.pk)
+    response = post(api_client, **body)
+    assert response.status_code == 400
+    assert error in response.json()
+    assert statuses(field)["early"] == "planned"
+
+
+def test_needs_a_field_or_farm(api_client, field):
+    assert post(api_client, status="growing").status_code == 400
+
+
+def test_planting_window(api_client, field):
+    # growing: the window is on plant_date by default
+    response = post(api_client, status="growing", field=field.pk, date_to=DAY)
+    assert response.json()["changed"] == 1
+    assert statuses(field)["early"] == "growing"
+    assert statuses(field)["late"] == "planned"
+
+
+def test_harvest_window(api_client, field):
+    # harvested: on expected_harvest_date by default, plant_date on request
+    response = post(api_client, status="harvested", farm=field.farm_id, date_from=DAY)
+    assert response.json()["changed"] == 1
+    assert statuses(field)["green"] == "harvested"
+    assert statuses(field)["ripe"] == "growing"
+
+    response = post(
+        api_client,
+        status="harvested",
+        farm=field.farm_id,
+        date_field="plant_date",
+        date_to=DAY,
+    )
+    assert response.json()["changed"] == 1
+    assert statuses(field)["ripe"] == "harvested"
+
+
+def test_other_users_crops_are_untouched(client_for, other_user, field):
+    response = post(client_for(other_user), status="growing", field=field.pk)
+    assert response.json()["changed"] == 0
+    assert statuses(field)["early"] == "planned"
+
+
+def test_log_harvest(api_client, user, field):
+    with CaptureQueriesContext(connection) as queries:
+        response = post(
+            api_client,
+            status="harvested",
+            field=field.pk,
+            log_harvest=True,
+            date=DAY,
+            note="dry",
+        )
+    assert response.json()["changed"] == response.json()["logged"] == 2
+
+    logs = ActivityLog.objects.filter(activity_type="harvesting").order_by("crop__name")
+    assert [(log.crop.name, log.field_id, log.date) for log in logs] == [
+        ("green", field.pk, DAY),
+        ("ripe", field.pk, DAY),
+    ]
+    assert logs[0].description == "Harvested green\ndry"
+    assert {log.owner_id for log in logs} == {user.pk}
+    assert {log.created_by_id for log in logs} == {user.pk}
+    stat = ActivityDailyStat.objects.get(activity_type="harvesting")
+    assert (stat.farm_id, stat.field_id, stat.date, stat.count) == (
+        field.farm_id,
+        field.pk,
+        DAY,
+        2,
+    )
+
+    [locking] = [q["sql"] for q in queries if "FOR UPDATE" in q["sql"]]
+    assert 'FOR UPDATE OF "farm_crop"' in locking
@@ -0,0 +1,94 @@
+"""Email OTP views: DRF's request / response contract, send -> verify."""
+
+import re
+
+import pytest
+from allauth.account.models import EmailAddress
+from django.core import mail
+from rest_framework.test import APIClient
+
+from farm.models import EmailOTP
+
+SEND = "/api/v1/auth/email/send-code/"
+VERIFY = "/api/v1/auth/email/verify-code/"
+
+
+@pytest.fixture(autouse=True)
+def _locmem_email(settings):
+    settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+
+@pytest.fixture
+def inactive_user(django_user_model):
+    return django_user_model.objects.create_user(
+        "carol", email="carol@example.com", is_active=False
+    )
+
+
+def sent_code():
+    return re.search(r"\b(\d{6})\b", mail.outbox[-1].body).group(1)
+
+
+def test_send_then_verify(inactive_user):
+    client = APIClient()
+    response = client.post(SEND, {"email": "Carol@example.com"}, format="json")
+    assert response.status_code == 200, response.content
+    assert response.json() == {"detail": "Verification code sent"}
+    assert mail.outbox[-1].to == ["carol@example.com"]
+
+    response = client.post(
+        VERIFY, {"email": "carol@example.com", "code": sent_code()}, format="json"
+    )
+    assert response.status_code == 200, response.content
+    inactive_user.refresh_from_db()
+    assert inactive_user.is_active
+    assert EmailAddress.objects.get(user=inactive_user).verified
+    assert not EmailOTP.objects.filter(user=inactive_user, used=False).exists()
+
+
+def test_form_bodies_are_parsed(inactive_user):
+    client = APIClient()
+    response = client.post(SEND, {"email": "carol@example.com"})  # multipart
+    assert response.status_code == 200, response.content
+
+    response = client.post(
+        VERIFY,
+        f"email=carol%40example.com&code={sent_code()}",
+        content_type="application/x-www-form-urlencoded",
+    )
+    assert response.status_code == 200, response.content
+
+
+def test_wrong_code_uses_an_attempt(inactive_user):
+    client = APIClient()
+    client.post(SEND, {"email": "carol@example.com"}, format="json")
+    code = "000000" if sent_code() != "000000" else "111111"
+
+    response = client.post(
+        VERIFY, {"email": "carol@example.com", "code": code}, format="json"
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid code"}
+    assert EmailOTP.objects.get(user=inactive_user).attempts_left == 4
+
+
+def test_malformed_json_is_a_json_400(db):
+    response = APIClient().post(SEND, b'{"email": ', content_type="application/json")
+    assert response.status_code == 400
+    assert response["Content-Type"] == "application/json"
+    assert response.json()["detail"].startswith("JSON parse error")
+
+
+@pytest.mark.parametrize("url", [SEND, VERIFY])
+def test_other_methods_are_a_json_405(db, url):
+    response = APIClient().get(url)
+    assert response.status_code == 405
+    assert response["Content-Type"] == "application/json"
+    assert response.json() == {"detail": 'Method "GET" not allowed.'}
+    assert set(response["Allow"].split(", ")) == {"POST", "OPTIONS"}
+
+
+def test_unknown_email_is_a_404(db):
+    response = APIClient().post(SEND, {"email": "nobody@example.com"}, format="json")
+    assert response.status_code == 404
+    assert len(mail.outbox) == 0
@@ -0,0 +1,110 @@
+"""DELETE /farms/<id>/: the farm and everything under it vanish at once."""
+
+import datetime
+
+import pytest
+
+from farm.models import ActivityDailyStat, ActivityLog, Animal, Crop, Farm, Field
+from farm.purge import purge_farm
+
+
+@pytest.fixture
+def deleting(api_client, farm):
+    response = api_client.delete(f"/api/v1/farms/{farm.pk}/")
+    assert response.status_code == 202
+    return farm
+
+
+def ids(response):
+    assert response.status_code == 200, response.content
+    return {row["id"] for row in response.json()["results"]}
+
+
+def test_children_are_hidden(api_client, make_farm, user, deleting):
+    kept = make_farm(user, name="South")
+
+    assert ids(api_client.get("/api/v1/farms/")) == {kept.pk}
+    assert ids(api_client.get("/api/v1/fields/")) == set(
+        kept.fields.values_list("pk", flat=True)
+    )
+    assert ids(api_client.get("/api/v1/crops/")) == set(
+        kept.crops.values_list("pk", flat=True)
+    )
+    assert ids(api_client.get("/api/v1/animals/")) == set(
+        kept.animals.values_list("pk", flat=True)
+    )
+    assert ids(api_client.get("/api/v1/activities/")) == set(
+        kept.activities.values_list("pk", flat=True)
+    )
+
+    field = deleting.fields.get()
+    assert api_client.get(f"/api/v1/fields/{field.pk}/").status_code == 404
+    crop = deleting.crops.get()
+    assert api_client.get(f"/api/v1/crops/{crop.pk}/").status_code == 404
+
+
+def test_bulk_actions_skip_them(api_client, deleting):
+    calendar = api_client.get("/api/v1/crops/harvest-calendar/").json()
+    assert calendar["overdue"] == [] and calendar["weeks"] == []
+
+    response = api_client.post(
+        "/api/v1/crops/transition/",
+        {"status": "harvested", "farm": deleting.pk},
+        format="json",
+    )
+    assert response.json()["changed"] == 0
+
+    response = api_client.post(
+        "/api/v1/animals/health/",
+        {"health_status": "sick", "farm": deleting.pk},
+        format="json",
+    )
+    assert response.json()["selected"] == 0
+
+    today = datetime.date.today()
+    stats = api_client.get(
+        "/api/v1/activities/stats/",
+        {"date_from": today.isoformat(), "date_to": today.isoformat()},
+    )
+    assert stats.status_code == 200
+    assert stats.json()["results"] == []
+
+
+def test_no_new_rows_under_them(api_client, deleting):
+    field = deleting.fields.get()
+    response = api_client.post(
+        "/api/v1/crops/",
+        {"field": field.pk, "name": "Late", "plant_date": "2026-01-01"},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert "field" in response.json()
+
+    response = api_client.post(
+        "/api/v1/animals/",
+        {"farm": deleting.pk, "species": "goat", "tag_id": "late-1"},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert "farm" in response.json()
+
+
+def test_purge_removes_everything(make_farm, user, deleting):
+    kept = make_farm(user, name="South")
+    # a log of another farm pointing into the deleted one: unlinked, kept
+    stray = ActivityLog.objects.create(
+        farm=kept,
+        animal=deleting.animals.get(),
+        date=datetime.date.today(),
+        activity_type="feeding",
+    )
+
+    deleted = purge_farm(deleting.pk, batch_size=1)
+
+    assert deleted["farms"] == 1
+    assert not Farm.objects.filter(pk=deleting.pk).exists()
+    for model in (Field, Crop, Animal, ActivityLog, ActivityDailyStat):
+        assert not model.objects.filter(farm_id=deleting.pk).exists()
+    stray.refresh_from_db()
+    assert stray.animal_id is None
+    assert kept.fields.count() == 1
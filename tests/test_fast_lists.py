@@ -0,0 +1,60 @@
+"""
+FastListMixin pages render to the same bytes as the ModelSerializer path
+(FARM_FAST_LIST off) — farm/fastpath.py's guarantee.
+"""
+
+import pytest
+
+from farm.fastpath import RowSerializer
+
+PATHS = [
+    "/api/v1/farms/",
+    "/api/v1/fields/",
+    "/api/v1/crops/",
+    "/api/v1/animals/",
+    "/api/v1/activities/",
+    "/api/v1/activities/?q=watered",
+    "/api/v1/activities/?q=watered&fields=id,description,search_rank",
+    "/api/v1/farms/?fields=id,name",
+    "/api/v1/crops/?fields=id,field,status",
+    "/api/v1/activities/?fields=id,created_by,date",
+]
+
+
+@pytest.fixture
+def data(make_farm, user):
+    farms = [make_farm(user, name=f"Farm {i}", fields=2, logs=3) for i in range(2)]
+    # one log with a created_by: the others take RowSerializer's SKIP branch
+    log = farms[0].activities.first()
+    log.created_by = user
+    log.description = "watered the watered rows twice"
+    log.save()
+    return farms
+
+
+@pytest.fixture
+def fast_pages(monkeypatch):
+    """Counts the pages RowSerializer renders."""
+    calls = []
+    to_representation = RowSerializer.to_representation
+
+    def spy(self, rows):
+        calls.append(self.model)
+        return to_representation(self, rows)
+
+    monkeypatch.setattr(RowSerializer, "to_representation", spy)
+    return calls
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_same_bytes_as_the_serializer(api_client, data, settings, fast_pages, path):
+    settings.FARM_FAST_LIST = False
+    slow = api_client.get(path)
+    assert slow.status_code == 200, slow.content
+    assert not fast_pages
+
+    settings.FARM_FAST_LIST = True
+    fast = api_client.get(path)
+    assert fast_pages, "the fast path was not taken"
+    assert fast.content == slow.content
+    assert fast.json()["results"]
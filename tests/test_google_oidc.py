@@ -0,0 +1,151 @@
+"""
+farm.google_oidc: id_tokens checked against the cached discovery document /
+JWKS, refetched when they expire or when Google rotates its signing keys.
+"""
+
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from farm import google_oidc
+
+DISCOVERY_URL = "https://accounts.test/.well-known/openid-configuration"
+JWKS_URL = "https://accounts.test/oauth2/v3/certs"
+ISSUER = "https://accounts.test"
+AUDIENCE = "client-id"
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update(kid=kid, alg="RS256", use="sig")
+    return private_key, jwk
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {kid: make_key(kid) for kid in ("key-1", "key-2")}
+
+
+def sign(keys, kid):
+    now = int(time.time())
+    claims = {
+        "iss": ISSUER,
+        "aud": AUDIENCE,
+        "sub": "42",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, keys[kid][0], algorithm="RS256", headers={"kid": kid})
+
+
+class Google:
+    """The discovery and JWKS endpoints, with fetch counts."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.published = ["key-1"]
+        self.max_age = 600
+        self.down = False
+        self.fetches = {DISCOVERY_URL: 0, JWKS_URL: 0}
+
+    def __call__(self, request):
+        url = str(request.url)
+        self.fetches[url] += 1
+        if self.down:
+            return httpx.Response(503)
+        headers = {"Cache-Control": f"public, max-age={self.max_age}"}
+        if url == DISCOVERY_URL:
+            body = {"issuer": ISSUER, "jwks_uri": JWKS_URL}
+        else:
+            body = {"keys": [self.keys[kid][1] for kid in self.published]}
+        return httpx.Response(200, json=body, headers=headers)
+
+
+@pytest.fixture
+def google(mock_upstream, monkeypatch, settings, clock, keys):
+    settings.GOOGLE_OIDC_DISCOVERY_URL = DISCOVERY_URL
+    monkeypatch.setattr(google_oidc, "time", clock)
+    monkeypatch.setattr(google_oidc, "_memo", {})
+    upstream = Google(keys)
+    mock_upstream(upstream)
+    return upstream
+
+
+def verify(keys, kid):
+    return google_oidc.verify_id_token(sign(keys, kid), AUDIENCE)
+
+
+def test_documents_are_fetched_once(google, keys):
+    for _ in range(3):
+        assert verify(keys, "key-1")["sub"] == "42"
+    assert google.fetches == {DISCOVERY_URL: 1, JWKS_URL: 1}
+
+
+def test_refetched_after_max_age(google, keys, clock):
+    verify(keys, "key-1")
+    clock.advance(599)
+    verify(keys, "key-1")
+    assert google.fetches[JWKS_URL] == 1
+    clock.advance(2)
+    verify(keys, "key-1")
+    assert google.fetches == {DISCOVERY_URL: 2, JWKS_URL: 2}
+
+
+def test_max_age_is_capped(google, keys, clock, settings):
+    settings.GOOGLE_OIDC_MAX_CACHE_AGE = 300
+    google.max_age = 86400
+    verify(keys, "key-1")
+    clock.advance(301)
+    verify(keys, "key-1")
+    assert google.fetches[JWKS_URL] == 2
+
+
+def test_other_workers_use_the_shared_copy(google, keys, monkeypatch):
+    verify(keys, "key-1")
+    monkeypatch.setattr(google_oidc, "_memo", {})  # a fresh process
+    verify(keys, "key-1")
+    assert google.fetches == {DISCOVERY_URL: 1, JWKS_URL: 1}
+
+
+def test_rotated_key_triggers_one_refetch(google, keys, clock):
+    verify(keys, "key-1")
+    google.published = ["key-1", "key-2"]
+
+    # just fetched: an unknown kid doesn't get to refetch yet
+    with pytest.raises(jwt.InvalidKeyError):
+        verify(keys, "key-2")
+    assert google.fetches[JWKS_URL] == 1
+
+    clock.advance(google_oidc.JWKS_MIN_REFRESH + 1)
+    assert verify(keys, "key-2")["sub"] == "42"
+    assert verify(keys, "key-1")["sub"] == "42"
+    assert google.fetches[JWKS_URL] == 2
+
+
+def test_unknown_kids_refetch_at_most_once_a_minute(google, keys, clock):
+    verify(keys, "key-1")
+    clock.advance(google_oidc.JWKS_MIN_REFRESH + 1)
+    for _ in range(5):  # key-2 never gets published
+        with pytest.raises(jwt.InvalidKeyError):
+            verify(keys, "key-2")
+    assert google.fetches[JWKS_URL] == 2
+
+
+def test_stale_copy_serves_while_google_is_down(google, keys, clock):
+    verify(keys, "key-1")
+    google.down = True
+    clock.advance(601)
+    assert verify(keys, "key-1")["sub"] == "42"
+    fetches = google.fetches[JWKS_URL]
+
+    # retried only every JWKS_MIN_REFRESH meanwhile
+    verify(keys, "key-1")
+    assert google.fetches[JWKS_URL] == fetches
+
+    clock.advance(google_oidc.STALE_FOR)
+    with pytest.raises(httpx.HTTPStatusError):
+        verify(keys, "key-1")
@@ -0,0 +1,62 @@
+"""GET /crops/harvest-calendar/."""
+
+import datetime
+
+import pytest
+
+from farm.models import Crop
+
+URL = "/api/v1/crops/harvest-calendar/"
+
+
+@pytest.fixture
+def crops(farm):
+    """Open crops of `farm` due 1..5 days ago and in 0..2 days."""
+    field = farm.fields.get()
+    Crop.objects.filter(field=field).delete()
+    today = datetime.date.today()
+    for days in (-5, -4, -3, -2, -1, 0, 1, 2):
+        Crop.objects.create(
+            field=field,
+            name=f"due {days}",
+            expected_harvest_date=today + datetime.timedelta(days=days),
+            status="growing",
+        )
+    Crop.objects.create(
+        field=field, name="done", expected_harvest_date=today, status="harvested"
+    )
+    return field
+
+
+def names(rows):
+    return [row["name"] for row in rows]
+
+
+def test_overdue_and_weeks(api_client, crops):
+    data = api_client.get(URL, {"days": 2}).json()
+    assert names(data["overdue"]) == ["due -5", "due -4", "due -3", "due -2", "due -1"]
+    assert not data["overdue_truncated"]
+    upcoming = [crop for week in data["weeks"] for crop in week["crops"]]
+    assert names(upcoming) == ["due 0", "due 1", "due 2"]
+    assert not any(crop["overdue"] for crop in upcoming)
+
+
+def test_overdue_is_capped(api_client, crops):
+    data = api_client.get(URL, {"overdue_limit": 2}).json()
+    assert names(data["overdue"]) == ["due -5", "due -4"]
+    assert data["overdue_truncated"]
+
+    data = api_client.get(URL, {"overdue_limit": 5}).json()
+    assert len(data["overdue"]) == 5
+    assert not data["overdue_truncated"]
+
+
+def test_without_overdue(api_client, crops):
+    data = api_client.get(URL, {"include_overdue": "false"}).json()
+    assert data["overdue"] == []
+    assert not data["overdue_truncated"]
+
+
+def test_other_users_crops_are_hidden(client_for, other_user, crops):
+    data = client_for(other_user).get(URL).json()
+    assert data["overdue"] == [] and data["weeks"] == []
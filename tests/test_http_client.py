@@ -0,0 +1,161 @@
+"""farm.http_client.post: bounded retries and the circuit breaker."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from farm import http_client
+from farm.http_client import CircuitBreaker, CircuitOpen
+
+URL = "https://upstream.test/token"
+
+
+@pytest.fixture
+def upstream(mock_upstream):
+    """Replies with the scripted statuses / exceptions in turn, the last repeating."""
+    calls = []
+    script = []
+
+    def handler(request):
+        calls.append(request)
+        outcome = script.pop(0) if len(script) > 1 else script[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"status": outcome})
+
+    mock_upstream(handler)
+    return calls, script
+
+
+def post(**kwargs):
+    return asyncio.run(http_client.post(URL, data={"code": "x"}, **kwargs))
+
+
+def connect_error():
+    return httpx.ConnectError("connection refused")
+
+
+def test_retries_connect_errors_then_succeeds(upstream):
+    calls, script = upstream
+    script[:] = [connect_error(), connect_error(), 200]
+    assert post(retries=2).status_code == 200
+    assert len(calls) == 3
+
+
+def test_gives_up_after_retries(upstream):
+    calls, script = upstream
+    script[:] = [connect_error()]
+    with pytest.raises(httpx.ConnectError):
+        post(retries=2)
+    assert len(calls) == 3
+
+
+def test_last_retryable_status_is_returned(upstream):
+    calls, script = upstream
+    script[:] = [503]
+    assert post(retries=1).status_code == 503
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("outcome", [500, 400, httpx.ReadTimeout("slow")])
+def test_no_retry_once_the_server_may_have_acted(upstream, outcome):
+    # the one-time code may have been spent: a second POST would fail anyway
+    calls, script = upstream
+    script[:] = [outcome, 200]
+    if isinstance(outcome, Exception):
+        with pytest.raises(httpx.ReadTimeout):
+            post(retries=3)
+    else:
+        assert post(retries=3).status_code == outcome
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setattr(http_client, "time", clock)
+    return CircuitBreaker("test", threshold=2, reset_after=30)
+
+
+def test_breaker_opens_after_threshold(upstream, breaker):
+    calls, script = upstream
+    script[:] = [500]
+    post(breaker=breaker, retries=0)
+    assert not breaker.is_open
+    post(breaker=breaker, retries=0)
+    assert breaker.is_open
+
+    with pytest.raises(CircuitOpen) as excinfo:
+        post(breaker=breaker, retries=0)
+    assert excinfo.value.retry_after == pytest.approx(30)
+    assert len(calls) == 2  # failed fast, upstream not called
+
+
+def test_retries_count_towards_the_breaker(upstream, breaker):
+    calls, script = upstream
+    script[:] = [connect_error()]
+    # the second failure opens it: the third attempt is not made
+    with pytest.raises(CircuitOpen):
+        post(breaker=breaker, retries=5)
+    assert len(calls) == 2
+
+
+def test_half_open_lets_one_probe_through(upstream, breaker, clock):
+    calls, script = upstream
+    script[:] = [500]
+    for _ in range(2):
+        post(breaker=breaker, retries=0)
+    assert breaker.is_open
+
+    clock.advance(31)
+    # the probe fails: open again for a full window, without waiting for
+    # `threshold` more failures
+    assert post(breaker=breaker, retries=0).status_code == 500
+    assert len(calls) == 3
+    with pytest.raises(CircuitOpen):
+        post(breaker=breaker, retries=0)
+
+    clock.advance(31)
+    script[:] = [200]
+    breaker.before_call()  # another caller takes the probe ...
+    with pytest.raises(CircuitOpen):  # ... the rest wait a new window
+        post(breaker=breaker, retries=0)
+    breaker.record_success()
+    assert not breaker.is_open
+    assert post(breaker=breaker, retries=0).status_code == 200
+
+
+def test_success_resets_the_failure_count(upstream, breaker):
+    calls, script = upstream
+    script[:] = [500, 200, 500]
+    for _ in range(3):
+        post(breaker=breaker, retries=0)
+    assert not breaker.is_open
+
+
+def test_no_async_client_per_loop_outside_asgi(upstream):
+    # WSGI: each async view gets a short-lived loop of its own; the pooled
+    # sync client is used instead of one AsyncClient per loop
+    calls, script = upstream
+    script[:] = [200]
+    post()
+    post()
+    assert len(calls) == 2
+    assert len(http_client._clients) == 0
+    assert http_client._sync_client is not None
+
+
+def test_one_async_client_per_loop_under_asgi(upstream, monkeypatch):
+    monkeypatch.setattr(http_client, "_loop_clients", True)
+    calls, script = upstream
+    script[:] = [200]
+
+    async def two_posts():
+        await http_client.post(URL)
+        await http_client.post(URL)
+        return list(http_client._clients.values())
+
+    clients = asyncio.run(two_posts())
+    assert len(calls) == 2
+    assert len(clients) == 1
+    assert http_client._sync_client is None
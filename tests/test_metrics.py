@@ -0,0 +1,119 @@
+"""farm.metrics histograms and exposition, and who may scrape /metrics."""
+
+import math
+
+import pytest
+from django.test import RequestFactory
+
+from farm import metrics
+from farm.metrics import SUB_BUCKETS, ZERO, Histogram, RequestStats
+from farm.metrics_views import prometheus_metrics
+
+
+@pytest.fixture
+def registry():
+    metrics.registry.clear()
+    yield metrics.registry
+    metrics.registry.clear()
+
+
+@pytest.mark.parametrize(
+    "value", [1e-6, 0.001, 0.0123, 0.5, 0.75, 1, 1.5, 3, 100, 123456.789]
+)
+def test_bucket_bounds(value):
+    index = metrics.bucket_index(value)
+    bound = metrics.upper_bound(index)
+    # the bucket holds the value, and its bound is within 1/SUB_BUCKETS of it
+    assert metrics.upper_bound(index - 1) <= value < bound
+    assert bound - value <= value / SUB_BUCKETS
+
+
+def test_powers_of_two_start_a_bucket():
+    for exponent in range(-10, 10):
+        value = math.ldexp(1, exponent)
+        assert metrics.upper_bound(metrics.bucket_index(value) - 1) == value
+
+
+def test_zero_bucket():
+    assert metrics.bucket_index(0) == metrics.bucket_index(-1) == ZERO
+    assert metrics.upper_bound(ZERO) == 0.0
+
+
+def test_histogram():
+    histogram = Histogram()
+    for value in [0, 1, 1, 2, 3, 100]:
+        histogram.record(value)
+    assert (histogram.count, histogram.sum) == (6, 107)
+    bounds = [bound for bound, _ in histogram.cumulative()]
+    assert bounds == sorted(bounds) and bounds[0] == 0.0
+    assert [seen for _, seen in histogram.cumulative()] == [1, 3, 4, 5, 6]
+    assert histogram.quantile(0.5) == metrics.upper_bound(metrics.bucket_index(1))
+    assert 100 <= histogram.quantile(1) <= 100 * (1 + 1 / SUB_BUCKETS)
+    assert Histogram().quantile(0.5) == 0.0
+
+    copy = histogram.copy()
+    histogram.record(5)
+    assert copy.count == 6
+
+
+def test_render(registry):
+    stats = RequestStats(db_queries=2, db_seconds=0.004, serialize_seconds=0.001)
+    registry.record("farm-list", "GET", 200, 0.02, stats, 1024)
+    registry.record("farm-list", "GET", 200, 0.03, RequestStats(), None)
+    registry.record('we"ird\\', "POST", 400, 0.01, RequestStats(), 10)
+
+    lines = metrics.render().splitlines()
+
+    name = "http_request_duration_seconds"
+    assert f"# HELP {name} Request latency through the middleware stack." in lines
+    assert f"# TYPE {name} histogram" in lines
+    labels = 'route="farm-list",method="GET"'
+    buckets = [line for line in lines if line.startswith(f"{name}_bucket{{{labels}")]
+    low, high = (metrics.upper_bound(metrics.bucket_index(v)) for v in (0.02, 0.03))
+    assert buckets == [
+        f'{name}_bucket{{{labels},le="{low:.6g}"}} 1',
+        f'{name}_bucket{{{labels},le="{high:.6g}"}} 2',
+        f'{name}_bucket{{{labels},le="+Inf"}} 2',
+    ]
+    assert f"{name}_sum{{{labels}}} 0.05" in lines
+    assert f"{name}_count{{{labels}}} 2" in lines
+    # size was recorded once, for the response that had one
+    assert f"http_response_size_bytes_count{{{labels}}} 1" in lines
+    assert f'http_request_db_queries_bucket{{{labels},le="0"}} 1' in lines
+
+    assert "# TYPE http_responses_total counter" in lines
+    assert f'http_responses_total{{{labels},status="200"}} 2' in lines
+    escaped = r'route="we\"ird\\",method="POST",status="400"'
+    assert f"http_responses_total{{{escaped}}} 1" in lines
+
+
+def test_render_empty(registry):
+    lines = metrics.render().splitlines()
+    assert [line for line in lines if not line.startswith("#")] == []
+
+
+def scrape(remote_addr="127.0.0.1", **headers):
+    request = RequestFactory().get("/metrics", REMOTE_ADDR=remote_addr, headers=headers)
+    return prometheus_metrics(request)
+
+
+def test_token(settings, registry):
+    settings.FARM_METRICS_TOKEN = "s3cret"
+    response = scrape("203.0.113.9", Authorization="Bearer s3cret")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert scrape(Authorization="Bearer nope").status_code == 403
+    assert scrape().status_code == 403  # loopback needs it too
+
+
+def test_no_token(settings):
+    settings.FARM_METRICS_TOKEN = ""
+    settings.DEBUG = False
+    # behind a same-host proxy everyone is 127.0.0.1
+    assert scrape().status_code == 403
+    assert scrape("::1").status_code == 403
+
+    settings.DEBUG = True
+    assert scrape().status_code == 200
+    assert scrape("::1").status_code == 200
+    assert scrape("203.0.113.9").status_code == 403
@@ -0,0 +1,20 @@
+"""The OpenAPI files in git match the code (farm.openapi)."""
+
+from farm import openapi
+
+
+def test_stored_schema_is_current():
+    # editing a serializer / view without regenerating the schema fails here
+    assert openapi.stale_files() == [], (
+        "stale OpenAPI schema: run `manage.py openapi_schema`, and with "
+        "ENABLE_GOOGLE_LOGIN=False for the .no-google-login files"
+    )
+
+
+def test_variant_per_urlconf_flags(settings):
+    settings.ENABLE_GOOGLE_LOGIN = settings.ENABLE_API_DOCS = True
+    assert openapi.variant() == ""
+    settings.ENABLE_GOOGLE_LOGIN = False
+    assert openapi.path("json").name == "schema.no-google-login.json"
+    settings.ENABLE_API_DOCS = False
+    assert openapi.variant() == ".no-google-login.no-api-docs"
@@ -0,0 +1,174 @@
+"""farm.profiler: stack collapsing, speedscope export, arming."""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from django.test import RequestFactory
+
+from farm import profiler
+from farm.profiler import Sampler, collapse, to_speedscope
+from farm.querywatch import short_path
+
+HERE = short_path(__file__)
+
+
+def outer():
+    return middle()
+
+
+def middle():
+    return inner()
+
+
+def inner():
+    return sys._getframe()
+
+
+def test_collapse():
+    stack = collapse(inner())
+    assert stack[-1] == f"inner ({HERE}:{inner.__code__.co_firstlineno})"
+    assert stack[-2].startswith(f"test_collapse ({HERE}:")
+
+    stack = collapse(outer())
+    assert [label.split(" ")[0] for label in stack[-4:]] == [
+        "test_collapse",
+        "outer",
+        "middle",
+        "inner",
+    ]
+
+
+def test_collapse_keeps_the_innermost_frames(monkeypatch):
+    monkeypatch.setattr(profiler, "MAX_DEPTH", 2)
+    assert [label.split(" ")[0] for label in collapse(outer())] == ["middle", "inner"]
+
+
+def test_labels_are_qualified():
+    class Resource:
+        def method(self):
+            return sys._getframe()
+
+    [label] = collapse(Resource().method())[-1:]
+    assert label.startswith("test_labels_are_qualified.<locals>.Resource.method (")
+
+
+def test_to_speedscope():
+    collapsed = (
+        "GET farm-list;run (farm/a.py:3);query (farm/b.py:10) 3\n"
+        "\n"
+        "GET farm-list;run (farm/a.py:3) 2\n"
+    )
+    document = json.loads(to_speedscope("requests-1", collapsed))
+
+    assert document["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+    assert document["shared"]["frames"] == [
+        {"name": "GET farm-list"},
+        {"name": "run", "file": "farm/a.py", "line": 3},
+        {"name": "query", "file": "farm/b.py", "line": 10},
+    ]
+    [profile] = document["profiles"]
+    assert profile["type"] == "sampled"
+    assert profile["name"] == "requests-1"
+    assert profile["samples"] == [[0, 1, 2], [0, 1]]
+    assert profile["weights"] == [3, 2]
+    assert (profile["startValue"], profile["endValue"]) == (0, 5)
+
+
+@pytest.fixture
+def sampler(settings, tmp_path):
+    settings.FARM_PROFILER_DIR = tmp_path
+    settings.FARM_PROFILER_INTERVAL_MS = 1
+    return Sampler()
+
+
+def request():
+    request = RequestFactory().get("/api/v1/farms/")
+    request.resolver_match = SimpleNamespace(view_name="farm-list")
+    return request
+
+
+def sampled(sampler):
+    """Wait for the sampler to catch the calling thread at least once."""
+    _, stacks = sampler.threads[threading.get_ident()]
+    deadline = time.monotonic() + 5
+    while not stacks and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert stacks
+
+
+def test_requests(sampler):
+    assert sampler.start() is sampler.requests
+    sampled(sampler)
+    sampler.stop(request())
+
+    assert sampler.threads == {}
+    roots = {stack[0] for stack in sampler.requests}
+    assert roots == {"GET farm-list"}
+    assert any(
+        "test_requests" in label for stack in sampler.requests for label in stack
+    )
+
+
+def test_arm_and_disarm(sampler, settings):
+    sampler.arm(time.time() + 60)
+    session = sampler.armed
+    assert session == Counter()
+    sampler.arm(time.time() + 1)  # already armed
+    assert sampler.armed is session
+
+    assert sampler.start() is session
+    sampled(sampler)
+    sampler.stop(request())
+    sampler._disarm()
+
+    assert sampler.armed is None
+    assert not sampler.requests
+    [path] = settings.FARM_PROFILER_DIR.glob("armed-*.txt")
+    assert path.read_text().startswith("GET farm-list;")
+
+
+def test_disarm_waits_for_requests_in_flight(sampler, settings):
+    sampler.arm(time.time() + 60)
+    sampler.start()
+    sampled(sampler)
+
+    # the session ends while the request is still running
+    disarm = threading.Thread(target=sampler._disarm)
+    disarm.start()
+    disarm.join(0.1)
+    assert disarm.is_alive()
+    assert sampler.armed is None
+    assert not list(settings.FARM_PROFILER_DIR.iterdir())
+
+    sampler.stop(request())
+    disarm.join(5)
+    assert not disarm.is_alive()
+    [path] = settings.FARM_PROFILER_DIR.glob("armed-*.txt")
+    assert "GET farm-list;" in path.read_text()
+
+
+def test_disarm_without_samples(sampler, settings):
+    sampler.arm(time.time() + 60)
+    sampler._disarm()
+    assert sampler.armed is None
+    assert not list(settings.FARM_PROFILER_DIR.iterdir())
+
+
+def test_middleware(api_client, farm, sampler, settings, monkeypatch):
+    monkeypatch.setattr(profiler, "sampler", sampler)
+    settings.FARM_PROFILER = True  # before the client builds the middleware
+    settings.FARM_PROFILER_TOKEN = "t0ken"
+
+    api_client.get("/api/v1/farms/")
+    assert not list(settings.FARM_PROFILER_DIR.iterdir())
+
+    response = api_client.get("/api/v1/farms/", HTTP_X_FARM_PROFILE="t0ken")
+    assert response.status_code == 200
+    [path] = settings.FARM_PROFILER_DIR.glob("requests-*.txt")
+    roots = {line.split(";")[0] for line in path.read_text().splitlines() if line}
+    assert roots <= {"GET farm-list"}
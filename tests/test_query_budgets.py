@@ -0,0 +1,61 @@
+"""
+List endpoints stay within their FARM_QUERY_BUDGETS entry and free of N+1
+patterns however many rows they return (farm.pytest_plugin's query_budget).
+"""
+
+import pytest
+
+from farm import querywatch
+
+# route name -> path
+LISTS = {
+    "farm-list": "/api/v1/farms/",
+    "farm-deletions": "/api/v1/farms/deletions/",
+    "field-list": "/api/v1/fields/",
+    "crop-list": "/api/v1/crops/",
+    "crop-harvest-calendar": "/api/v1/crops/harvest-calendar/",
+    "animal-list": "/api/v1/animals/",
+    "animal-health-summary": "/api/v1/animals/health-summary/",
+    "activity-list": "/api/v1/activities/",
+    "profile-list": "/api/v1/profiles/",
+    "auth-me": "/api/v1/auth/me/",
+}
+
+
+@pytest.fixture
+def farms(make_farm, user, other_user):
+    make_farm(other_user, name="Elsewhere")
+    return [
+        make_farm(user, name=f"Farm {i}", fields=3, crops=2, animals=4, logs=6)
+        for i in range(3)
+    ]
+
+
+@pytest.mark.parametrize("route", LISTS)
+def test_list_within_budget(query_budget, api_client, farms, route):
+    assert querywatch.budget_for(route) is not None
+    response = api_client.get(LISTS[route])
+    assert response.status_code == 200, response.content
+    assert [seen_route for _, _, seen_route, _ in query_budget] == [route]
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/v1/fields/?expand=farm",
+        "/api/v1/crops/?expand=field,farm",
+        "/api/v1/animals/?expand=farm",
+        "/api/v1/activities/?expand=farm,field,crop,animal",
+        "/api/v1/activities/?fields=id,date,activity_type",
+    ],
+)
+def test_sparse_and_expanded_lists_within_budget(query_budget, api_client, farms, path):
+    assert api_client.get(path).status_code == 200
+
+
+def test_budget_counts_every_query(query_budget, api_client, farms):
+    api_client.get("/api/v1/activities/")
+    [(_, _, route, log)] = query_budget
+    assert len(log) <= querywatch.budget_for(route)
+    assert querywatch.problems(log, route, budget=len(log) - 1)
+    query_budget.clear()  # the request above is not a failure of this test
@@ -0,0 +1,49 @@
+"""FastJSONRenderer against DRF's JSONRenderer."""
+
+import datetime
+import decimal
+import json
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from farm.renderers import FastJSONRenderer, orjson
+
+pytestmark = pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+
+
+def render_both(data):
+    return JSONRenderer().render(data), FastJSONRenderer().render(data)
+
+
+def test_same_bytes_for_api_payloads():
+    data = [
+        {
+            "id": 1,
+            "name": "North field \u2028 \u00fcn\u00efcode",
+            "area": decimal.Decimal("12.50"),
+            "date": datetime.date(2026, 5, 1),
+            "created_at": datetime.datetime(
+                2026, 5, 1, 8, 30, tzinfo=datetime.timezone.utc
+            ),
+            "tags": None,
+            "rank": 0.0607927,
+        }
+    ]
+    stock, fast = render_both(data)
+    assert fast == stock
+
+
+@pytest.mark.parametrize(
+    "value, stock_bytes, fast_bytes",
+    [
+        (1e16, b'{"search_rank":1e+16}', b'{"search_rank":1e16}'),
+        (1e-5, b'{"search_rank":1e-05}', b'{"search_rank":0.00001}'),
+    ],
+)
+def test_exponent_floats_are_spelled_differently(value, stock_bytes, fast_bytes):
+    # documented in farm.renderers: same value, orjson's spelling
+    stock, fast = render_both({"search_rank": value})
+    assert stock == stock_bytes
+    assert fast == fast_bytes
+    assert json.loads(fast) == json.loads(stock) == {"search_rank": value}
@@ -0,0 +1,124 @@
+"""
+farm.routers: per-request read routing through a ContextVar, read-your-writes
+pins and falling back to the primary when a replica is unreachable.
+"""
+
+import contextvars
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+
+from farm import routers
+from farm.models import Farm
+from farm.routers import (
+    ReplicaRouter,
+    is_pinned,
+    pin_to_primary,
+    replica_scope,
+    use_replica,
+)
+
+REPLICA = "replica_1"
+
+
+class FakeConnection:
+    def __init__(self):
+        self.up = True
+        self.attempts = 0
+
+    def ensure_connection(self):
+        self.attempts += 1
+        if not self.up:
+            raise OperationalError("could not connect to server")
+
+
+@pytest.fixture
+def replica(settings, monkeypatch, clock):
+    """One configured replica; `replica.up = False` takes it down."""
+    settings.DB_REPLICA_ALIASES = [REPLICA]
+    connection = FakeConnection()
+    monkeypatch.setattr(routers, "connections", {REPLICA: connection})
+    monkeypatch.setattr(routers, "time", clock)
+    monkeypatch.setattr(routers, "_down_until", {})
+    return connection
+
+
+def read_alias():
+    return ReplicaRouter().db_for_read(Farm)
+
+
+def test_reads_use_the_replica_within_the_scope(replica, user):
+    with replica_scope():
+        assert read_alias() == DEFAULT_DB_ALIAS  # until the request opts in
+        assert use_replica(user) == REPLICA
+        assert read_alias() == REPLICA
+        assert ReplicaRouter().db_for_write(Farm) == DEFAULT_DB_ALIAS
+    assert read_alias() == DEFAULT_DB_ALIAS
+
+
+def test_scope_is_per_context(replica, user):
+    # concurrent requests (threads, asyncio tasks) each get their own
+    def request():
+        with replica_scope():
+            use_replica(user)
+            return read_alias()
+
+    with replica_scope():
+        assert contextvars.copy_context().run(request) == REPLICA
+        assert read_alias() == DEFAULT_DB_ALIAS
+
+
+def test_write_pins_the_user_to_the_primary(replica, user, other_user):
+    pin_to_primary(user)
+    assert is_pinned(user)
+    with replica_scope():
+        assert use_replica(user) == DEFAULT_DB_ALIAS
+        assert read_alias() == DEFAULT_DB_ALIAS
+    with replica_scope():
+        assert use_replica(other_user) == REPLICA
+
+
+def test_no_replicas_no_pin(settings, user):
+    settings.DB_REPLICA_ALIASES = []
+    pin_to_primary(user)
+    assert not is_pinned(user)
+
+
+def test_unreachable_replica_falls_back_to_the_primary(replica, user, clock):
+    replica.up = False
+    with replica_scope():
+        assert use_replica(user) == DEFAULT_DB_ALIAS
+        assert read_alias() == DEFAULT_DB_ALIAS
+    assert replica.attempts == 1
+
+    # skipped without a connection attempt for a while ...
+    replica.up = True
+    with replica_scope():
+        assert use_replica(user) == DEFAULT_DB_ALIAS
+    assert replica.attempts == 1
+
+    # ... then tried again
+    clock.advance(routers.RETRY_DOWN_AFTER + 1)
+    with replica_scope():
+        assert use_replica(user) == REPLICA
+    assert replica.attempts == 2
+
+
+def test_api_write_pins_following_reads(replica, api_client, user, farm):
+    # the replica is "down" so the reads are served (by the primary) either
+    # way; what matters is whether they try it
+    replica.up = False
+    assert api_client.get("/api/v1/farms/").status_code == 200
+    assert replica.attempts == 1
+    assert not is_pinned(user)
+
+    response = api_client.patch(
+        f"/api/v1/farms/{farm.pk}/", {"name": "Renamed"}, format="json"
+    )
+    assert response.status_code == 200
+    assert is_pinned(user)
+
+    routers._down_until.clear()
+    response = api_client.get(f"/api/v1/farms/{farm.pk}/")
+    assert response.json()["name"] == "Renamed"
+    assert replica.attempts == 1  # pinned: the replica wasn't tried
@@ -0,0 +1,118 @@
+"""
+RLS mode (FARM_RLS_ENABLED): the Postgres policies alone keep one user's
+session away from another user's rows, reads and writes alike — the USING
+clause doubles as WITH CHECK for INSERT / UPDATE.
+"""
+
+import datetime
+
+import pytest
+from django.db import DatabaseError, connection, transaction
+
+from farm.models import ActivityDailyStat, ActivityLog, Farm, Field
+from farm.tenancy import (
+    enable_statements,
+    enter_tenant_role,
+    leave_tenant_role,
+    rls_role,
+    set_current_user,
+)
+
+pytestmark = pytest.mark.postgres
+
+
+@pytest.fixture
+def rls(db, settings):
+    """Policies on (rolled back with the test) and the API switched to them."""
+    if connection.vendor != "postgresql":
+        pytest.skip("row-level security needs Postgres")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rolsuper OR rolcreaterole FROM pg_roles WHERE rolname = current_user"
+        )
+        if not cursor.fetchone()[0]:
+            pytest.skip("the test database role may not CREATE ROLE")
+        # ALTER TABLE refuses to run with deferred FK checks pending
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        for sql in enable_statements(rls_role()):
+            cursor.execute(sql)
+    settings.FARM_RLS_ENABLED = True
+    yield
+    leave_tenant_role()
+
+
+@pytest.fixture
+def theirs(make_farm, other_user):
+    return make_farm(other_user, name="Theirs")
+
+
+@pytest.fixture
+def as_user(rls, user):
+    """This connection as `user`'s session, the way an API request runs."""
+    enter_tenant_role()
+    set_current_user(user)
+
+
+def test_session_sees_only_own_rows(farm, theirs, as_user):
+    assert list(Farm.objects.values_list("pk", flat=True)) == [farm.pk]
+    assert set(Field.objects.values_list("farm_id", flat=True)) == {farm.pk}
+    assert set(ActivityLog.objects.values_list("farm_id", flat=True)) == {farm.pk}
+    assert set(ActivityDailyStat.objects.values_list("farm_id", flat=True)) == {farm.pk}
+    # raw SQL too: the policy is on the table, not in the ORM
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM farm_activitylog WHERE farm_id = %s", [theirs.pk]
+        )
+        assert cursor.fetchone()[0] == 0
+
+
+def test_no_user_sees_nothing(farm, rls):
+    enter_tenant_role()
+    assert not Farm.objects.exists()
+    assert not ActivityLog.objects.exists()
+
+
+def test_writes_are_checked(user, other_user, farm, theirs, as_user):
+    # rows of theirs can't be changed or removed: the UPDATE / DELETE
+    # doesn't see them
+    assert Farm.objects.filter(pk=theirs.pk).update(name="Mine now") == 0
+    assert Field.objects.filter(farm_id=theirs.pk).delete()[0] == 0
+
+    # nor created in their name (WITH CHECK)
+    with pytest.raises(DatabaseError), transaction.atomic():
+        Farm.objects.create(owner=other_user, name="Planted")
+    with pytest.raises(DatabaseError), transaction.atomic():
+        ActivityLog.objects.bulk_create(
+            [
+                ActivityLog(
+                    farm_id=theirs.pk,
+                    owner_id=other_user.pk,
+                    date=datetime.date.today(),
+                    activity_type="other",
+                )
+            ]
+        )
+    # nor handed over
+    with pytest.raises(DatabaseError), transaction.atomic():
+        Farm.objects.filter(pk=farm.pk).update(owner=other_user)
+
+    leave_tenant_role()
+    assert Farm.objects.get(pk=theirs.pk).name == "Theirs"
+    assert Field.objects.filter(farm_id=theirs.pk).exists()
+    assert Farm.objects.get(pk=farm.pk).owner_id == user.pk
+
+
+def test_api_requests_run_under_the_policies(rls, api_client, farm, theirs):
+    response = api_client.get("/api/v1/farms/")
+    assert [row["id"] for row in response.json()["results"]] == [farm.pk]
+    assert api_client.get(f"/api/v1/farms/{theirs.pk}/").status_code == 404
+    response = api_client.get("/api/v1/activities/")
+    assert {row["farm"] for row in response.json()["results"]} == {farm.pk}
+
+    response = api_client.post(
+        "/api/v1/fields/",
+        {"farm": theirs.pk, "name": "Sneaky", "area": "1.00"},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert not Field.objects.filter(name="Sneaky").exists()
@@ -0,0 +1,138 @@
+"""?q= search: full-text on activities, trigram on farms and animals (farm.search)."""
+
+import datetime
+
+import pytest
+from django.db import connection
+
+from farm.models import ActivityLog, Animal
+
+pytestmark = pytest.mark.postgres
+
+DAY = datetime.date(2026, 5, 1)
+
+
+@pytest.fixture(autouse=True)
+def _postgres(db):
+    if connection.vendor != "postgresql":
+        pytest.skip("search needs Postgres")
+
+
+@pytest.fixture
+def pg_trgm(db):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            pytest.skip("the test database has no pg_trgm")
+
+
+@pytest.fixture
+def logs(make_farm, user, other_user):
+    """{description: log} on the user's farm, plus one of bob's."""
+    farm = make_farm(user, logs=0)
+    theirs = make_farm(other_user, name="South", logs=0)
+    descriptions = {
+        "Watered the north field": farm,
+        "Watered the seedlings, then watered the greenhouse again": farm,
+        "Fed the goats": farm,
+        "Watered the south field": theirs,
+    }
+    return {
+        text: ActivityLog.objects.create(
+            farm=owner_farm, date=DAY, activity_type="watering", description=text
+        )
+        for text, owner_farm in descriptions.items()
+    }
+
+
+def search(client, path, q, **params):
+    response = client.get(path, {"q": q, **params})
+    assert response.status_code == 200, response.content
+    return response.json()["results"]
+
+
+def test_activity_ranking(api_client, logs):
+    rows = search(api_client, "/api/v1/activities/", "water")
+    # stemmed: "water" finds "watered"; two hits outrank one
+    assert [row["description"] for row in rows] == [
+        "Watered the seedlings, then watered the greenhouse again",
+        "Watered the north field",
+    ]
+    assert rows[0]["search_rank"] > rows[1]["search_rank"] > 0
+
+
+def test_activity_snippets(api_client, logs):
+    rows = search(api_client, "/api/v1/activities/", "water")
+    assert rows[0]["search_snippet"] == (
+        "<mark>Watered</mark> the seedlings, then <mark>watered</mark> the greenhouse again"
+    )
+
+    # fragments: only the words around the hits
+    [row] = search(api_client, "/api/v1/activities/", "goat")
+    assert row["search_snippet"] == "<mark>goats</mark>"
+    assert row["id"] == logs["Fed the goats"].pk
+
+    [row] = search(api_client, "/api/v1/activities/", '"north field"')
+    assert row["search_snippet"] == "Watered the <mark>north</mark> <mark>field</mark>"
+
+
+def test_activity_websearch_syntax(api_client, logs):
+    rows = search(api_client, "/api/v1/activities/", "watered -greenhouse")
+    assert [row["description"] for row in rows] == ["Watered the north field"]
+    assert search(api_client, "/api/v1/activities/", "harvest") == []
+
+
+def test_ties_go_to_the_latest(api_client, logs):
+    log = logs["Watered the north field"]
+    copy = ActivityLog.objects.create(
+        farm=log.farm,
+        date=DAY + datetime.timedelta(days=1),
+        activity_type="watering",
+        description=log.description,
+    )
+    rows = search(api_client, "/api/v1/activities/", "north")
+    assert [row["id"] for row in rows] == [copy.pk, log.pk]
+
+
+def test_without_q_there_is_no_rank(api_client, logs):
+    rows = api_client.get("/api/v1/activities/").json()["results"]
+    assert len(rows) == 3
+    assert "search_rank" not in rows[0] and "search_snippet" not in rows[0]
+
+
+@pytest.fixture
+def farms(make_farm, user, other_user, pg_trgm):
+    for name in ["Sunny Meadow", "Sunny Meadow East", "River Bend", "Big Oak"]:
+        make_farm(user, name=name, fields=0, animals=0, logs=0)
+    make_farm(other_user, name="Sunny Meadow West", fields=0, animals=0, logs=0)
+
+
+def names(rows, key="name"):
+    return [row[key] for row in rows]
+
+
+def test_farm_substring(api_client, farms):
+    assert names(search(api_client, "/api/v1/farms/", "sunny meadow")) == [
+        "Sunny Meadow",  # closest first
+        "Sunny Meadow East",
+    ]
+    assert names(search(api_client, "/api/v1/farms/", "OAK")) == ["Big Oak"]
+
+
+def test_farm_typo(api_client, farms):
+    rows = search(api_client, "/api/v1/farms/", "Sunny Medow")
+    assert names(rows) == ["Sunny Meadow", "Sunny Meadow East"]
+    assert names(search(api_client, "/api/v1/farms/", "Rivr Bend")) == ["River Bend"]
+
+
+def test_animal_tags(api_client, make_farm, user, pg_trgm):
+    farm = make_farm(user, animals=0, logs=0)
+    for tag in ["COW-0042", "COW-0043", "SHEEP-7"]:
+        Animal.objects.create(farm=farm, species="cow", tag_id=tag)
+
+    rows = search(api_client, "/api/v1/animals/", "cow-004")
+    assert names(rows, "tag_id") == ["COW-0042", "COW-0043"]
+    # letter O for a zero
+    rows = search(api_client, "/api/v1/animals/", "cow-0O42")
+    assert names(rows, "tag_id")[0] == "COW-0042"
+    assert "SHEEP-7" not in names(rows, "tag_id")
@@ -0,0 +1,139 @@
+"""?fields= and ?expand= on the farm resources (farm.sparse)."""
+
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FARM_KEYS = {"id", "owner", "name", "location", "size_hectares", "created_at"}
+
+
+@pytest.fixture(autouse=True)
+def serializer_path(settings):
+    # only() applies to the ModelSerializer path; the fast path narrows its
+    # values() list instead (tests/test_fast_lists.py)
+    settings.FARM_FAST_LIST = False
+
+
+def get(client, path, **params):
+    """(response, the SQL it ran)."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(path, params)
+    assert response.status_code == 200, response.content
+    return response, [query["sql"] for query in queries]
+
+
+def selected(sql, table):
+    """Columns of `table` in the SELECT list of the query reading it."""
+    [query] = [q for q in sql if f'FROM "{table}"' in q and "COUNT(" not in q]
+    select = query[: query.index(" FROM ")]
+    return set(re.findall(r'"?(\w+)"?\."(\w+)"', select))  # joins: T4."id"
+
+
+def test_fields_narrow_keys_and_columns(api_client, farm):
+    response, sql = get(api_client, "/api/v1/farms/", fields="id,name")
+    assert [set(row) for row in response.json()["results"]] == [{"id", "name"}]
+    # owner_id stays for the permission check
+    assert selected(sql, "farm_farm") == {
+        ("farm_farm", "id"),
+        ("farm_farm", "name"),
+        ("farm_farm", "owner_id"),
+    }
+
+    response, sql = get(api_client, "/api/v1/farms/")
+    assert set(response.json()["results"][0]) == FARM_KEYS
+    assert ("farm_farm", "location") in selected(sql, "farm_farm")
+
+
+def test_display_and_dotted_sources(api_client, farm):
+    response, sql = get(
+        api_client, "/api/v1/animals/", fields="id,tag_id,health_status_display"
+    )
+    [row] = response.json()["results"]
+    assert set(row) == {"id", "tag_id", "health_status_display"}
+    assert row["health_status_display"] == "Good"
+    columns = {column for _, column in selected(sql, "farm_animal")}
+    assert columns == {"id", "tag_id", "health_status", "owner_id"}
+
+    log = farm.activities.get()
+    log.created_by = farm.owner
+    log.save()
+    response, sql = get(api_client, "/api/v1/activities/", fields="id,created_by")
+    assert response.json()["results"] == [{"id": log.pk, "created_by": "alice"}]
+    # created_by.username is joined, not fetched per row
+    columns = {column for _, column in selected(sql, "farm_activitylog")}
+    assert columns == {"id", "owner_id", "created_by_id", "username"}
+    assert len(sql) == 3  # user, count, page
+
+
+def test_detail(api_client, farm):
+    response, sql = get(api_client, f"/api/v1/farms/{farm.pk}/", fields="name")
+    assert response.json() == {"name": "North"}
+    columns = {column for _, column in selected(sql, "farm_farm")}
+    assert columns == {"id", "name", "owner_id"}
+
+
+def test_expand(api_client, farm, query_budget):
+    field = farm.fields.get()
+    response, sql = get(api_client, "/api/v1/crops/", expand="field,farm")
+    [row] = response.json()["results"]
+    assert row["field"] == {
+        "id": field.pk,
+        "farm": farm.pk,
+        "name": field.name,
+        "area": "5.00",
+        "soil_type": "loam",
+    }
+    assert set(row["farm"]) == FARM_KEYS
+    assert row["farm"]["id"] == farm.pk
+    # joined into the list query: no query per row
+    [query] = [q for q in sql if 'FROM "farm_crop"' in q and "COUNT(" not in q]
+    assert 'JOIN "farm_field"' in query and 'JOIN "farm_farm"' in query
+
+    response, _ = get(api_client, "/api/v1/crops/")
+    assert response.json()["results"][0]["field"] == field.pk
+    assert "farm" not in response.json()["results"][0]
+
+
+def test_expand_with_fields(api_client, farm):
+    response, _ = get(api_client, "/api/v1/animals/", fields="id,farm", expand="farm")
+    [row] = response.json()["results"]
+    assert set(row) == {"id", "farm"}
+    assert row["farm"]["name"] == "North"
+
+    # an expansion the ?fields= selection leaves out is dropped
+    response, _ = get(api_client, "/api/v1/animals/", fields="id", expand="farm")
+    assert set(response.json()["results"][0]) == {"id"}
+
+
+@pytest.mark.parametrize(
+    "path, params, error",
+    [
+        ("/api/v1/farms/", {"fields": "id,bogus"}, "fields"),
+        ("/api/v1/farms/", {"fields": "password"}, "fields"),
+        ("/api/v1/fields/", {"expand": "owner"}, "expand"),
+        ("/api/v1/crops/", {"expand": "field,animal"}, "expand"),
+        ("/api/v1/activities/", {"fields": "id,search_rank"}, "fields"),
+    ],
+)
+def test_unknown_names(api_client, farm, path, params, error):
+    response = api_client.get(path, params)
+    assert response.status_code == 400
+    assert list(response.json()) == [error]
+
+
+def test_unknown_names_on_detail(api_client, farm):
+    response = api_client.get(f"/api/v1/farms/{farm.pk}/", {"fields": "nope"})
+    assert response.status_code == 400
+    assert "nope" in response.json()["fields"]
+
+
+def test_writes_ignore_the_params(api_client, farm):
+    response = api_client.patch(
+        f"/api/v1/farms/{farm.pk}/?fields=bogus&expand=farm",
+        {"name": "Renamed"},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert set(response.json()) == FARM_KEYS